@@ -0,0 +1,89 @@
+import os
+
+# Chrome switches for a bot that never renders or decodes video. The fake capture device still
+# provides the microphone; the camera is blocked through the content settings instead.
+CHROME_ARGUMENTS = [
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-accelerated-video-decode",
+    "--disable-accelerated-video-encode",
+    "--disable-gpu-compositing",
+    "--disable-features=WebRtcHWDecoding,WebRtcHWEncoding",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# Tells the bridge to stop forwarding video to the bot and removes any local video track. The
+# ``channelLastN``/``startAudioOnly`` config overrides normally do this already; the script covers
+# deployments that ignore them (e.g. when the bot had to join through the prejoin screen) and is
+# safe to run repeatedly. Returns what it changed.
+RECEIVE_AUDIO_ONLY_SCRIPT = """
+const room = window.APP && window.APP.conference && window.APP.conference._room;
+if (!room) {
+    return null;
+}
+const applied = [];
+if (typeof room.setReceiverConstraints === 'function') {
+    room.setReceiverConstraints({lastN: 0, selectedSources: [], onStageSources: [], defaultConstraints: {maxHeight: 0}, constraints: {}});
+    applied.push('receiverConstraints');
+} else {
+    if (typeof room.setLastN === 'function') {
+        room.setLastN(0);
+        applied.push('lastN');
+    }
+    if (typeof room.setReceiverVideoConstraint === 'function') {
+        room.setReceiverVideoConstraint(0);
+        applied.push('receiverVideoConstraint');
+    }
+}
+const videoTrack = typeof room.getLocalVideoTrack === 'function' ? room.getLocalVideoTrack() : null;
+if (videoTrack) {
+    Promise.resolve(room.removeTrack ? room.removeTrack(videoTrack) : null).then(() => videoTrack.dispose && videoTrack.dispose());
+    applied.push('localVideoTrackRemoved');
+}
+document.querySelectorAll('video').forEach(video => {
+    video.pause();
+    video.srcObject = null;  // detach remote video, so nothing is decoded even if a track arrives
+});
+return applied;
+"""
+
+# Events after which the receive constraints are (re)applied: Jitsi Meet recomputes them as the
+# conference changes
+RECEIVE_AUDIO_ONLY_EVENTS = ('joined', 'participant_joined', 'track_added')
+
+
+def process_tree_usage(pid):
+    """
+    Return the CPU time (seconds, user + system) and resident memory (bytes) of process ``pid`` and
+    all of its descendants, e.g. chromedriver and the Chrome processes it started. Linux only.
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue  # the process exited
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    ticks = os.sysconf('SC_CLK_TCK')
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    cpu_seconds = 0.0
+    rss_bytes = 0
+    processes = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        # fields start at the process state (field 3 of proc(5)): utime and stime are fields 14 and 15, rss is 24
+        cpu_seconds += (int(fields[11]) + int(fields[12])) / ticks
+        rss_bytes += int(fields[21]) * page_size
+        processes += 1
+        pending.extend(children.get(current, []))
+    return {'cpu_seconds': cpu_seconds, 'rss_bytes': rss_bytes, 'processes': processes}
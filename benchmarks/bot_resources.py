@@ -0,0 +1,73 @@
+"""
+Measure the CPU and memory one bot's browser uses in a meeting, with and without audio-only mode.
+
+Each mode joins the meeting in a fresh bot, lets it settle, then samples chromedriver and its Chrome
+processes for a while. Point it at a meeting where other participants have their cameras on,
+otherwise there is no video to save. Needs Chrome and chromedriver.
+
+Usage (from the repository root):
+    python benchmarks/bot_resources.py --seconds 60
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot import JitsiBot  # noqa: E402
+from config import (  # noqa: E402
+    AUDIO_ONLY_CONFIG_OVERRIDES, BOT_NAME, MEETING_BASE_URL, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES,
+    build_meeting_url
+)
+
+
+def measure(audio_only, url, settle, seconds, interval):
+    """Join ``url`` and return the bot's browser CPU use (percent of one core) and peak/mean RSS (MiB)."""
+    bot = JitsiBot(audio_only=audio_only)
+    try:
+        bot.join(url)
+        time.sleep(settle)
+        start = bot.resource_usage()
+        started = time.monotonic()
+        rss = []
+        while time.monotonic() - started < seconds:
+            time.sleep(interval)
+            rss.append(bot.resource_usage()['rss_bytes'])
+        end = bot.resource_usage()
+        elapsed = time.monotonic() - started
+    finally:
+        bot.conference_events.stop()
+        bot.close_browser()
+    return {
+        'cpu_percent': 100 * (end['cpu_seconds'] - start['cpu_seconds']) / elapsed,
+        'rss_peak_mib': max(rss) / 2 ** 20,
+        'rss_mean_mib': sum(rss) / len(rss) / 2 ** 20,
+        'processes': end['processes'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=MEETING_BASE_URL, help="meeting URL, without a hash")
+    parser.add_argument("--seconds", type=float, default=60, help="how long to sample each mode")
+    parser.add_argument("--settle", type=float, default=10, help="seconds to wait after joining before sampling")
+    parser.add_argument("--interval", type=float, default=1, help="seconds between RSS samples")
+    args = parser.parse_args()
+
+    video_overrides = {key: value for key, value in MEETING_CONFIG_OVERRIDES.items() if key not in AUDIO_ONLY_CONFIG_OVERRIDES}
+    audio_only_overrides = dict(video_overrides, **AUDIO_ONLY_CONFIG_OVERRIDES)
+    modes = {
+        "audio + video": (False, build_meeting_url(args.url, BOT_NAME, video_overrides, MEETING_INTERFACE_OVERRIDES)),
+        "audio only": (True, build_meeting_url(args.url, BOT_NAME, audio_only_overrides, MEETING_INTERFACE_OVERRIDES)),
+    }
+    results = {name: measure(audio_only, url, args.settle, args.seconds, args.interval) for name, (audio_only, url) in modes.items()}
+
+    print(f"\nBrowser usage per bot over {args.seconds:.0f}s")
+    for name, result in results.items():
+        print(f"  {name:13s} cpu {result['cpu_percent']:6.1f}%  rss peak {result['rss_peak_mib']:7.1f} MiB"
+              f"  mean {result['rss_mean_mib']:7.1f} MiB  ({result['processes']} processes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measure the latency from requesting a bot until it has joined, launching Chrome on demand versus
+taking one from a warm DriverPool, against benchmarks/fake_meeting.html served locally.
+
+Usage (from the repository root, with Chrome and chromedriver installed):
+    python benchmarks/dispatch_latency.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot import JitsiBot  # noqa: E402
+from config import BOT_NAME, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES, build_meeting_url  # noqa: E402
+from driver_pool import DriverPool  # noqa: E402
+from join_latency import serve_fake_meeting  # noqa: E402
+
+
+def cold_dispatch(url):
+    requested = time.monotonic()
+    bot = JitsiBot()
+    try:
+        bot.join(url)
+        return time.monotonic() - requested
+    finally:
+        bot.conference_events.stop()
+        bot.close_browser()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=10, help="seconds between pooled dispatches, so the pool can refill")
+    args = parser.parse_args()
+
+    server = serve_fake_meeting()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/fake_meeting.html?load=1500&join=500"
+    url = build_meeting_url(base_url, BOT_NAME, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES)
+
+    cold = [cold_dispatch(url) for _ in range(args.runs)]
+
+    pool = DriverPool(size=args.pool_size)
+    pool.start()
+    time.sleep(args.interval)
+    bots = []
+    for _ in range(args.runs):
+        bots.append(pool.dispatch(url, capture_mode='browser', record_host_audio=False))
+        time.sleep(args.interval)
+    pool.stop()
+    for bot in bots:
+        bot.quit()
+    server.shutdown()
+
+    pooled = [dispatch["total"] for dispatch in pool.dispatches]
+    print(f"\nRequest to joined over {args.runs} runs")
+    print(f"  cold start  median {statistics.median(cold):.2f}s  max {max(cold):.2f}s")
+    print(f"  warm pool   median {statistics.median(pooled):.2f}s  max {max(pooled):.2f}s  ({pool.stats['cold_starts']} cold starts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Find how many concurrent meetings one bot host fits on this machine.
+
+Meetings are added one at a time to a single BotHost (one Chrome, one tab per meeting); after each
+one the browser's CPU use is sampled, until it exceeds the CPU budget. Point --url-template at rooms
+with real participants, e.g. https://meet.example.com/loadtest{n}. Needs Chrome and chromedriver.
+
+Usage (from the repository root):
+    python benchmarks/host_capacity.py --url-template https://meet.example.com/loadtest{n} --budget 0.8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot_host import BotHost  # noqa: E402
+
+
+def cpu_percent(host, seconds):
+    start = host.browser.usage()
+    time.sleep(seconds)
+    end = host.browser.usage()
+    return 100 * (end['cpu_seconds'] - start['cpu_seconds']) / seconds, end['rss_bytes']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url-template", required=True, help="meeting URL with {n} replaced by the meeting number")
+    parser.add_argument("--budget", type=float, default=0.8, help="fraction of all cores the host may use")
+    parser.add_argument("--max-meetings", type=int, default=100)
+    parser.add_argument("--settle", type=float, default=15, help="seconds to wait after adding a meeting")
+    parser.add_argument("--seconds", type=float, default=30, help="seconds to sample CPU use for")
+    args = parser.parse_args()
+
+    budget = 100 * os.cpu_count() * args.budget
+    host = BotHost()
+    fitted = 0
+    try:
+        print(f"CPU budget: {budget:.0f}% ({os.cpu_count()} cores)")
+        for n in range(1, args.max_meetings + 1):
+            host.add_meeting(f"meeting{n}", args.url_template.format(n=n))
+            time.sleep(args.settle)
+            cpu, rss = cpu_percent(host, args.seconds)
+            print(f"  {n:3d} meetings: cpu {cpu:6.1f}% ({cpu / n:5.1f}% per meeting), rss {rss / 2 ** 20:7.1f} MiB")
+            if cpu > budget:
+                break
+            fitted = n
+    finally:
+        host.close()
+    print(f"\nMeetings that fit within the budget: {fitted}")
+
+
+if __name__ == "__main__":
+    main()
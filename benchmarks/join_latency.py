@@ -0,0 +1,70 @@
+"""
+Measure how long the bot takes to join a meeting, with the config overrides in the URL hash
+versus going through the prejoin screen, against benchmarks/fake_meeting.html served locally.
+
+Usage (from the repository root, with Chrome and chromedriver installed):
+    python benchmarks/join_latency.py --runs 5
+"""
+import argparse
+import functools
+import os
+import statistics
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot import JitsiBot  # noqa: E402
+from config import BOT_NAME, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES, build_meeting_url  # noqa: E402
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fake_meeting():
+    """Serve the benchmarks directory on a free local port; returns the server."""
+    handler = functools.partial(QuietHandler, directory=os.path.dirname(os.path.abspath(__file__)))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(url, runs):
+    """Join ``url`` ``runs`` times in a fresh bot each time; returns the join times in seconds."""
+    times = []
+    for run in range(runs):
+        bot = JitsiBot()
+        try:
+            times.append(bot.join(url))
+        finally:
+            bot.conference_events.stop()
+            bot.close_browser()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--load-ms", type=int, default=1500, help="simulated app load time of the fake meeting")
+    parser.add_argument("--join-ms", type=int, default=500, help="simulated time from clicking join to being joined")
+    args = parser.parse_args()
+
+    server = serve_fake_meeting()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/fake_meeting.html?load={args.load_ms}&join={args.join_ms}"
+    modes = {
+        "url overrides": build_meeting_url(base_url, BOT_NAME, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES),
+        "prejoin screen": base_url,
+    }
+    results = {name: measure(url, args.runs) for name, url in modes.items()}
+    server.shutdown()
+
+    print(f"\nJoin time over {args.runs} runs (fake meeting: load {args.load_ms} ms, join {args.join_ms} ms)")
+    for name, times in results.items():
+        print(f"  {name:15s} median {statistics.median(times):.2f}s  min {min(times):.2f}s  max {max(times):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure what the stage timing hooks cost per phrase, with metrics disabled and enabled.
+
+A phrase passes five hooks (listen, encode, request, speaker lookup, transcript write); each
+is timed here the way the pipeline and the bot time them. Rendering the Prometheus text for
+``--meetings`` meetings is timed as well.
+
+Usage (from the repository root):
+    python benchmarks/metrics_overhead.py [--phrases 200000] [--meetings 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics  # noqa: E402
+
+STAGES = ("listen", "encode", "request", "speaker_lookup", "transcript_write")
+
+
+def run_hooks(on_timing, phrases):
+    started = time.perf_counter()
+    for _ in range(phrases):
+        for stage in STAGES:
+            stage_started = time.perf_counter()
+            if on_timing is not None:
+                on_timing(stage, time.perf_counter() - stage_started)
+    return (time.perf_counter() - started) / phrases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", type=int, default=200000)
+    parser.add_argument("--meetings", type=int, default=50)
+    args = parser.parse_args()
+
+    disabled = run_hooks(None, args.phrases)
+    metrics = Metrics()
+    enabled = run_hooks(metrics.timer("bench"), args.phrases)
+    print(f"hooks per phrase: disabled {disabled * 1e6:.2f} us, enabled {enabled * 1e6:.2f} us")
+
+    for meeting in range(args.meetings):
+        on_timing = metrics.timer(f"meeting-{meeting}")
+        for stage in STAGES:
+            on_timing(stage, 0.01 * (meeting % 7 + 1))
+    started = time.perf_counter()
+    text = metrics.render()
+    print(f"render for {args.meetings} meetings: {(time.perf_counter() - started) * 1e3:.1f} ms, {len(text) // 1024} KiB")
+    print(f"bench: {metrics.summary('bench')['request']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the recording formats: output size per minute of audio and encoder CPU time.
+
+A WAV file (or, by default, a synthetic speech-like signal with pauses) is fed through the
+recorder in real-time-sized blocks, as fast as the recorder takes them, once per format.
+Opus and FLAC need ffmpeg on the PATH.
+
+Usage (from the repository root):
+    python benchmarks/recording_formats.py [--input meeting.wav] [--formats wav opus flac]
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import wave
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_recorder import ChunkRecorder  # noqa: E402
+from recording_sinks import RECORD_FORMATS, create_sink  # noqa: E402
+
+
+def synthetic_speech(seconds, rate):
+    """Bursts of noisy tones with pauses, roughly like a conversation; 16-bit mono PCM."""
+    rng = random.Random(0)
+    samples = array('h')
+    while len(samples) < seconds * rate:
+        talk = rng.uniform(1, 6)
+        pitch = rng.uniform(100, 250)
+        samples.extend(
+            int(4000 * math.sin(2 * math.pi * pitch * i / rate) * (0.5 + 0.5 * math.sin(i / rate * 20)) + rng.gauss(0, 300))
+            for i in range(int(talk * rate))
+        )
+        samples.extend(int(rng.gauss(0, 30)) for _ in range(int(rng.uniform(0.3, 4) * rate)))
+    return samples[:int(seconds * rate)].tobytes()
+
+
+def run(record_format, pcm, rate, directory):
+    sink = create_sink(record_format, directory, rate)
+    recorder = ChunkRecorder(directory, rate, chunk_seconds=20, window_seconds=3, silence_threshold=300, sink=sink)
+    recorder.start()
+    started = time.process_time()
+    block = rate // 10 * 2
+    for offset in range(0, len(pcm), block):
+        recorder.write(pcm[offset:offset + block])
+    recorder.close()
+    own_cpu = time.process_time() - started  # segmentation and writing in this process
+    return sink, own_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="16-bit mono WAV file to record")
+    parser.add_argument("--seconds", type=float, default=600, help="length of the synthetic signal")
+    parser.add_argument("--formats", nargs="+", default=list(RECORD_FORMATS), choices=RECORD_FORMATS)
+    args = parser.parse_args()
+
+    if args.input:
+        with wave.open(args.input) as wf:
+            rate, pcm = wf.getframerate(), wf.readframes(wf.getnframes())
+    else:
+        rate = 44100
+        pcm = synthetic_speech(args.seconds, rate)
+    minutes = len(pcm) / 2 / rate / 60
+    print(f"{minutes:.1f} minutes of audio, {len(pcm) / minutes / 2 ** 20:.2f} MiB/min as raw PCM")
+
+    for record_format in args.formats:
+        directory = tempfile.mkdtemp(prefix=f"recording-{record_format}-")
+        try:
+            sink, own_cpu = run(record_format, pcm, rate, directory)
+        finally:
+            shutil.rmtree(directory)
+        encoder_cpu = sink.stats.get("encoder_cpu_seconds", 0.0)
+        print(f"  {type(sink).__name__:11s} {record_format:4s}: {sink.stats['bytes_out'] / minutes / 2 ** 20:6.3f} MiB/min, "
+              f"cpu {(own_cpu + encoder_cpu) / minutes:6.3f} s per audio minute "
+              f"({encoder_cpu / minutes:.3f} s in the encoder)")
+
+
+if __name__ == "__main__":
+    main()
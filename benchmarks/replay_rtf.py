@@ -0,0 +1,246 @@
+"""
+Replay recorded meeting audio through the bot's transcription path and check that it keeps up with real time.
+
+WAV files (by default the recorder's ``recordings/audio_chunk_*.wav``, or a synthetic speech-like
+signal when there are none) are joined into one session and read through
+``speech_recognition.AudioFile`` into the same ``TranscriptionPipeline`` that ``JitsiBot`` uses:
+noise floor calibration, ``Recognizer.listen``, and ``recognize_google`` on a pool of workers over
+a pooled ``HTTPTransport``. Recognition goes to a local stub of the Google endpoint that answers
+after ``--latency`` (plus up to ``--jitter``) seconds, so the network is out of the picture.
+
+Reported: real-time factor (processing time / audio time; below 1 keeps up), phrase latency
+percentiles (from the end of a phrase until its transcription is handed over), per-stage
+latencies, CPU time and peak memory. ``--pace 1`` feeds the audio at real-time speed, like a
+microphone, which is what the phrase latencies mean in production; the default feeds it as fast
+as the pipeline takes it.
+
+With ``--baseline`` the results are compared with a stored run and the script exits with status 1
+if any metric got worse by more than ``--tolerance``; ``--save-baseline`` stores this run.
+
+Usage (from the repository root):
+    python benchmarks/replay_rtf.py [--input 'recordings/*.wav'] [--latency 0.3] [--pace 1]
+    python benchmarks/replay_rtf.py --save-baseline benchmarks/replay_baseline.json
+    python benchmarks/replay_rtf.py --baseline benchmarks/replay_baseline.json
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr  # noqa: E402
+from config import TRANSCRIBE_WORKERS, TRANSCRIBE_QUEUE_SIZE, TRANSCRIBE_OVERFLOW_POLICY, TRANSCRIBE_SPILL_DIR  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from recording_formats import synthetic_speech  # noqa: E402
+from transcription import TranscriptionPipeline  # noqa: E402
+
+# Metrics compared with the baseline; all of them are worse when larger
+COMPARED = ("rtf", "latency_p50", "latency_p95", "latency_p99", "cpu_seconds_per_audio_minute", "peak_rss_mib")
+
+
+def serve_stub_recognizer(latency, jitter):
+    """Serve a stand-in for the Google speech endpoint on a free local port; returns the server."""
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    class StubRecognizerHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, as with the real endpoint
+
+        def do_POST(self):
+            audio = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                delay = latency + rng.uniform(0, jitter)
+            time.sleep(delay)
+            transcript = {"alternative": [{"transcript": f"phrase of {len(audio)} bytes", "confidence": 0.9}], "final": True}
+            body = ('{"result":[]}\n' + json.dumps({"result": [transcript], "result_index": 0}) + "\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRecognizerHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class PacedAudioFile(sr.AudioFile):
+    """An ``AudioFile`` that hands out its audio no faster than ``pace`` times real time (0 for no limit)."""
+
+    def __init__(self, filename_or_fileobject, pace=0):
+        super().__init__(filename_or_fileobject)
+        self.pace = pace
+
+    def __enter__(self):
+        source = super().__enter__()
+        if self.pace:
+            read, started, frames = self.stream.read, time.monotonic(), [0]
+
+            def paced_read(size=-1):
+                buffer = read(size)
+                frames[0] += len(buffer) // self.SAMPLE_WIDTH
+                delay = started + frames[0] / self.SAMPLE_RATE / self.pace - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                return buffer
+
+            self.stream.read = paced_read
+        return source
+
+
+def load_session(patterns, seconds):
+    """Join the WAV files matching ``patterns`` into one WAV in memory; returns ``(wav bytes, audio seconds, file count)``."""
+    paths = sorted(path for pattern in patterns for path in glob.glob(pattern))
+    params, frames = None, []
+    for path in paths:
+        with wave.open(path, "rb") as wf:
+            file_params = (wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+            if params is None:
+                params = file_params
+            elif file_params != params:
+                print(f"Skipping {path}: {file_params} differs from {params} (channels, sample width, rate)")
+                continue
+            frames.append(wf.readframes(wf.getnframes()))
+    if not frames:
+        print(f"No recordings match {patterns}, using {seconds:.0f} s of synthetic speech")
+        params, frames = (1, 2, 16000), [synthetic_speech(seconds, 16000)]
+    channels, sample_width, rate = params
+    data = io.BytesIO()
+    with wave.open(data, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(rate)
+        wf.writeframes(b"".join(frames))
+    audio_seconds = sum(len(f) for f in frames) / (channels * sample_width * rate)
+    return data.getvalue(), audio_seconds, len(paths) or 1
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def replay(wav, audio_seconds, endpoint, pace, workers):
+    """Transcribe the session once; returns the results as a dictionary."""
+    metrics = Metrics()
+    recognizer = sr.Recognizer()
+    recognizer.transport = sr.HTTPTransport(max_connections_per_host=workers, max_concurrency=workers)
+    recognizer.on_timing = metrics.timer()
+    phrases = []
+
+    def on_result(phrase, text, error):
+        if text is not None:
+            phrases.append(phrase)
+
+    pipeline = TranscriptionPipeline(
+        recognizer,
+        lambda: PacedAudioFile(io.BytesIO(wav), pace),
+        lambda audio: recognizer.recognize_google(audio, endpoint=endpoint),
+        on_result,
+        workers=workers,
+        queue_size=TRANSCRIBE_QUEUE_SIZE,
+        overflow_policy=TRANSCRIBE_OVERFLOW_POLICY,
+        spill_dir=TRANSCRIBE_SPILL_DIR,
+        on_source_ready=recognizer.calibrate_noise_floor,
+        backend="stub",
+        on_timing=recognizer.on_timing,
+    )
+    cpu_started, started = time.process_time(), time.perf_counter()
+    pipeline.start()
+    pipeline.capture_thread.join()  # the file has been read to the end
+    pipeline.stop()  # and every phrase recognised
+    elapsed = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+    recognizer.transport.close()
+
+    latencies = sorted(phrase.recognized_at - phrase.capture_end for phrase in phrases)
+    return {
+        "audio_seconds": round(audio_seconds, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "rtf": round(elapsed / audio_seconds, 4),
+        "phrases": len(phrases),
+        "stats": pipeline.stats,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_p99": percentile(latencies, 0.99),
+        "cpu_seconds_per_audio_minute": round(cpu_seconds / audio_seconds * 60, 4),
+        "peak_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # kilobytes on Linux
+        "stages": metrics.summary(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print each compared metric next to the baseline; returns the names of those that regressed."""
+    regressions = []
+    for name in COMPARED:
+        current, previous = results.get(name), baseline.get(name)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:30s} {current:10.4f}  baseline {previous:10.4f}  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", nargs="+", default=["recordings/audio_chunk_*.wav"], help="WAV files or glob patterns")
+    parser.add_argument("--seconds", type=float, default=120, help="length of the synthetic signal if no file matches")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds the stub recognizer takes to answer")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random seconds, up to this, per answer")
+    parser.add_argument("--pace", type=float, default=0, help="feed audio at this multiple of real time, 0 for as fast as possible")
+    parser.add_argument("--workers", type=int, default=TRANSCRIBE_WORKERS)
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative increase flagged as a regression")
+    parser.add_argument("--save-baseline", help="store this run's results as a baseline")
+    args = parser.parse_args()
+
+    wav, audio_seconds, files = load_session(args.input, args.seconds)
+    server = serve_stub_recognizer(args.latency, args.jitter)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/speech-api/v2/recognize"
+    print(f"Replaying {audio_seconds:.1f} s of audio from {files} file(s), stub latency {args.latency}+{args.jitter} s, "
+          f"{args.workers} workers, pace {args.pace or 'unlimited'}")
+    results = replay(wav, audio_seconds, endpoint, args.pace, args.workers)
+    results["settings"] = {"latency": args.latency, "jitter": args.jitter, "pace": args.pace, "workers": args.workers}
+    server.shutdown()
+
+    print(f"  real-time factor {results['rtf']:.3f} ({results['elapsed_seconds']:.1f} s for {results['audio_seconds']:.1f} s of audio)")
+    print(f"  {results['phrases']} phrases, pipeline {results['stats']}")
+    if results["phrases"]:
+        print(f"  phrase latency p50 {results['latency_p50']:.3f} s, p95 {results['latency_p95']:.3f} s, p99 {results['latency_p99']:.3f} s")
+    print(f"  cpu {results['cpu_seconds_per_audio_minute']:.3f} s per audio minute, peak rss {results['peak_rss_mib']:.1f} MiB")
+    for stage, summary in results["stages"].items():
+        print(f"  {stage:10s} n={summary['count']:<5d} p50 {summary['p50']:.4f} s  p95 {summary['p95']:.4f} s  p99 {summary['p99']:.4f} s")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != results["settings"]:
+            print(f"Warning: baseline settings {baseline.get('settings')} differ from this run's")
+        print(f"Compared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
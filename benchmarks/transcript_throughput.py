@@ -0,0 +1,85 @@
+"""
+Compare writing transcripts by opening the file for every phrase with the buffered transcript sink.
+
+Every simulated bot is a thread writing ``--phrases`` records to its own transcript as fast as it
+can; the time a bot spends in each write is what stalls its transcription pipeline. The sink is
+run once per fsync policy.
+
+Usage (from the repository root):
+    python benchmarks/transcript_throughput.py [--bots 50] [--phrases 500]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_sink import FSYNC_POLICIES, TranscriptSink, read_transcript  # noqa: E402
+from transcription import Phrase  # noqa: E402
+
+TEXT = "so the next thing on the agenda is the quarterly numbers for the new region"
+
+
+def open_per_phrase(path, meeting_id, phrases, latencies):
+    for seq in range(phrases):
+        started = time.perf_counter()
+        with open(path, "a") as f:
+            f.write(f"Speaker {seq % 4}: {TEXT}\n")
+        latencies.append(time.perf_counter() - started)
+
+
+def sink_writer(fsync_policy):
+    def write(path, meeting_id, phrases, latencies):
+        sink = TranscriptSink(path, meeting_id=meeting_id, fsync_policy=fsync_policy)
+        now = time.time()
+        for seq in range(phrases):
+            phrase = Phrase(seq, None, now + seq, now + seq + 2)
+            phrase.backend, phrase.recognized_at = "google", now + seq + 2.5
+            started = time.perf_counter()
+            sink.write(f"Speaker {seq % 4}", TEXT, phrase)
+            latencies.append(time.perf_counter() - started)
+        sink.close()
+    return write
+
+
+def run(name, writer, bots, phrases, directory):
+    latencies = [[] for _ in range(bots)]
+    threads = [
+        threading.Thread(target=writer, args=(os.path.join(directory, f"bot{i}.transcript"), f"bot{i}", phrases, latencies[i]))
+        for i in range(bots)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    values = sorted(value for bot in latencies for value in bot)
+    print(f"{name:<24} {bots * phrases / elapsed:>10.0f} phrases/s  "
+          f"write p50 {values[len(values) // 2] * 1e6:>7.1f} us  p99 {values[int(len(values) * 0.99)] * 1e6:>8.1f} us  "
+          f"max {values[-1] * 1e3:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--phrases", type=int, default=500, help="phrases written by each bot")
+    args = parser.parse_args()
+
+    runs = [("open per phrase", open_per_phrase)] + [(f"sink, fsync {policy}", sink_writer(policy)) for policy in FSYNC_POLICIES]
+    for name, writer in runs:
+        directory = tempfile.mkdtemp()
+        try:
+            run(name, writer, args.bots, args.phrases, directory)
+            if writer is not open_per_phrase:
+                assert len(list(read_transcript(os.path.join(directory, "bot0.transcript")))) == args.phrases
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Count the recognition calls a voice activity detector saves per meeting hour, on labelled audio.
+
+Each labelled file is read through ``speech_recognition.AudioFile`` and split into phrases by
+``Recognizer.listen``, once with the energy threshold (the default) and once with
+``speech_recognition.SpectralVAD``, after the same noise floor calibration the bot does. Every
+phrase is one recognition request. A phrase is false if it holds less than
+``Recognizer.phrase_threshold`` seconds of labelled speech (so it was started by typing, music
+or noise); a labelled speech segment is missed if no phrase overlaps it.
+
+A labelled file is a 16-bit mono WAV file with a JSON file of the same name next to it holding
+``{"speech": [[start_seconds, end_seconds], ...]}``, and optionally segments of other kinds of
+sound (such as ``"typing"`` or ``"music"``) that false phrases are attributed to. Without
+``--input``, a synthetic meeting is generated: talk with pauses, interrupted by stretches of
+typing and of music.
+
+Reported per detector, each per meeting hour: recognition calls, false phrases (by cause),
+missed speech segments, and seconds of audio sent for recognition that aren't speech. Then the
+calls saved per hour by the spectral detector.
+
+Usage (from the repository root):
+    python benchmarks/vad_calls.py [--input 'labelled/*.wav'] [--minutes 20]
+"""
+import argparse
+import collections
+import glob
+import io
+import json
+import os
+import sys
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr  # noqa: E402
+
+RATE = 16000
+
+
+def synthetic_talk(rng, seconds):
+    """Syllables of a harmonic voice shaped by two formants, with short gaps between them."""
+    out = []
+    while sum(len(part) for part in out) < seconds * RATE:
+        length = int(rng.uniform(0.12, 0.3) * RATE)
+        t = np.arange(length) / RATE
+        f0 = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(1, 3) * t))
+        phase = 2 * np.pi * np.cumsum(f0) / RATE
+        formants = (rng.uniform(400, 800), rng.uniform(1100, 2200))
+        syllable = np.zeros(length)
+        for harmonic in range(1, 30):
+            frequency = harmonic * f0.mean()
+            if frequency > 4000:
+                break
+            gain = np.exp(-((frequency - formants[0]) / 250.0) ** 2) + 0.3 * np.exp(-((frequency - formants[1]) / 250.0) ** 2) + 0.05
+            syllable += gain * np.sin(harmonic * phase)
+        syllable *= np.sin(np.pi * t / t[-1]) ** 2 * rng.uniform(2000, 5000) / (np.abs(syllable).max() or 1)
+        out.append(syllable)
+        out.append(np.zeros(int(rng.uniform(0.03, 0.12) * RATE)))
+    return np.concatenate(out)[:int(seconds * RATE)]
+
+
+def synthetic_typing(rng, seconds):
+    """Key clicks: short decaying broadband bursts at typing speed."""
+    out = np.zeros(int(seconds * RATE))
+    position = 0
+    while True:
+        position += int(rng.uniform(0.08, 0.3) * RATE)
+        if position + 160 >= len(out):
+            return out
+        decay = np.exp(-np.arange(160) / rng.uniform(15, 40))
+        out[position:position + 160] += rng.normal(0, rng.uniform(3000, 9000), 160) * decay
+
+
+def synthetic_music(rng, seconds):
+    """Chords of three notes with decaying harmonics, changing every half second or so."""
+    out = []
+    while sum(len(part) for part in out) < seconds * RATE:
+        length = int(rng.uniform(0.3, 0.8) * RATE)
+        t = np.arange(length) / RATE
+        chord = np.zeros(length)
+        for root in 110 * 2 ** (rng.integers(0, 36, 3) / 12.0):
+            for harmonic in range(1, 8):
+                chord += np.sin(2 * np.pi * root * harmonic * t) / harmonic
+        out.append(chord * rng.uniform(1000, 2500) / np.abs(chord).max())
+    return np.concatenate(out)[:int(seconds * RATE)]
+
+
+def synthetic_meeting(minutes, seed=0):
+    """A labelled synthetic meeting; returns ``(16-bit PCM bytes, labels)``, where labels maps speech, typing and music to their segments in seconds."""
+    rng = np.random.default_rng(seed)
+    generators = {"speech": synthetic_talk, "typing": synthetic_typing, "music": synthetic_music}
+    parts, labels, position = [], {kind: [] for kind in generators}, 0.0
+    while position < minutes * 60:
+        kind = rng.choice(["speech", "pause", "typing", "music"], p=[0.5, 0.25, 0.15, 0.1])
+        seconds = float(rng.uniform(2, 12)) if kind == "speech" else float(rng.uniform(1, 8))
+        if kind == "pause":
+            parts.append(np.zeros(int(seconds * RATE)))
+        else:
+            parts.append(generators[kind](rng, seconds))
+            labels[kind].append([position, position + len(parts[-1]) / RATE])
+        position += len(parts[-1]) / RATE
+    signal = np.concatenate(parts) + rng.normal(0, 40, sum(len(part) for part in parts))
+    return np.clip(signal, -32768, 32767).astype("<i2").tobytes(), labels
+
+
+def to_wav(pcm, rate=RATE):
+    data = io.BytesIO()
+    with wave.open(data, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+    return data.getvalue()
+
+
+def load_labelled(patterns):
+    """Yield ``(name, WAV bytes, labels)`` for each labelled file matching ``patterns``."""
+    for path in sorted(path for pattern in patterns for path in glob.glob(pattern)):
+        labels = os.path.splitext(path)[0] + ".json"
+        if not os.path.exists(labels):
+            print(f"Skipping {path}: no {labels}")
+            continue
+        with open(path, "rb") as f, open(labels) as g:
+            yield path, f.read(), json.load(g)
+
+
+def phrases(wav, vad):
+    """Split the audio into phrases like the bot does; returns their ``(start, end)`` times in seconds."""
+    recognizer = sr.Recognizer()
+    recognizer.vad = vad
+    spans = []
+    with sr.AudioFile(io.BytesIO(wav)) as source:
+        recognizer.calibrate_noise_floor(source, duration=0.5)
+        while True:
+            try:
+                audio = recognizer.listen(source, timeout=10)
+            except sr.WaitTimeoutError:
+                continue
+            if not audio.frame_data:
+                break
+            end = source.audio_reader.tell() / source.SAMPLE_RATE
+            spans.append((end - len(audio.frame_data) / (source.SAMPLE_WIDTH * source.SAMPLE_RATE), end))
+            if end >= source.DURATION:
+                break
+    return spans
+
+
+def overlap(a, b):
+    return max(0.0, min(a[1], b[1]) - max(a[0], b[0]))
+
+
+def score(spans, labels, min_speech):
+    """
+    Return ``(calls, false phrases by cause, missed speech segments, seconds sent that aren't speech)``.
+
+    A false phrase is put down to the labelled sound it overlaps most, or "other".
+    """
+    speech = labels["speech"]
+    false = collections.Counter()
+    not_speech = 0.0
+    for span in spans:
+        speech_seconds = sum(overlap(span, s) for s in speech)
+        not_speech += span[1] - span[0] - speech_seconds
+        if speech_seconds >= min_speech:
+            continue
+        causes = {kind: sum(overlap(span, s) for s in segments) for kind, segments in labels.items() if kind != "speech"}
+        cause = max(causes, key=causes.get) if causes and max(causes.values()) > 0 else "other"
+        false[cause] += 1
+    missed = sum(1 for s in speech if not any(overlap(span, s) > 0 for span in spans))
+    return len(spans), false, missed, not_speech
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", nargs="+", help="labelled WAV files or glob patterns (each with a .json label file)")
+    parser.add_argument("--minutes", type=float, default=20, help="length of the synthetic meeting if no --input is given")
+    args = parser.parse_args()
+
+    if args.input:
+        files = list(load_labelled(args.input))
+    else:
+        pcm, labels = synthetic_meeting(args.minutes)
+        files = [(f"synthetic meeting ({args.minutes:g} min)", to_wav(pcm), labels)]
+    if not files:
+        sys.exit("No labelled files found")
+
+    hours = 0.0
+    min_speech = sr.Recognizer().phrase_threshold
+    totals = {detector: [0, collections.Counter(), 0, 0.0] for detector in ("energy", "spectral")}
+    for name, wav, labels in files:
+        with wave.open(io.BytesIO(wav), "rb") as wf:
+            hours += wf.getnframes() / wf.getframerate() / 3600
+        for detector, vad in (("energy", None), ("spectral", sr.SpectralVAD())):
+            calls, false, missed, not_speech = score(phrases(wav, vad), labels, min_speech)
+            total = totals[detector]
+            total[0] += calls
+            total[1] += false
+            total[2] += missed
+            total[3] += not_speech
+            print(f"{name}: {detector:8s} {calls} calls, {sum(false.values())} false {dict(false)}, "
+                  f"{missed} of {len(labels['speech'])} speech segments missed, {not_speech:.0f} s sent that aren't speech")
+
+    print(f"Per meeting hour ({hours * 60:.1f} min of audio):")
+    for detector, (calls, false, missed, not_speech) in totals.items():
+        causes = ", ".join(f"{cause} {count / hours:.1f}" for cause, count in sorted(false.items()))
+        print(f"  {detector:8s} {calls / hours:7.1f} calls  {sum(false.values()) / hours:7.1f} false ({causes or 'none'})  "
+              f"{missed / hours:6.1f} speech segments missed  {not_speech / hours / 60:5.1f} min sent that aren't speech")
+    saved = (totals["energy"][0] - totals["spectral"][0]) / hours
+    false_saved = (sum(totals["energy"][1].values()) - sum(totals["spectral"][1].values())) / hours
+    print(f"  spectral VAD saves {saved:.1f} recognition calls per hour, {false_saved:.1f} of them false phrases")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-from seleniumwire import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -7,142 +6,125 @@ import time
 import os
 import speech_recognition as sr
 import threading
-from config import MEETING_URL, BOT_NAME
+from config import (
+    MEETING_URL, BOT_NAME, TRANSCRIBE_WORKERS, TRANSCRIBE_QUEUE_SIZE,
+    TRANSCRIBE_OVERFLOW_POLICY, TRANSCRIBE_SPILL_DIR, AUDIO_CAPTURE_MODE,
+    PARTICIPANT_AUDIO_PORT, JOIN_TIMEOUT, AUDIO_ONLY, RECORD_STREAM_MODE,
+    RECORD_SEGMENT_SECONDS, RECORD_CUT_WINDOW_SECONDS, RECORD_SILENCE_THRESHOLD, RECORD_MAX_SILENCE_SECONDS,
+    RECORD_FORMAT, RECORD_OPUS_BITRATE, RECORD_ROTATE_SECONDS, TRANSCRIPT_FILE, TRANSCRIPT_FLUSH_INTERVAL, TRANSCRIPT_FSYNC,
+    TRANSCRIPT_INDEX_DIR, METRICS_PORT, TRANSCRIBE_VAD, TRANSCRIBE_SAMPLE_RATE
+)
+from transcription import TranscriptionPipeline
+from participant_audio import ParticipantAudioReceiver, ParticipantAudioSource, STOP_SCRIPT
+from conference_events import ConferenceEventChannel
+from speaker_timeline import SpeakerTimeline
+from audio_only import RECEIVE_AUDIO_ONLY_SCRIPT, RECEIVE_AUDIO_ONLY_EVENTS
+from browser import SharedBrowser, create_driver
+from chunk_recorder import ChunkRecorder
+from recording_sinks import create_sink
+from browser_recording import BrowserRecording
+from transcript_sink import TranscriptSink
+from transcript_index import TranscriptIndex
+from metrics import Metrics
 import pyaudio
-import wave
-from datetime import datetime
+
+# Seconds per wait for a prejoin screen element; the browser is held only during each wait
+PREJOIN_POLL_INTERVAL = 0.5
+
 
 class JitsiBot:
-    def __init__(self):
-        self.options = Options()
-        
-        # Add required Chrome options
-        self.options.add_argument("--headless")  # Enable headless mode
-        self.options.add_argument("--use-fake-ui-for-media-stream")
-        self.options.add_argument("--use-file-for-fake-audio-capture")
-        self.options.add_argument("--allow-file-access")
-        self.options.add_argument("--enable-experimental-web-platform-features")
-        self.options.add_argument("--autoplay-policy=no-user-gesture-required")
-        self.options.add_argument("--disable-web-security")
-        self.options.add_argument("--allow-running-insecure-content")
-        self.options.add_argument("--start-maximized")
-        self.options.add_argument("--disable-infobars")
-        self.options.add_argument("--disable-notifications")
-        self.options.add_argument('--no-sandbox')
-        self.options.add_argument('--disable-dev-shm-usage')
-        self.options.add_argument("--use-fake-device-for-media-stream")
-        
-        self.recognizer = sr.Recognizer()  # Initialize the recognizer
-        self.transcription_thread = None  # Thread for transcription
+    def __init__(self, audio_only=AUDIO_ONLY, browser=None, meeting_id=None, storage_dir=None,
+                 capture_mode=AUDIO_CAPTURE_MODE, record_host_audio=True, own_browser=False, metrics=None):
+        """Start a bot in its own Chrome, or in a new tab of ``browser`` when several meetings share one (see ``BotHost``).
 
-        # Enable audio recording
-        self.options.add_argument("--enable-usermedia-screen-capturing")
-        self.options.add_argument("--allow-file-access-from-files")
-        
-        # Add experimental options
-        self.options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        self.options.add_experimental_option('useAutomationExtension', False)
-        self.options.add_experimental_option("prefs", {
-            "profile.default_content_setting_values.media_stream_mic": 1,
-            "profile.default_content_setting_values.media_stream_camera": 1,
-            "download.default_directory": os.path.join(os.getcwd(), "recordings")
-        })
-
-        # Configure selenium-wire to capture media
-        seleniumwire_options = {
-            'enable_har': True,
-            'har_options': {
-                'captureHeaders': True,
-                'captureContent': True
-            }
-        }
-
-        self.driver = webdriver.Chrome(
-            options=self.options,
-            seleniumwire_options=seleniumwire_options
+        With ``own_browser`` the bot takes over ``browser`` instead, e.g. one launched ahead of time
+        by a ``DriverPool``, and quits it when done.
+
+        ``storage_dir`` holds the bot's transcript and recordings (the working directory by default).
+
+        ``metrics`` (a ``Metrics``, shared by the bots of a process) collects the latency of each
+        transcription stage; without it the timing hooks do nothing.
+        """
+        self.audio_only = audio_only  # Receive only audio; video is never forwarded, decoded or sent
+        self.meeting_id = meeting_id  # Tags the output of bots sharing a host
+        self.storage_dir = storage_dir or os.getcwd()
+        self.capture_mode = capture_mode
+        self.record_host_audio = record_host_audio  # Record the host's input device; meaningless when meetings share a host
+
+        self.owns_browser = browser is None or own_browser
+        self.browser = browser or SharedBrowser(create_driver(audio_only))
+        self.driver = self.browser.driver
+        self.window_handle = self.browser.current_handle if self.owns_browser else self.browser.open_tab()
+        self.driver_lock = self.browser.lock  # WebDriver calls come from several threads, and from other bots' threads
+        self.browser_closed = False  # Set once the bot's Chrome was quit or its tab closed
+        # Bots sharing a browser each need their own audio server port
+        self.participant_audio_port = PARTICIPANT_AUDIO_PORT if browser is None else 0
+
+        self.recognizer = self.create_recognizer()  # Initialize the recognizer
+        # Reuse keep-alive connections to the recognition API, one per recognizer worker
+        self.recognizer.transport = sr.HTTPTransport(
+            max_connections_per_host=TRANSCRIBE_WORKERS, max_concurrency=TRANSCRIBE_WORKERS
         )
-        
-        self.participants = {}  # Dictionary to keep track of participants
+        self.metrics = metrics
+        self.on_timing = metrics.timer(meeting_id) if metrics is not None else None  # Stage timing hook, None when disabled
+        self.recognizer.on_timing = self.on_timing
+        if metrics is not None:
+            metrics.add_collector(self.collect_metrics)
+        self.transcription_thread = None  # Thread for transcription
+        self.transcription_pipeline = None  # Capture thread + recognizer workers
+        self.audio_receiver = None  # Per-participant audio streamed from the browser (browser capture mode)
+        self.participant_pipelines = {}  # participant id -> TranscriptionPipeline (browser capture mode)
+        self.transcript = None  # Buffered JSON Lines transcript, open while transcribing
+        self.transcript_index = None  # Search index the transcript is added to as it is written
+
+        self.conference_events = None  # Conference events drained from the page
+        self.recorder = None  # Writes the host input device to chunk files (record_audio)
+        self.browser_recording = None  # Streams the page's MediaRecorder output to a WebM file (start_recording)
+        self.stop_recording_flag = False  # Set to stop record_audio
+
+        self.speaker_timeline = SpeakerTimeline()  # Dominant speaker over time, for attributing phrases
+        self.participants = self.speaker_timeline.names  # Participant id -> display name, kept up to date by the timeline
         self.current_speaker = None  # Variable to track the current speaker
 
-    def join_meeting(self):
+    def run_script(self, script, *args):
+        """Run a script in the meeting page; safe to call from any thread."""
+        with self.browser.tab(self.window_handle) as driver:
+            return driver.execute_script(script, *args)
+
+    def join_meeting(self, meeting_url=MEETING_URL, on_joined=None):
+        """Join the meeting and stay in it, transcribing, until it ends; ``on_joined(seconds)`` is called once joined."""
         try:
-            print(f"Joining meeting at: {MEETING_URL}")
-            self.driver.get(MEETING_URL)
-            
-            # Wait for the name input field to be present and enter the bot's name
-            name_input = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#premeeting-name-input"))
-            )
-            name_input.clear()  # Clear any existing text
-            name_input.send_keys(BOT_NAME)  # Enter the bot's name
-            print(f"Entered bot name: {BOT_NAME}")
-            
-            # Disable the video button
-            video_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, ".toolbox-button[aria-label='Stop camera']"))
-            )
-            video_button.click()  # Click to disable the video
-            print("Disabled video button")
-            
-            # Click join button using the data-testid
-            join_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-testid='prejoin.joinMeeting']"))
-            )
-            join_button.click()
-            print("Clicked join button")
-            
-            # Wait for join completion
-            print("Waiting for meeting join completion...")
-            max_attempts = 30
-            for attempt in range(max_attempts):
-                join_status = self.driver.execute_script("""
+            join_seconds = self.join(meeting_url)
+            if on_joined is not None:
+                on_joined(join_seconds)
+            if self.record_host_audio:
+                print("Starting recording...")
+                self.start_recording_v2()
+
+            # Hide all visual elements
+            self.run_script("""
+                const checkConferenceReady = setInterval(() => {
                     if (window.APP && window.APP.conference && window.APP.conference._room) {
-                        return {
-                            isJoined: window.APP.conference._room.isJoined(),
-                            participants: window.APP.conference._room.getParticipants().length,
-                            hasAudio: !!window.APP.conference._room.getLocalAudioTrack()
-                        };
-                    }
-                    return null;
-                """)
-                
-                if join_status and join_status['isJoined']:
-                    print(f"Successfully joined the meeting. Status: {join_status}")
-                    print("Starting recording...")
-                    self.start_recording_v2() 
-                    
-                    # Hide all visual elements
-                    self.driver.execute_script("""
-                        const checkConferenceReady = setInterval(() => {
-                            if (window.APP && window.APP.conference && window.APP.conference._room) {
-                                clearInterval(checkConferenceReady);
-                                
-                                const videoElements = document.querySelectorAll('video');
-                                videoElements.forEach(video => {
-                                    video.style.display = 'none';  // Hide video elements
-                                });
-
-                                const localParticipant = window.APP.conference._room.getLocalParticipant();
-                                const botName = localParticipant.getDisplayName();
-                                const participantElements = document.querySelectorAll('.participant');
-
-                                participantElements.forEach(element => {
-                                    if (!element.innerText.includes(botName)) {
-                                        element.style.display = 'none';
-                                    }
-                                });
+                        clearInterval(checkConferenceReady);
+
+                        const videoElements = document.querySelectorAll('video');
+                        videoElements.forEach(video => {
+                            video.style.display = 'none';  // Hide video elements
+                        });
+
+                        const localParticipant = window.APP.conference._room.getLocalParticipant();
+                        const botName = localParticipant.getDisplayName();
+                        const participantElements = document.querySelectorAll('.participant');
+
+                        participantElements.forEach(element => {
+                            if (!element.innerText.includes(botName)) {
+                                element.style.display = 'none';
                             }
-                        }, 1000);  // Check every 100ms
-                    """)
-                    
-                    break
-                    
-                time.sleep(1)
-                print(f"Waiting for join completion... attempt {attempt + 1}/{max_attempts}")
-            else:
-                raise Exception("Failed to fully join the meeting")
-            
+                        });
+                    }
+                }, 1000);  // Check every 100ms
+            """)
+
             # Additional wait for audio setup
             time.sleep(5)
             print("Starting transcription...")
@@ -155,26 +137,112 @@ class JitsiBot:
             # Start recording
             #self.start_recording()
             
-            # Keep the bot in the meeting and monitor status
-            while True:
-                meeting_status = self.driver.execute_script("""
-                    return {
-                        isJoined: window.APP.conference._room.isJoined(),
-                        participants: window.APP.conference._room.getParticipants().length,
-                        hasAudio: !!window.APP.conference._room.getLocalAudioTrack(),
-                        recordingStatus: window.mediaRecorder ? window.mediaRecorder.state : 'not_found',
-                        chunksRecorded: window.audioChunks ? window.audioChunks.length : 0
-                    };
-                """)
-                print(f"Meeting status: {meeting_status}")
-                time.sleep(10)
+            # Stay in the meeting; the channel's heartbeat reports the meeting status
+            self.conference_events.subscribe(
+                lambda event: print(f"Meeting status: {event['status']}, browser: {self.resource_usage()}"), types=('heartbeat',)
+            )
+            self.conference_events.subscribe(
+                lambda event: print(f"Conference event: {event}"),
+                types=('participant_joined', 'participant_left', 'left', 'kicked', 'failed', 'disconnected'),
+            )
+            while not self.conference_events.wait_closed(timeout=1):
+                pass
+            print("Left the meeting")
                 
         except Exception as e:
             print(f"Error in join_meeting: {e}")
-            self.driver.quit()
+            self.close_browser()
     
+    def join(self, meeting_url=MEETING_URL):
+        """Open the meeting and wait until the conference is joined; returns the seconds it took.
+
+        With the config overrides in ``MEETING_URL`` the bot lands directly in the conference;
+        if the prejoin screen shows up anyway, it is filled in through the UI.
+        """
+        started = time.monotonic()
+        print(f"Joining meeting at: {meeting_url}")
+        # Start the navigation without waiting for the page to load, so the browser isn't held meanwhile;
+        # join progress is delivered by the conference event channel, which follows the page as it loads
+        self.run_script("location.href = arguments[0];", meeting_url)
+
+        print("Waiting for meeting join completion...")
+        self.conference_events = ConferenceEventChannel(self.run_script)
+        self.conference_events.subscribe(self.speaker_timeline.handle_event, types=SpeakerTimeline.EVENT_TYPES)
+        self.conference_events.subscribe(lambda event: self.identify_speaker(event['id']), types=('dominant_speaker',))
+        if self.audio_only:
+            self.conference_events.subscribe(lambda event: self.receive_audio_only(), types=RECEIVE_AUDIO_ONLY_EVENTS)
+        self.conference_events.start()
+        event = self.conference_events.wait_for(('joined', 'prejoin'), timeout=JOIN_TIMEOUT)
+        if event is not None and event['type'] == 'prejoin':
+            print("Prejoin screen shown, joining through the UI")
+            self.join_through_prejoin_screen()
+            event = self.conference_events.wait_for('joined', timeout=JOIN_TIMEOUT)
+        if event is None:
+            raise Exception("Failed to fully join the meeting")
+
+        elapsed = time.monotonic() - started
+        print(f"Successfully joined the meeting in {elapsed:.1f}s")
+        return elapsed
+
+    def join_through_prejoin_screen(self):
+        """Fill in the prejoin screen: enter the bot's name, stop the camera and click join."""
+        def enter_name(driver, name_input):
+            name_input.clear()  # Clear any existing text
+            name_input.send_keys(BOT_NAME)  # Enter the bot's name
+            print(f"Entered bot name: {BOT_NAME}")
+
+            # Disable the video button, unless the camera is already off
+            video_buttons = driver.find_elements(By.CSS_SELECTOR, ".toolbox-button[aria-label='Stop camera']")
+            if video_buttons:
+                video_buttons[0].click()  # Click to disable the video
+                print("Disabled video button")
+
+        def click_join(driver, join_button):
+            join_button.click()
+            print("Clicked join button")
+
+        self._on_prejoin_element(EC.presence_of_element_located, "#premeeting-name-input", enter_name)
+        self._on_prejoin_element(EC.element_to_be_clickable, "[data-testid='prejoin.joinMeeting']", click_join)
+
+    def _on_prejoin_element(self, condition, selector, action, timeout=20):
+        """Wait up to ``timeout`` seconds for the element at ``selector`` to meet ``condition``, then call ``action(driver, element)``.
+
+        The element is polled with short waits that each hold the browser only briefly, so other
+        meetings sharing the browser keep running their scripts while the page loads.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.browser.tab(self.window_handle) as driver:
+                try:
+                    element = WebDriverWait(driver, PREJOIN_POLL_INTERVAL).until(condition((By.CSS_SELECTOR, selector)))
+                except TimeoutException:
+                    element = None
+                if element is not None:
+                    return action(driver, element)
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"Prejoin screen element {selector} did not show up within {timeout}s")
+            time.sleep(PREJOIN_POLL_INTERVAL)
+
+    def receive_audio_only(self):
+        """Stop the bridge forwarding video to the bot and drop any local video track."""
+        applied = self.run_script(RECEIVE_AUDIO_ONLY_SCRIPT)
+        if applied:
+            print(f"Audio-only mode applied: {', '.join(applied)}")
+
+    def resource_usage(self):
+        """CPU time and resident memory of the browser, shared with the other meetings when hosted."""
+        return self.browser.usage()
+
     def start_transcription(self):
         """Start a thread to capture and transcribe audio."""
+        transcript_path = os.path.join(self.storage_dir, TRANSCRIPT_FILE)
+        if TRANSCRIPT_INDEX_DIR:
+            self.transcript_index = TranscriptIndex(TRANSCRIPT_INDEX_DIR)
+        self.transcript = TranscriptSink(
+            transcript_path, meeting_id=self.meeting_id,
+            flush_interval=TRANSCRIPT_FLUSH_INTERVAL, fsync_policy=TRANSCRIPT_FSYNC,
+            on_flush=(lambda: self.transcript_index.index_file(transcript_path)) if self.transcript_index is not None else None,
+        )
         self.transcription_thread = threading.Thread(target=self.transcribe_audio)
         self.transcription_thread.start()
 
@@ -189,9 +257,8 @@ class JitsiBot:
         FORMAT = pyaudio.paInt16
         CHANNELS = 1
         RATE = 44100
-        RECORD_SECONDS = 20  # Duration of each chunk in seconds
         
-        recordings_dir = os.path.join(os.getcwd(), "recordings")
+        recordings_dir = os.path.join(self.storage_dir, "recordings")
         if not os.path.exists(recordings_dir):
             os.makedirs(recordings_dir)
 
@@ -210,41 +277,46 @@ class JitsiBot:
         if device_index is None:
             print("Using default input device")
         
+        # Segments of about RECORD_SEGMENT_SECONDS, cut at quiet moments, with long silences left out
+        recorder = ChunkRecorder(
+            recordings_dir, RATE, CHANNELS, p.get_sample_size(FORMAT),
+            chunk_seconds=RECORD_SEGMENT_SECONDS,
+            window_seconds=RECORD_CUT_WINDOW_SECONDS,
+            silence_threshold=RECORD_SILENCE_THRESHOLD or None,
+            max_silence_seconds=RECORD_MAX_SILENCE_SECONDS,
+            sink=create_sink(
+                RECORD_FORMAT, recordings_dir, RATE, CHANNELS, p.get_sample_size(FORMAT),
+                bitrate=RECORD_OPUS_BITRATE, rotate_seconds=RECORD_ROTATE_SECONDS,
+            ),
+        )
+        self.recorder = recorder
+        recorder.start()
+        callback_mode = RECORD_STREAM_MODE == 'callback'
+        # In callback mode PortAudio hands each block to the recorder from its own thread; otherwise
+        # this thread reads blocks and the recorder's writer thread saves the chunks
         stream = p.open(format=FORMAT,
                     channels=CHANNELS,
                     rate=RATE,
                     input=True,
                     input_device_index=device_index,
-                    frames_per_buffer=CHUNK)
+                    frames_per_buffer=CHUNK,
+                    stream_callback=recorder.callback if callback_mode else None)
 
-        print("Started recording audio with PyAudio...")
+        print(f"Started recording audio with PyAudio ({RECORD_STREAM_MODE} mode)...")
         
         try:
-            while True:
-                frames = []
-                for i in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
-                    try:
-                        data = stream.read(CHUNK)
-                        frames.append(data)
-                    except Exception as e:
+            while not self.stop_recording_flag:
+                if callback_mode:
+                    time.sleep(0.5)
+                    continue
+                try:
+                    recorder.write(stream.read(CHUNK))
+                except IOError as e:
+                    if e.errno != pyaudio.paInputOverflowed:
                         print(f"Error reading chunk: {e}")
                         continue
-
-                # Generate timestamp for the filename
-                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-                filename = os.path.join(recordings_dir, f"audio_chunk_{timestamp}.wav")
-
-                # Save the audio chunk
-                try:
-                    wf = wave.open(filename, 'wb')
-                    wf.setnchannels(CHANNELS)
-                    wf.setsampwidth(p.get_sample_size(FORMAT))
-                    wf.setframerate(RATE)
-                    wf.writeframes(b''.join(frames))
-                    wf.close()
-                    print(f"Saved audio chunk: {filename}")
-                except Exception as e:
-                    print(f"Error saving audio file: {e}")
+                    recorder.stats["input_overflows"] += 1
+                    recorder.skip(CHUNK)  # the block is lost; later chunks keep their true start times
 
         except Exception as e:
             print(f"Error in recording: {e}")
@@ -253,40 +325,121 @@ class JitsiBot:
             stream.stop_stream()
             stream.close()
             p.terminate()
+            recorder.close()  # flushes the last, partial chunk
+            print(f"Recording stopped: {recorder.stats}, output: {recorder.sink.stats}")
             
     def transcribe_audio(self):
-        """Capture audio and transcribe it in real-time."""
-        with sr.Microphone() as source:
-            print("Listening for audio...")
-            while True:
-                try:
-                    # Adjust for ambient noise and listen for audio
-                    self.recognizer.adjust_for_ambient_noise(source)
-                    audio = self.recognizer.listen(source, timeout=5)  # Listen for audio
-                    print("Recognizing...")
-                    # Use Google Web Speech API to transcribe audio
-                    text = self.recognizer.recognize_google(audio)
-
-                    # Get the current speaker's name from the DOM
-                    current_speaker_name = self.driver.execute_script("""
-                        const nameElement = document.querySelector('#localDisplayName');
-                        return nameElement ? nameElement.innerText : 'Unknown Speaker';
-                    """)
-
-                    # Log the transcription with participant name
-                    log_entry = f"{current_speaker_name}: {text}"
-                    print(log_entry)  # Print the transcription
-                    with open("transcript.txt", "a") as f:
-                        f.write(log_entry + "\n")  # Log the transcription to a file
-
-                except sr.WaitTimeoutError:
-                    print("Listening timed out while waiting for phrase to start")
-                except sr.UnknownValueError:
-                    print("Google Speech Recognition could not understand audio")
-                except sr.RequestError as e:
-                    print(f"Could not request results from Google Speech Recognition service; {e}")
-                except Exception as e:
-                    print(f"Error during transcription: {e}")
+        """Capture audio and transcribe it in real-time.
+
+        Capture runs on its own thread and only listens for phrases; recognition happens on a
+        pool of workers so the microphone keeps being read while requests are in flight.
+        """
+        if self.capture_mode == 'browser':
+            self.transcribe_participants()
+            return
+        self.transcription_pipeline = TranscriptionPipeline(
+            self.recognizer,
+            lambda: sr.Microphone(convert_rate=TRANSCRIBE_SAMPLE_RATE or None),
+            self.recognizer.recognize_google,  # Use Google Web Speech API to transcribe audio
+            self.handle_transcription,
+            workers=TRANSCRIBE_WORKERS,
+            queue_size=TRANSCRIBE_QUEUE_SIZE,
+            overflow_policy=TRANSCRIBE_OVERFLOW_POLICY,
+            spill_dir=TRANSCRIBE_SPILL_DIR,
+            on_source_ready=self.recognizer.calibrate_noise_floor,  # Calibrate once, then track the noise floor continuously
+            on_timing=self.on_timing,
+        )
+        self.transcription_pipeline.start()
+        self.transcription_pipeline.capture_thread.join()
+
+    def transcribe_participants(self):
+        """Stream every remote participant's audio out of the browser and transcribe each one separately."""
+        self.audio_receiver = ParticipantAudioReceiver(
+            on_participant=self.start_participant_transcription, port=self.participant_audio_port
+        )
+        self.audio_receiver.start()
+        print(f"Browser audio capture: {self.audio_receiver.inject(self.run_script)}")
+
+    @staticmethod
+    def create_recognizer():
+        """Return a recognizer that detects phrases with the configured voice activity detector."""
+        recognizer = sr.Recognizer()
+        if TRANSCRIBE_VAD == 'spectral':
+            recognizer.vad = sr.SpectralVAD()
+        return recognizer
+
+    def start_participant_transcription(self, stream):
+        """Start a transcription pipeline for a participant whose audio just started arriving."""
+        print(f"Transcribing participant {stream.name or stream.participant_id}")
+        recognizer = self.create_recognizer()  # each stream needs its own energy threshold and VAD state
+        recognizer.transport = self.recognizer.transport
+        recognizer.on_timing = self.on_timing
+        pipeline = TranscriptionPipeline(
+            recognizer,
+            lambda: ParticipantAudioSource(stream),
+            recognizer.recognize_google,
+            lambda phrase, text, error: self.handle_transcription(phrase, text, error, stream),
+            workers=TRANSCRIBE_WORKERS,
+            queue_size=TRANSCRIBE_QUEUE_SIZE,
+            overflow_policy=TRANSCRIBE_OVERFLOW_POLICY,
+            spill_dir=TRANSCRIBE_SPILL_DIR,
+            on_source_ready=recognizer.calibrate_noise_floor,
+            on_timing=self.on_timing,
+        )
+        self.participant_pipelines[stream.participant_id] = pipeline
+        pipeline.start()
+
+    def handle_transcription(self, phrase, text, error, stream=None):
+        """Log a recognised phrase; called in capture order from the transcription pipeline.
+
+        ``stream`` is the participant the phrase was captured from in browser capture mode.
+        """
+        if error is None and text is None:
+            return  # phrase was dropped because the queue was full
+        if isinstance(error, sr.UnknownValueError):
+            print("Google Speech Recognition could not understand audio")
+            return
+        if isinstance(error, sr.RequestError):
+            print(f"Could not request results from Google Speech Recognition service; {error}")
+            return
+        if error is not None:
+            print(f"Error during transcription: {error}")
+            return
+
+        try:
+            started = time.perf_counter()
+            if stream is not None:
+                current_speaker_name = stream.name or stream.participant_id
+            else:
+                # Whoever was the dominant speaker for most of the phrase
+                current_speaker_name = self.speaker_timeline.name_between(phrase.capture_start, phrase.capture_end)
+            if self.on_timing is not None:
+                self.on_timing("speaker_lookup", time.perf_counter() - started)
+
+            # Log the transcription with participant name
+            log_entry = f"{current_speaker_name}: {text}"
+            print(log_entry if self.meeting_id is None else f"[{self.meeting_id}] {log_entry}")  # Print the transcription
+            started = time.perf_counter()
+            self.transcript.write(current_speaker_name, text, phrase)  # Queued; the sink's thread writes it to the file
+            if self.on_timing is not None:
+                self.on_timing("transcript_write", time.perf_counter() - started)
+        except Exception as e:
+            print(f"Error during transcription: {e}")
+
+    def collect_metrics(self):
+        """Counter samples for ``Metrics``, read from the stats the pipelines and the recorder already keep."""
+        labels = {"meeting": self.meeting_id or ""}
+        pipelines = list(self.participant_pipelines.values())
+        if self.transcription_pipeline is not None:
+            pipelines.append(self.transcription_pipeline)
+        samples = [
+            (f"meetingbot_phrases_{name}_total", labels, sum(pipeline.stats[name] for pipeline in pipelines))
+            for name in ("captured", "dropped", "spilled")
+        ]
+        samples.append(("meetingbot_recognizer_errors_total", labels, sum(pipeline.stats["errors"] for pipeline in pipelines)))
+        if self.recorder is not None:
+            samples.append(("meetingbot_input_overflows_total", labels, self.recorder.stats["input_overflows"]))
+        return samples
 
     def identify_speaker(self, participant_id):
         """Identify the speaker based on participant ID."""
@@ -298,122 +451,32 @@ class JitsiBot:
 
     def stop_transcription(self):
         """Stop the transcription thread."""
+        if self.audio_receiver is not None:
+            try:
+                self.run_script(STOP_SCRIPT)
+            except Exception as e:
+                print(f"Error stopping browser audio capture: {e}")
+            self.audio_receiver.stop()  # closes every participant stream, ending their capture
+        for pipeline in list(self.participant_pipelines.values()):
+            pipeline.stop()
+        if self.transcription_pipeline is not None:
+            self.transcription_pipeline.stop()
         if self.transcription_thread is not None:
             self.transcription_thread.join()
+        if self.transcript is not None:
+            transcript, self.transcript = self.transcript, None
+            transcript.close()  # writes the phrases still buffered
+        if self.transcript_index is not None:
+            transcript_index, self.transcript_index = self.transcript_index, None
+            transcript_index.close()  # writes the phrases indexed since the last segment
+        self.recognizer.transport.close()
 
     def start_recording(self):
+        """Record the meeting's audio in the browser, streaming it to a WebM file in the recordings directory."""
         try:
-            recordings_dir = os.path.join(os.getcwd(), "recordings")
-            if not os.path.exists(recordings_dir):
-                os.makedirs(recordings_dir)
-                print(f"Created recordings directory at: {recordings_dir}")
-
-            recording_script = '''
-            try {
-                const conference = window.APP.conference._room;
-                console.log("Setting up recording...");
-                
-                // Create audio context and destination
-                const audioContext = new (window.AudioContext || window.webkitAudioContext)();
-                const destination = audioContext.createMediaStreamDestination();
-                window.audioContext = audioContext;
-                
-                // Initialize audio chunks array
-                window.audioChunks = [];
-                
-                // Function to add stream to recording
-                const addStreamToRecording = (stream, participantName) => {
-                    if (stream && stream.getAudioTracks().length > 0) {
-                        const source = audioContext.createMediaStreamSource(stream);
-                        const gainNode = audioContext.createGain();
-                        gainNode.gain.value = 1.0;  // Adjust volume if needed
-                        source.connect(gainNode);
-                        gainNode.connect(destination);
-                        console.log('Added audio stream to recording for participant: ' + participantName);
-                        return true;
-                    }
-                    return false;
-                };
-
-                // Add remote participants' audio
-                conference.getParticipants().forEach(participant => {
-                    const stream = participant.getTracks().find(t => t.getType() === 'audio')?.stream;
-                    if (stream) {
-                        const participantName = participant.getDisplayName();
-                        addStreamToRecording(stream, participantName);
-                    }
-                });
-
-                // Set up MediaRecorder
-                const combinedStream = destination.stream;
-                window.mediaRecorder = new MediaRecorder(combinedStream, {
-                    mimeType: 'audio/webm;codecs=opus',
-                    audioBitsPerSecond: 128000
-                });
-
-                window.mediaRecorder.ondataavailable = (event) => {
-                    if (event.data.size > 0) {
-                        window.audioChunks.push(event.data);
-                    }
-                };
-
-                window.mediaRecorder.onstop = () => {
-                    console.log('MediaRecorder stopped, processing chunks...');
-                    if (window.audioChunks.length > 0) {
-                        const blob = new Blob(window.audioChunks, { type: 'audio/webm' });
-                        const timestamp = new Date().toISOString().replace(/[:.]/g, '-');
-                        const filePath = `${recordings_dir}/meeting_recording_${timestamp}.webm`;
-                        const fileReader = new FileReader();
-                        fileReader.onload = function() {
-                            const arrayBuffer = this.result;
-                            const buffer = new Uint8Array(arrayBuffer);
-                            const fs = require('fs');
-                            fs.writeFileSync(filePath, buffer);
-                            console.log(`Recording saved at: ${filePath}`);
-                        };
-                        fileReader.readAsArrayBuffer(blob);
-                    } else {
-                        console.log('No audio chunks recorded');
-                    }
-                };
-
-                // Start recording
-                window.mediaRecorder.start(5000);  // Create chunks every 5000ms
-                console.log("MediaRecorder started");
-
-                return {
-                    status: 'started',
-                    recorderState: window.mediaRecorder.state,
-                    streamTracks: combinedStream.getAudioTracks().length
-                };
-            } catch (error) {
-                console.error('Recording setup error:', error);
-                return {
-                    status: 'error',
-                    error: error.toString()
-                };
-            }
-            '''
-            
-            result = self.driver.execute_script(recording_script)
+            self.browser_recording = BrowserRecording(self.run_script, os.path.join(self.storage_dir, "recordings"))
+            result = self.browser_recording.start()
             print(f"Recording setup result: {result}")
-            
-            # Monitor initial recording status
-            for i in range(5):  # Check status multiple times
-                status = self.driver.execute_script("""
-                    return {
-                        recorderState: window.mediaRecorder ? window.mediaRecorder.state : 'not_found',
-                        chunksCount: window.audioChunks ? window.audioChunks.length : 0,
-                        hasAudioTracks: window.mediaRecorder ? 
-                            window.mediaRecorder.stream.getAudioTracks().length : 0,
-                        participantCount: window.APP.conference._room.getParticipants().length,
-                        lastChunkSize: window.audioChunks && window.audioChunks.length > 0 ? 
-                            window.audioChunks[window.audioChunks.length - 1].size : 0
-                    };
-                """)
-                print(f"Recording status check {i+1}: {status}")
-                time.sleep(1)
-                
         except Exception as e:
             print(f"Error starting recording: {e}")
             import traceback
@@ -421,54 +484,31 @@ class JitsiBot:
 
     def stop_recording(self):
         try:
-            stop_script = """
-            try {
-                if (window.mediaRecorder && window.mediaRecorder.state !== 'inactive') {
-                    console.log('Stopping MediaRecorder...');
-                    window.mediaRecorder.stop();
-                    
-                    // Force save current chunks if any exist
-                    if (window.audioChunks && window.audioChunks.length > 0) {
-                        const blob = new Blob(window.audioChunks, { type: 'audio/webm' });
-                        const timestamp = new Date().toISOString().replace(/[:.]/g, '-');
-                        const filePath = `${recordings_dir}/meeting_recording_${timestamp}.webm`;
-                        
-                        // Create a FileReader to read the Blob
-                        const fileReader = new FileReader();
-                        fileReader.onload = function() {
-                            const arrayBuffer = this.result;
-                            const buffer = new Uint8Array(arrayBuffer);
-                            const fs = require('fs');
-                            fs.writeFileSync(filePath, buffer);
-                            console.log(`Recording saved at: ${filePath}`);
-                        };
-                        fileReader.readAsArrayBuffer(blob);
-                    } else {
-                        console.log('No audio chunks recorded');
-                    }
-                    
-                    if (window.audioContext) {
-                        window.audioContext.close();
-                    }
-                    return true;
-                }
-                return false;
-            } catch (error) {
-                console.error('Error stopping recording:', error);
-                return false;
-            }
-            """
-            
-            # Execute the stop script
-            stopped = self.driver.execute_script(stop_script)
-            time.sleep(3)  # Give time for the file to save
-            print(f"Recording {'stopped' if stopped else 'was already stopped'}")
+            if self.browser_recording is None:
+                print("Recording was already stopped")
+                return
+            recording, self.browser_recording = self.browser_recording, None
+            recording.stop()
         except Exception as e:
             print(f"Error stopping recording: {e}")
         
+    def close_browser(self):
+        """Quit the bot's own Chrome, or just close its tab when the browser is shared; does nothing once closed."""
+        if self.browser_closed:
+            return
+        self.browser_closed = True
+        if self.owns_browser:
+            self.browser.quit()
+        else:
+            self.browser.close_tab(self.window_handle)
+
     def quit(self):
         try:
             print("\nShutting down bot...")
+            if self.conference_events is not None:
+                self.conference_events.stop()
+            if self.browser_recording is not None:
+                self.stop_recording()
             self.stop_transcription()  # Stop the transcription thread
                         
             # Set a flag to stop recording (you'll need to add this as an instance variable)
@@ -478,14 +518,20 @@ class JitsiBot:
                 self.recording_thread.join(timeout=5)  # Wait up to 5 seconds for recording to finish
                 
             time.sleep(3)  # Give more time for the recording to save
-            self.driver.quit()
+            if self.metrics is not None:
+                self.metrics.remove_collector(self.collect_metrics)
+            self.close_browser()
             print("Bot shutdown complete")
         except Exception as e:
             print(f"Error during shutdown: {e}")
             print("Bot shutdown complete (browser already closed)")
 
 def main():
-    bot = JitsiBot()
+    metrics = None
+    if METRICS_PORT:
+        metrics = Metrics()
+        metrics.serve(port=METRICS_PORT)
+    bot = JitsiBot(metrics=metrics)
     print("\nBot Instructions:")
     print("1. Bot will automatically join the meeting and start recording")
     print("2. Recordings will be saved in the 'recordings' folder")
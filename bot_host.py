@@ -0,0 +1,178 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import re
+import threading
+import time
+from bot import JitsiBot
+from browser import SharedBrowser, create_driver
+from config import (
+    AUDIO_ONLY, BOT_NAME, JOIN_VIA_URL, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES,
+    HOST_STORAGE_DIR, HOST_CONTROL_PORT, HOST_MAX_MEETINGS, METRICS_PORT, build_meeting_url
+)
+from metrics import Metrics
+
+MEETING_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')  # meeting ids name their storage directory
+
+
+class BotHost:
+    """
+    Runs several meetings in one Chrome, one tab per meeting, sharing its chromedriver and selenium-wire proxy.
+
+    Every meeting is a ``JitsiBot`` with its own tab, conference event channel, per-participant
+    audio capture from the browser, recognizer transport and storage directory under
+    ``storage_dir``; only the browser is shared. The host's input device is never recorded,
+    since it would mix the meetings together.
+    """
+
+    def __init__(self, audio_only=AUDIO_ONLY, storage_dir=HOST_STORAGE_DIR, max_meetings=HOST_MAX_MEETINGS, metrics=None):
+        self.audio_only = audio_only
+        self.metrics = metrics  # shared by every meeting's bot, labelled by meeting id
+        self.storage_dir = storage_dir
+        self.max_meetings = max_meetings
+        self.browser = SharedBrowser(create_driver(audio_only, background_tabs=True))
+        # The initial blank tab stays open, so the browser survives its last meeting being removed
+        self.meetings = {}  # meeting id -> {"bot", "thread", "url", "added"}
+        self.lock = threading.Lock()
+
+    def add_meeting(self, meeting_id, meeting_url):
+        """Join ``meeting_url`` in a new tab; returns the meeting's bot. The meeting is removed when the bot leaves it."""
+        if not MEETING_ID_PATTERN.match(meeting_id):
+            raise ValueError(f"Invalid meeting id: {meeting_id!r}")
+        if JOIN_VIA_URL and '#' not in meeting_url:
+            meeting_url = build_meeting_url(meeting_url, BOT_NAME, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES)
+        with self.lock:
+            if meeting_id in self.meetings:
+                raise ValueError(f"Meeting {meeting_id} is already running")
+            if self.max_meetings and len(self.meetings) >= self.max_meetings:
+                raise RuntimeError(f"Host is full ({self.max_meetings} meetings)")
+            storage_dir = os.path.join(self.storage_dir, meeting_id)
+            os.makedirs(storage_dir, exist_ok=True)
+            bot = JitsiBot(
+                audio_only=self.audio_only, browser=self.browser, meeting_id=meeting_id, storage_dir=storage_dir,
+                capture_mode='browser', record_host_audio=False, metrics=self.metrics,
+            )
+            meeting = {"bot": bot, "url": meeting_url, "added": time.time()}
+            meeting["thread"] = threading.Thread(target=self._run, args=(meeting_id, meeting), name=f"meeting-{meeting_id}", daemon=True)
+            self.meetings[meeting_id] = meeting
+        meeting["thread"].start()
+        print(f"Added meeting {meeting_id}: {meeting_url}")
+        return bot
+
+    def remove_meeting(self, meeting_id, timeout=30):
+        """Leave the meeting and close its tab; returns False if there is no such meeting."""
+        with self.lock:
+            meeting = self.meetings.pop(meeting_id, None)
+        if meeting is None:
+            return False
+        meeting["bot"].quit()
+        meeting["thread"].join(timeout)
+        print(f"Removed meeting {meeting_id}")
+        return True
+
+    def _run(self, meeting_id, meeting):
+        """Meeting thread: stays in the meeting until it ends or the meeting is removed."""
+        meeting["bot"].join_meeting(meeting["url"])
+        with self.lock:
+            ended = self.meetings.get(meeting_id) is meeting
+            if ended:
+                del self.meetings[meeting_id]
+        if ended:  # the meeting ended on its own rather than being removed
+            meeting["bot"].quit()
+            print(f"Meeting {meeting_id} ended")
+
+    def status(self):
+        """The running meetings and the browser's resource usage, as a JSON-serializable dictionary."""
+        with self.lock:
+            meetings = dict(self.meetings)
+        channels = {meeting_id: meeting["bot"].conference_events for meeting_id, meeting in meetings.items()}
+        return {
+            "meetings": {
+                meeting_id: {
+                    "url": meeting["url"],
+                    "added": meeting["added"],
+                    "joined": channels[meeting_id] is not None and 'joined' in channels[meeting_id].last_events,
+                    "participants": len(meeting["bot"].participants),
+                }
+                for meeting_id, meeting in meetings.items()
+            },
+            "browser": self.browser.usage(),
+        }
+
+    def close(self):
+        """Remove every meeting and quit the browser."""
+        with self.lock:
+            meeting_ids = list(self.meetings)
+        for meeting_id in meeting_ids:
+            self.remove_meeting(meeting_id)
+        self.browser.quit()
+
+    def serve(self, host='127.0.0.1', port=HOST_CONTROL_PORT):
+        """Serve the control API until interrupted:
+
+        ``GET /meetings`` returns ``status()``, ``POST /meetings`` with ``{"id": ..., "url": ...}`` adds
+        a meeting and ``DELETE /meetings/<id>`` removes one.
+        """
+        server = ThreadingHTTPServer((host, port), _control_handler(self))
+        print(f"Bot host listening on http://{host}:{server.server_address[1]}/meetings")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+def _control_handler(host):
+    class ControlHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/meetings':
+                return self.reply(404, {"error": "not found"})
+            self.reply(200, host.status())
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/meetings':
+                return self.reply(404, {"error": "not found"})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                host.add_meeting(request["id"], request["url"])
+            except (ValueError, KeyError, TypeError) as e:
+                return self.reply(400, {"error": str(e)})
+            except RuntimeError as e:
+                return self.reply(503, {"error": str(e)})
+            self.reply(201, {"id": request["id"]})
+
+        def do_DELETE(self):
+            prefix = '/meetings/'
+            if not self.path.startswith(prefix) or not host.remove_meeting(self.path[len(prefix):]):
+                return self.reply(404, {"error": "not found"})
+            self.reply(200, {"id": self.path[len(prefix):]})
+
+        def reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ControlHandler
+
+
+def main():
+    metrics = None
+    if METRICS_PORT:
+        metrics = Metrics()
+        metrics.serve(port=METRICS_PORT)
+    host = BotHost(metrics=metrics)
+    try:
+        host.serve()
+    except KeyboardInterrupt:
+        print("\nStopping bot host...")
+    finally:
+        host.close()
+
+
+if __name__ == "__main__":
+    main()
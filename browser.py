@@ -0,0 +1,109 @@
+from seleniumwire import webdriver
+from selenium.webdriver.chrome.options import Options
+from contextlib import contextmanager
+import os
+import threading
+from audio_only import CHROME_ARGUMENTS, process_tree_usage
+from config import AUDIO_ONLY
+
+
+def create_driver(audio_only=AUDIO_ONLY, background_tabs=False):
+    """Start Chrome (with its chromedriver and selenium-wire proxy) configured for the bot.
+
+    ``background_tabs`` keeps timers and media running at full rate in tabs that are not in the
+    foreground, which is needed when several meetings share the browser.
+    """
+    options = Options()
+
+    # Add required Chrome options
+    options.add_argument("--headless")  # Enable headless mode
+    options.add_argument("--use-fake-ui-for-media-stream")
+    options.add_argument("--use-file-for-fake-audio-capture")
+    options.add_argument("--allow-file-access")
+    options.add_argument("--enable-experimental-web-platform-features")
+    options.add_argument("--autoplay-policy=no-user-gesture-required")
+    options.add_argument("--disable-web-security")
+    options.add_argument("--allow-running-insecure-content")
+    options.add_argument("--start-maximized")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-notifications")
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument("--use-fake-device-for-media-stream")
+    if audio_only:
+        for argument in CHROME_ARGUMENTS:
+            options.add_argument(argument)
+    if background_tabs:
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+        options.add_argument("--disable-renderer-backgrounding")
+
+    # Enable audio recording
+    options.add_argument("--enable-usermedia-screen-capturing")
+    options.add_argument("--allow-file-access-from-files")
+
+    # Add experimental options
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_experimental_option("prefs", {
+        "profile.default_content_setting_values.media_stream_mic": 1,
+        "profile.default_content_setting_values.media_stream_camera": 2 if audio_only else 1,  # 2 blocks the camera
+        "download.default_directory": os.path.join(os.getcwd(), "recordings")
+    })
+
+    # Configure selenium-wire to capture media
+    seleniumwire_options = {
+        'enable_har': True,
+        'har_options': {
+            'captureHeaders': True,
+            'captureContent': True
+        }
+    }
+
+    return webdriver.Chrome(
+        options=options,
+        seleniumwire_options=seleniumwire_options
+    )
+
+
+class SharedBrowser:
+    """
+    One Chrome session whose tabs are used by one or more bots.
+
+    WebDriver commands always go to the currently selected tab, so every command runs inside
+    ``tab(handle)``, which holds the browser lock and switches tabs only when needed.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.lock = threading.RLock()  # WebDriver calls come from several threads
+        self.current_handle = driver.current_window_handle
+
+    @contextmanager
+    def tab(self, handle):
+        """Select the tab ``handle`` and hold the browser until the block ends; yields the driver."""
+        with self.lock:
+            if handle != self.current_handle:
+                self.driver.switch_to.window(handle)
+                self.current_handle = handle
+            yield self.driver
+
+    def open_tab(self):
+        """Open a new blank tab and return its handle."""
+        with self.lock:
+            self.driver.switch_to.new_window('tab')
+            self.current_handle = self.driver.current_window_handle
+            return self.current_handle
+
+    def close_tab(self, handle):
+        with self.tab(handle) as driver:
+            driver.close()
+            self.current_handle = None  # WebDriver has no selected tab until the next switch
+
+    def usage(self):
+        """CPU time and resident memory of chromedriver and the Chrome processes it started."""
+        return process_tree_usage(self.driver.service.process.pid)
+
+    def quit(self):
+        with self.lock:
+            self.driver.quit()
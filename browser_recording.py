@@ -0,0 +1,193 @@
+import base64
+import os
+import threading
+import time
+from datetime import datetime
+from recording_sinks import PART_SUFFIX, open_partial_file, recover_partial_files
+
+# Injected into the meeting page with the chunk interval (ms) and the most bytes the page may hold
+# waiting for Python. Mixes the remote participants' audio into one MediaRecorder; every chunk it
+# produces is base64 encoded (in order) and queued until DRAIN_SCRIPT takes it, so the page only
+# ever holds the chunks produced since the last drain. If Python stops draining, the oldest
+# chunks are dropped once the queue exceeds the limit, and counted.
+RECORDER_SCRIPT = """
+const timeslice = arguments[0];
+const maxQueuedBytes = arguments[1];
+if (window.__browserRecording && window.__browserRecording.recorder.state !== 'inactive') {
+    return {status: 'already_recording'};
+}
+try {
+    const conference = window.APP.conference._room;
+    const audioContext = new (window.AudioContext || window.webkitAudioContext)();
+    const destination = audioContext.createMediaStreamDestination();
+    let sources = 0;
+    conference.getParticipants().forEach(participant => {
+        const track = participant.getTracks().find(t => t.getType() === 'audio');
+        if (track && track.stream && track.stream.getAudioTracks().length > 0) {
+            audioContext.createMediaStreamSource(track.stream).connect(destination);
+            sources++;
+        }
+    });
+
+    const recorder = new MediaRecorder(destination.stream, {mimeType: 'audio/webm;codecs=opus', audioBitsPerSecond: 128000});
+    const state = window.__browserRecording = {
+        recorder, audioContext,
+        queue: [],  // [seq, base64 data], oldest first
+        queuedBytes: 0,
+        nextSeq: 0,
+        lost: 0,
+        encoding: Promise.resolve(),  // keeps the asynchronous base64 encoding in chunk order
+        finished: false
+    };
+    window.mediaRecorder = recorder;
+
+    const toBase64 = blob => new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = () => resolve(reader.result.slice(reader.result.indexOf(',') + 1));
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(blob);
+    });
+    recorder.ondataavailable = event => {
+        if (event.data.size === 0) return;
+        const seq = state.nextSeq++;
+        state.encoding = state.encoding.then(() => toBase64(event.data)).then(data => {
+            state.queue.push([seq, data]);
+            state.queuedBytes += data.length;
+            while (state.queuedBytes > maxQueuedBytes && state.queue.length > 1) {
+                state.queuedBytes -= state.queue.shift()[1].length;
+                state.lost++;
+            }
+        }).catch(error => console.error('Recording chunk lost:', error));
+    };
+    recorder.onstop = () => {
+        state.encoding.then(() => { state.finished = true; });
+        audioContext.close();
+    };
+    recorder.start(timeslice);
+    return {status: 'started', recorderState: recorder.state, sources};
+} catch (error) {
+    console.error('Recording setup error:', error);
+    return {status: 'error', error: error.toString()};
+}
+"""
+
+# Hands over queued chunks, up to about ``arguments[0]`` bytes of base64, and releases them in the page.
+DRAIN_SCRIPT = """
+const state = window.__browserRecording;
+if (!state) {
+    return null;
+}
+const chunks = [];
+let bytes = 0;
+while (state.queue.length > 0 && (chunks.length === 0 || bytes + state.queue[0][1].length <= arguments[0])) {
+    const chunk = state.queue.shift();
+    bytes += chunk[1].length;
+    chunks.push(chunk);
+}
+state.queuedBytes -= bytes;
+return {chunks, pending: state.queue.length, lost: state.lost, recorderState: state.recorder.state, finished: state.finished};
+"""
+
+STOP_SCRIPT = """
+const state = window.__browserRecording;
+if (!state || state.recorder.state === 'inactive') {
+    return false;
+}
+state.recorder.stop();  // emits the last chunk, then finishes once it is encoded
+return true;
+"""
+
+
+class BrowserRecording:
+    """
+    Records the meeting's mixed audio with the page's MediaRecorder, streaming it to a WebM file.
+
+    A background thread drains the chunks the recorder produces every ``timeslice`` milliseconds
+    from the page every ``drain_interval`` seconds and appends them, in order, to the file, so the
+    page never accumulates the recording. The file is written as ``<path>.part`` and renamed when
+    the recording stops; MediaRecorder's WebM is a stream, so a file left behind by a crash is
+    playable up to its last chunk and is finalised by the next recording in the same directory.
+
+    ``execute(script, *args)`` runs a script in the page, normally ``JitsiBot.run_script``.
+    """
+
+    def __init__(self, execute, directory, timeslice=5000, drain_interval=2, max_batch_bytes=4 * 2 ** 20,
+                 max_queued_bytes=32 * 2 ** 20, filename_prefix="meeting_recording"):
+        self.execute = execute
+        self.directory = directory
+        self.timeslice = timeslice
+        self.drain_interval = drain_interval
+        self.max_batch_bytes = max_batch_bytes
+        self.max_queued_bytes = max_queued_bytes
+        self.filename_prefix = filename_prefix
+
+        self.path = None
+        self.file = None
+        self.next_seq = 0
+        self.stats = {"chunks": 0, "bytes": 0, "drains": 0, "lost": 0, "gaps": 0, "errors": 0}
+        self.running = False
+        self.finished = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start the page's recorder and the drain thread; returns the page's setup result."""
+        os.makedirs(self.directory, exist_ok=True)
+        for path in recover_partial_files(self.directory):
+            print(f"Recovered unfinished recording: {path}")
+        result = self.execute(RECORDER_SCRIPT, self.timeslice, self.max_queued_bytes)
+        if not result or result.get("status") != "started":
+            return result
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(self.directory, f"{self.filename_prefix}_{timestamp}.webm")
+        self.file = open_partial_file(self.path + PART_SUFFIX)
+        self.running = True
+        self.finished.clear()
+        self.thread = threading.Thread(target=self._drain_loop, name="browser-recording", daemon=True)
+        self.thread.start()
+        return result
+
+    def stop(self, timeout=15):
+        """Stop the page's recorder, drain the last chunks and finish the file; returns its path."""
+        if self.thread is None:
+            return None
+        try:
+            self.execute(STOP_SCRIPT)
+        except Exception as e:
+            print(f"Error stopping the browser recorder: {e}")
+        self.finished.wait(timeout)  # the drain thread keeps going until the page says it is done
+        self.running = False
+        self.thread.join()
+        self.thread = None
+        os.replace(self.path + PART_SUFFIX, self.path)
+        self.file.close()  # releases its lock once renamed, so it is never taken for an abandoned file
+        print(f"Recording saved at: {self.path} ({self.stats})")
+        return self.path
+
+    def _drain_loop(self):
+        while self.running:
+            try:
+                result = self.execute(DRAIN_SCRIPT, self.max_batch_bytes)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error draining the browser recording: {e}")
+                time.sleep(self.drain_interval)
+                continue
+            if result is None:  # the page was reloaded; the recorder went with it
+                self.finished.set()
+                return
+            self.stats["drains"] += 1
+            self.stats["lost"] = result["lost"]
+            for seq, data in result["chunks"]:
+                if seq != self.next_seq:
+                    self.stats["gaps"] += 1  # chunks were dropped in the page
+                self.next_seq = seq + 1
+                chunk = base64.b64decode(data)
+                self.file.write(chunk)
+                self.stats["chunks"] += 1
+                self.stats["bytes"] += len(chunk)
+            self.file.flush()
+            if result["finished"] and result["pending"] == 0:
+                self.finished.set()
+                return
+            if result["pending"] == 0:
+                time.sleep(self.drain_interval)
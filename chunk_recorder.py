@@ -0,0 +1,333 @@
+import json
+import os
+import threading
+from collections import deque
+import time
+from speech_recognition import dsp
+from recording_sinks import WavSink, recover_partial_files
+
+PA_INPUT_UNDERFLOW = 0x1  # PortAudio callback status flags
+PA_INPUT_OVERFLOW = 0x2
+PA_CONTINUE = 0  # pyaudio.paContinue
+
+
+class ChunkRecorder:
+    """
+    Writes continuously captured audio as consecutive segments, cut at quiet moments.
+
+    Capture only copies samples into a preallocated ring buffer holding ``buffer_chunks`` chunks,
+    so it never waits on the disk; a writer thread segments the audio and writes it straight from
+    the ring buffer while capture continues.
+
+    A segment is cut at the quietest ``block_seconds`` block within ``window_seconds`` of
+    ``chunk_seconds``, so words are not split across files (``window_seconds=0`` cuts at exactly
+    ``chunk_seconds``). When ``silence_threshold`` is set, blocks whose RMS is below it are silent;
+    a silence longer than ``max_silence_seconds`` ends the segment after ``keep_silence_seconds``,
+    the rest of it is not stored, and the next segment starts ``keep_silence_seconds`` before the
+    sound resumes. Without silence removal consecutive segments join up exactly.
+
+    Every segment is listed, as it is finished, in the JSON lines sidecar index ``index_name`` in
+    ``directory``: its file and offset in seconds within it, start time and end time (wall clock, derived from the stream's first
+    sample and the frame offset, so sample accurate), first stream frame, frame count, frames lost
+    within it, why it was cut (``window``, ``silence`` or ``end``) and the seconds left out before it.
+
+    Feed it either as a PyAudio stream callback (``callback``) or by calling ``write`` with blocks
+    read from the stream. ``stats`` counts input overflows reported by the audio device, frames
+    dropped because the writer fell a whole ring buffer behind, segments written, seconds of
+    silence left out and write errors.
+
+    ``sink`` stores the segments' audio, by default each in its own WAV file (``WavSink``);
+    ``recording_sinks.EncoderSink`` compresses them into Opus or FLAC files instead.
+    """
+
+    def __init__(self, directory, rate, channels=1, sample_width=2, chunk_seconds=20, buffer_chunks=3,
+                 window_seconds=0, silence_threshold=None, max_silence_seconds=2, keep_silence_seconds=0.3,
+                 block_seconds=0.03, index_name="index.jsonl", sink=None):
+        self.directory = directory
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_bytes = channels * sample_width
+        self.block_frames = max(1, int(rate * block_seconds))
+        self.chunk_frames = int(rate * chunk_seconds)
+        self.window_frames = min(self._blocks(window_seconds), self.chunk_frames - self.block_frames)
+        self.silence_threshold = silence_threshold
+        self.max_silence_frames = self._blocks(max_silence_seconds)
+        self.keep_silence_frames = self._blocks(keep_silence_seconds) if silence_threshold is not None else 0
+        self.sink = sink or WavSink(directory, rate, channels, sample_width)  # where the segments' audio goes
+        self.index_path = os.path.join(directory, index_name)
+
+        self.capacity = self.chunk_frames * buffer_chunks  # frames
+        if self.capacity < self.chunk_frames + self.window_frames + self.max_silence_frames + self.block_frames:
+            raise ValueError("The ring buffer must hold a chunk plus the cut window and the longest kept silence")
+        self.buffer = bytearray(self.capacity * self.frame_bytes)
+        self.view = memoryview(self.buffer)
+        self.written = 0  # frames captured into the ring buffer so far
+        self.flushed = 0  # frames before this are no longer needed, and capture may overwrite them
+        self.gaps = deque()  # (ring frame index, frames dropped just before it), for frames not yet flushed
+        self.skipped = 0  # frames dropped before ``flushed``
+        self.condition = threading.Condition()
+
+        # writer thread state
+        self.position = 0  # next frame to analyse
+        self.segment = None  # the open segment: {"start", "end", "start_frame", "start_time", "failed"}
+        self.silent_frames = 0  # length of the silence at the end of the open segment
+        self.last_end_time = None  # end time of the previous segment
+
+        self.start_time = None  # wall clock time (seconds) of the first captured frame
+        self.stats = {"input_overflows": 0, "input_underflows": 0, "dropped_frames": 0, "chunks": 0,
+                      "silence_removed_seconds": 0.0, "write_errors": 0}
+        self.files = []  # (path, start frame, frame count, start time) of every segment written, in order
+        self.running = False
+        self.thread = None
+
+    def _blocks(self, seconds):
+        return int(round(seconds * self.rate / self.block_frames)) * self.block_frames
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for path in recover_partial_files(self.directory):
+            print(f"Recovered unfinished recording: {path}")
+        self.running = True
+        self.thread = threading.Thread(target=self._writer_loop, name="chunk-writer", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """Stop capturing, write out the captured audio (the last segment may be shorter) and wait for the writer."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        try:
+            self.sink.close()
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"Error finishing recording: {e}")
+
+    def callback(self, in_data, frame_count, time_info, status):
+        """PyAudio stream callback (``stream_callback=recorder.callback``)."""
+        if status & PA_INPUT_OVERFLOW:
+            self.stats["input_overflows"] += 1
+        if status & PA_INPUT_UNDERFLOW:
+            self.stats["input_underflows"] += 1
+        if self.start_time is None:
+            # the ADC time of the first sample, moved from the stream clock to the wall clock
+            latency = time_info.get("current_time", 0) - time_info.get("input_buffer_adc_time", 0)
+            if not time_info.get("input_buffer_adc_time") or not 0 <= latency < 1:
+                latency = frame_count / self.rate  # the host API doesn't report timestamps
+            self.start_time = time.time() - latency
+        self.write(in_data)
+        return None, PA_CONTINUE
+
+    def write(self, data):
+        """Append captured audio (whole frames, bytes-like) to the ring buffer. Never blocks on the writer."""
+        if self.start_time is None:
+            self.start_time = time.time() - len(data) // self.frame_bytes / self.rate
+        data = memoryview(data).cast("B")
+        frames = len(data) // self.frame_bytes
+        with self.condition:
+            room = self.capacity - (self.written - self.flushed)
+            if frames > room:  # the writer is a whole ring buffer behind: drop what doesn't fit
+                self.stats["dropped_frames"] += frames - room
+                self.gaps.append((self.written + room, frames - room))
+                frames = room
+            position = self.written % self.capacity
+            first = min(frames, self.capacity - position)  # the rest wraps around to the start of the ring
+            self.view[position * self.frame_bytes:(position + first) * self.frame_bytes] = data[:first * self.frame_bytes]
+            self.view[:(frames - first) * self.frame_bytes] = data[first * self.frame_bytes:frames * self.frame_bytes]
+            self.written += frames
+            if self.written - self.position >= self._lookahead():
+                self.condition.notify_all()
+
+    def skip(self, frames):
+        """Account for ``frames`` frames the device lost before they reached the recorder."""
+        with self.condition:
+            self.gaps.append((self.written, frames))
+        self.stats["dropped_frames"] += frames
+
+    def _lookahead(self):
+        """Frames needed past ``position`` before the writer can take its next step."""
+        if self.segment is None:
+            return self.block_frames
+        window_start = self.segment["start"] + self.chunk_frames - self.window_frames
+        if self.position >= window_start:
+            return window_start + 2 * self.window_frames - self.position  # the whole cut window
+        return min(self.block_frames, window_start - self.position)  # blocks line up with the window
+
+    def _writer_loop(self):
+        while True:
+            with self.condition:
+                while self.running and self.written - self.position < self._lookahead():
+                    self.condition.wait()
+                available = self.written
+                stopping = self.written - self.position < self._lookahead()
+            if stopping:
+                self._finish(available)
+                return
+            if self.segment is None:
+                self._skip_silence()
+            elif self.position - self.segment["start"] >= self.chunk_frames - self.window_frames:
+                self._cut_in_window()
+            else:
+                self._extend_segment()
+
+    def _skip_silence(self):
+        """Between segments: leave out silent blocks, and start a segment at the first one with sound."""
+        if self._is_silent(self.position):
+            self.position += self.block_frames
+            self._release(self.position - self.keep_silence_frames)
+        else:
+            self._open_segment(max(self.flushed, self.position - self.keep_silence_frames))
+
+    def _extend_segment(self):
+        """Add the next block to the open segment, holding back silence until it is known to be short."""
+        frames = self._lookahead()
+        silent = self._is_silent(self.position, frames)
+        self.position += frames
+        self.silent_frames = self.silent_frames + frames if silent else 0
+        if self.silent_frames <= self.keep_silence_frames:
+            self._write_segment(self.position)  # including any silence held back so far
+        elif self.silent_frames >= self.max_silence_frames:
+            self._close_segment("silence")  # ends ``keep_silence_frames`` into the silence
+
+    def _cut_in_window(self):
+        """
+        End the open segment within the window around the target length: ``keep_silence_seconds``
+        into the first silence in it, or otherwise at the start of its quietest block.
+        """
+        target = self.segment["start"] + self.chunk_frames
+        cut, reason = target, "window"
+        if self.silence_threshold is not None and self.silent_frames > self.keep_silence_frames:
+            cut, reason = self.segment["end"], "silence"  # already in a silence, held back since its first blocks
+        elif self.window_frames:
+            quietest = None
+            silent_frames = self.silent_frames
+            for block in range(self.position, target + self.window_frames, self.block_frames):
+                energy = self._energy(block)
+                silent_frames = silent_frames + self.block_frames if self._is_silent(block) else 0
+                if self.silence_threshold is not None and silent_frames >= self.keep_silence_frames and silent_frames:
+                    cut, reason = block + self.block_frames, "silence"
+                    break
+                if quietest is None or energy < quietest or (energy == quietest and abs(block - target) < abs(cut - target)):
+                    quietest, cut = energy, block
+        self._write_segment(cut)
+        self._close_segment(reason)
+        self.position = cut
+
+    def _finish(self, available):
+        """On close: write out the open segment, up to the last captured frame unless that is long silence."""
+        if self.segment is not None:
+            if self.silent_frames <= self.keep_silence_frames:
+                self._write_segment(available)
+            self._close_segment("end")
+        self._release(available)
+
+    def _is_silent(self, frame, frames=None):
+        return self.silence_threshold is not None and self._energy(frame, frames) < self.silence_threshold
+
+    def _energy(self, frame, frames=None):
+        """RMS of the block (or the ``frames`` frames) starting at ring frame ``frame``."""
+        end = frame + (frames or self.block_frames)
+        return dsp.rms(b"".join(self._slices(frame, end)), self.sample_width)
+
+    def _slices(self, start, end):
+        """The ring buffer contents for frames ``start`` to ``end``, as one or two memoryviews."""
+        position = start % self.capacity
+        first = min(end - start, self.capacity - position)
+        slices = [self.view[position * self.frame_bytes:(position + first) * self.frame_bytes]]
+        if end - start > first:
+            slices.append(self.view[:(end - start - first) * self.frame_bytes])
+        return slices
+
+    def _release(self, frame):
+        """Let capture reuse the ring buffer before ``frame``."""
+        with self.condition:
+            if frame > self.flushed:
+                self.flushed = frame
+                while self.gaps and self.gaps[0][0] < self.flushed:  # those just before ``flushed`` may still end a segment
+                    self.skipped += self.gaps.popleft()[1]
+
+    def _stream_frame(self, frame):
+        """The stream frame number of ring frame ``frame``, counting the frames dropped before it."""
+        with self.condition:
+            return frame + self.skipped + sum(count for index, count in self.gaps if index <= frame)
+
+    def _stream_end(self, frame):
+        """The stream frame number just after ring frame ``frame - 1``, leaving out the frames dropped just before ``frame``."""
+        with self.condition:
+            return frame + self.skipped + sum(count for index, count in self.gaps if index < frame)
+
+    def _open_segment(self, start):
+        start_frame = self._stream_frame(start)
+        start_time = self.start_time + start_frame / self.rate
+        self.segment = {"start": start, "end": start, "start_frame": start_frame, "start_time": start_time, "failed": False}
+        self.silent_frames = 0
+        try:
+            self.sink.open_segment(start_time)
+        except Exception as e:
+            self._write_failed(e)
+
+    def _write_failed(self, error):
+        self.stats["write_errors"] += 1
+        self.segment["failed"] = True
+        print(f"Error saving audio file: {error}")
+
+    def _write_segment(self, end):
+        """Write the open segment's frames up to ``end`` from the ring buffer."""
+        segment = self.segment
+        if end <= segment["end"]:
+            return
+        if not segment["failed"]:
+            try:
+                for data in self._slices(segment["end"], end):
+                    self.sink.write(data)
+            except Exception as e:
+                self._write_failed(e)
+        segment["end"] = end
+        self._release(end)
+
+    def _close_segment(self, reason):
+        segment, self.segment = self.segment, None
+        self.silent_frames = 0
+        self._release(segment["end"])
+        if segment["failed"]:
+            return
+        try:
+            location = self.sink.close_segment()
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"Error saving audio file: {e}")
+            return
+        frames = segment["end"] - segment["start"]
+        dropped = max(self._stream_end(segment["end"]) - segment["start_frame"] - frames, 0)  # lost within the segment
+        end_time = segment["start_time"] + (frames + dropped) / self.rate
+        gap = segment["start_time"] - (self.last_end_time if self.last_end_time is not None else self.start_time)
+        self.last_end_time = end_time
+        if self.silence_threshold is not None:
+            self.stats["silence_removed_seconds"] += max(gap, 0)
+        entry = dict(location, **{
+            "start_time": segment["start_time"],
+            "end_time": end_time,
+            "start_frame": segment["start_frame"],
+            "frames": frames,
+            "dropped_frames": dropped,  # frames lost within the segment: its file is this much shorter than end_time - start_time
+            "cut": reason,
+            "gap_before": max(gap, 0),  # seconds of audio left out (silence or lost frames) before this segment
+        })
+        try:
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"Error writing recording index: {e}")
+        self.stats["chunks"] += 1
+        path = os.path.join(self.directory, location["file"])
+        self.files.append((path, segment["start_frame"], frames, segment["start_time"]))
+        print(f"Saved audio chunk: {path}" + (f" at {location['offset']:.2f}s" if location.get("offset") else ""))
+
+
+def load_index(directory, index_name="index.jsonl"):
+    """Read the sidecar index of a recording directory: one dictionary per segment, in recording order."""
+    with open(os.path.join(directory, index_name)) as f:
+        return [json.loads(line) for line in f if line.strip()]
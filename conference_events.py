@@ -0,0 +1,248 @@
+import threading
+import time
+
+# Injected into the meeting page with the ring buffer capacity as the only argument. Waits for the
+# conference object, then records lib-jitsi-meet conference events as timestamped entries in a
+# ring buffer that DRAIN_SCRIPT reads in batches. Every entry has a sequence number ``seq``, a
+# ``type`` and a wall clock ``time`` in seconds, comparable with Python's ``time.time()``.
+INSTALL_SCRIPT = """
+const capacity = arguments[0];
+if (window.__conferenceEvents) {
+    return window.__conferenceEvents.instance;
+}
+const buffer = new Array(capacity);
+const state = window.__conferenceEvents = {
+    instance: Math.random().toString(36).slice(2),
+    next: 1,  // sequence number of the next event
+    attached: false
+};
+
+function push(type, fields) {
+    buffer[state.next % capacity] = Object.assign({seq: state.next, type, time: Date.now() / 1000}, fields);
+    state.next++;
+}
+
+function attach(room) {
+    const jitsi = window.JitsiMeetJS;
+    const conference = jitsi ? jitsi.events.conference : {};
+    const quality = jitsi ? jitsi.events.connectionQuality : {};
+    const on = (name, fallback, handler) => room.on(name || fallback, handler);
+    const trackFields = track => ({
+        id: track.isLocal() ? 'local' : track.getParticipantId(), track_type: track.getType(),
+        track_id: track.getId(), local: track.isLocal(), muted: track.isMuted()
+    });
+
+    on(conference.CONFERENCE_JOINED, 'conference.joined', () => push('joined', {}));
+    on(conference.CONFERENCE_LEFT, 'conference.left', () => push('left', {}));
+    on(conference.KICKED, 'conference.kicked', () => push('kicked', {}));
+    on(conference.CONFERENCE_FAILED, 'conference.failed', error => push('failed', {error: String(error)}));
+    on(conference.USER_JOINED, 'conference.userJoined', (id, user) => push('participant_joined', {id, name: user.getDisplayName() || null}));
+    on(conference.USER_LEFT, 'conference.userLeft', id => push('participant_left', {id}));
+    on(conference.DISPLAY_NAME_CHANGED, 'conference.displayNameChanged', (id, name) => push('display_name_changed', {id, name}));
+    on(conference.TRACK_ADDED, 'conference.trackAdded', track => push('track_added', trackFields(track)));
+    on(conference.TRACK_REMOVED, 'conference.trackRemoved', track => push('track_removed', trackFields(track)));
+    on(conference.TRACK_MUTE_CHANGED, 'conference.trackMuteChanged', track => push('track_mute_changed', trackFields(track)));
+    on(conference.DOMINANT_SPEAKER_CHANGED, 'conference.dominantSpeaker', (id, previous) => push('dominant_speaker', {id, previous: previous || []}));
+    on(quality.LOCAL_STATS_UPDATED, 'cq.local_stats_updated', stats => push('connection_quality', {
+        id: 'local', quality: stats.connectionQuality, bitrate: stats.bitrate || null, packet_loss: stats.packetLoss || null
+    }));
+    on(quality.REMOTE_STATS_UPDATED, 'cq.remote_stats_updated', (id, stats) => push('connection_quality', {
+        id, quality: stats.connectionQuality, bitrate: stats.bitrate || null, packet_loss: stats.packetLoss || null
+    }));
+
+    state.attached = true;
+    push('attached', {});
+    // events that happened before we attached, so that consumers start from the current state
+    room.getParticipants().forEach(participant => push('participant_joined', {id: participant.getId(), name: participant.getDisplayName() || null}));
+    if (room.isJoined()) push('joined', {});
+}
+
+state.drain = (after, max, withStatus) => {
+    const oldest = Math.max(1, state.next - capacity);
+    const start = Math.max(after + 1, oldest);
+    const end = Math.min(state.next, start + max);
+    const events = [];
+    for (let seq = start; seq < end; seq++) events.push(buffer[seq % capacity]);
+    const result = {instance: state.instance, events, last: end - 1, lost: start - (after + 1), pending: state.next - end};
+    if (withStatus) {
+        const room = window.APP && window.APP.conference && window.APP.conference._room;
+        result.status = room ? {
+            isJoined: room.isJoined(),
+            participants: room.getParticipants().length,
+            hasAudio: !!room.getLocalAudioTrack(),
+            recordingStatus: window.mediaRecorder ? window.mediaRecorder.state : 'not_found',
+            chunksRecorded: window.__browserRecording ? window.__browserRecording.nextSeq : 0,
+            chunksPending: window.__browserRecording ? window.__browserRecording.queue.length : 0
+        } : {isJoined: false, conference: 'not_found'};
+    }
+    return result;
+};
+
+// the conference object is created some time after the page loads, or once the prejoin screen is left
+let prejoinReported = false;
+const waitForRoom = setInterval(() => {
+    const room = window.APP && window.APP.conference && window.APP.conference._room;
+    if (room) {
+        clearInterval(waitForRoom);
+        attach(room);
+    } else if (!prejoinReported && document.querySelector('#premeeting-name-input')) {
+        prejoinReported = true;
+        push('prejoin', {});
+    }
+}, 250);
+return state.instance;
+"""
+
+DRAIN_SCRIPT = """
+const state = window.__conferenceEvents;
+return state ? state.drain(arguments[0], arguments[1], arguments[2]) : null;
+"""
+
+
+class ConferenceEventChannel:
+    """
+    Delivers lib-jitsi-meet conference events from the meeting page to Python subscribers.
+
+    A listener injected into the page records events in a bounded ring buffer; a background thread
+    drains it in batches every ``drain_interval`` seconds with a single script call, and calls the
+    subscribers in event order. Every ``heartbeat_interval`` seconds the drain also fetches a status
+    snapshot, delivered as a ``heartbeat`` event. If the page is reloaded the listener is injected
+    again; events that overflowed the ring buffer between drains are counted in ``stats["lost"]``.
+
+    ``execute(script, *args)`` runs a script in the page, normally ``JitsiBot.run_script``.
+    """
+
+    def __init__(self, execute, drain_interval=1, heartbeat_interval=10, capacity=1000, batch_size=500, max_failures=5):
+        self.execute = execute
+        self.drain_interval = drain_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.max_failures = max_failures  # consecutive failed drains before the page is considered gone
+
+        self.subscribers = []  # (callback, types or None)
+        self.subscribers_lock = threading.Lock()
+        self.last_events = {}  # type -> latest event of that type
+        self.last_events_condition = threading.Condition()
+
+        self.instance = None  # identifies the injected listener, changes when the page is reloaded
+        self.last_seq = 0
+        self.stats = {"drains": 0, "events": 0, "lost": 0, "failures": 0, "reinstalls": 0}
+        self.running = False
+        self.closed = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Inject the listener and start draining events. The page may still be loading: if the listener
+        can't be injected yet, or ends up in the page being navigated away from, the drain injects it again.
+        """
+        try:
+            self.instance = self.execute(INSTALL_SCRIPT, self.capacity)
+        except Exception as e:
+            print(f"Conference event listener not injected yet: {e}")
+            self.instance = None
+        self.running = True
+        self.closed.clear()
+        self.thread = threading.Thread(target=self._drain_loop, name="conference-events", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def subscribe(self, callback, types=None):
+        """Call ``callback(event)`` for every event (or only those whose type is in ``types``); returns a function that unsubscribes."""
+        entry = (callback, frozenset(types) if types is not None else None)
+        with self.subscribers_lock:
+            self.subscribers.append(entry)
+
+        def unsubscribe():
+            with self.subscribers_lock:
+                if entry in self.subscribers:
+                    self.subscribers.remove(entry)
+        return unsubscribe
+
+    def wait_for(self, event_types, timeout=None):
+        """
+        Wait until an event of ``event_types`` (a type or a tuple of types) has been seen, including
+        before this call, and return the latest one, or ``None`` on timeout.
+        """
+        if isinstance(event_types, str):
+            event_types = (event_types,)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.last_events_condition:
+            while True:
+                seen = [self.last_events[event_type] for event_type in event_types if event_type in self.last_events]
+                if seen:
+                    return max(seen, key=lambda event: event.get('seq', 0))
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or self.closed.is_set():
+                    return None
+                self.last_events_condition.wait(remaining if remaining is None else min(remaining, 1))
+
+    def wait_closed(self, timeout=None):
+        """Wait until the channel stops, because the bot left the meeting or the page stopped responding."""
+        return self.closed.wait(timeout)
+
+    def _drain_loop(self):
+        next_heartbeat = time.monotonic()
+        failures = 0
+        try:
+            while self.running:
+                with_status = time.monotonic() >= next_heartbeat
+                try:
+                    result = self.execute(DRAIN_SCRIPT, self.last_seq, self.batch_size, with_status)
+                    if result is None or result["instance"] != self.instance:
+                        self._reinstall()
+                        continue
+                except Exception as e:
+                    failures += 1
+                    self.stats["failures"] += 1
+                    print(f"Error draining conference events: {e}")
+                    if failures >= self.max_failures:
+                        self._publish({"type": "disconnected", "time": time.time()})
+                        return
+                    time.sleep(self.drain_interval)
+                    continue
+                failures = 0
+
+                self.stats["drains"] += 1
+                self.stats["lost"] += result["lost"]
+                self.last_seq = result["last"]
+                for event in result["events"]:
+                    self.stats["events"] += 1
+                    self._publish(event)
+                    if event["type"] in ("left", "kicked"):
+                        return
+                if with_status:
+                    next_heartbeat = time.monotonic() + self.heartbeat_interval
+                    self._publish({"type": "heartbeat", "time": time.time(), "status": result.get("status")})
+                if result["pending"] == 0:
+                    time.sleep(self.drain_interval)
+        finally:
+            self.running = False
+            self.closed.set()
+            with self.last_events_condition:
+                self.last_events_condition.notify_all()
+
+    def _reinstall(self):
+        """The page was reloaded (or never had the listener); inject it again and start from its first event."""
+        self.stats["reinstalls"] += 1
+        self.instance = self.execute(INSTALL_SCRIPT, self.capacity)
+        self.last_seq = 0
+
+    def _publish(self, event):
+        with self.last_events_condition:
+            self.last_events[event["type"]] = event
+            self.last_events_condition.notify_all()
+        with self.subscribers_lock:
+            subscribers = list(self.subscribers)
+        for callback, types in subscribers:
+            if types is not None and event["type"] not in types:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error handling conference event {event['type']}: {e}")
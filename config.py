@@ -1,5 +1,7 @@
 from dotenv import load_dotenv
+import json
 import os
+from urllib.parse import quote
 
 load_dotenv()
 
@@ -7,4 +9,87 @@ load_dotenv()
 JITSI_URL = os.getenv('JITSI_URL', 'logsimpl.com')
 ROOM_NAME = os.getenv('ROOM_NAME', 'yo')
 BOT_NAME = os.getenv('BOT_NAME', 'JitsiBot')
-MEETING_URL = f"https://{JITSI_URL}/{ROOM_NAME}"
\ No newline at end of file
+MEETING_BASE_URL = f"https://{JITSI_URL}/{ROOM_NAME}"
+
+# Jitsi Meet applies config/interfaceConfig overrides from the URL hash, which lets the bot land
+# straight in the conference; the prejoin screen is only used as a fallback
+JOIN_VIA_URL = os.getenv('JOIN_VIA_URL', 'true').lower() == 'true'
+MEETING_CONFIG_OVERRIDES = {
+    'prejoinConfig.enabled': False,
+    'prejoinPageEnabled': False,  # older Jitsi Meet versions
+    'startWithVideoMuted': True,
+    'disableDeepLinking': True,
+    'enableWelcomePage': False,
+}
+MEETING_INTERFACE_OVERRIDES = {
+    'MOBILE_APP_PROMO': False,
+    'SHOW_CHROME_EXTENSION_BANNER': False,
+}
+JOIN_TIMEOUT = int(os.getenv('JOIN_TIMEOUT', '30'))  # seconds to wait for the conference (or the prejoin screen) to show up
+
+
+def build_meeting_url(base_url, display_name, config_overrides=None, interface_overrides=None):
+    """Return the meeting URL with the display name and the config overrides in its hash."""
+    params = {'userInfo.displayName': display_name}
+    params.update({f'config.{key}': value for key, value in (config_overrides or {}).items()})
+    params.update({f'interfaceConfig.{key}': value for key, value in (interface_overrides or {}).items()})
+    return base_url + '#' + '&'.join(f'{key}={quote(json.dumps(value))}' for key, value in params.items())
+
+
+# Audio-only receive mode: the bridge stops forwarding video to the bot (lastN 0), the bot never
+# creates a camera track and Chrome's GPU/video pipelines are disabled, since only audio is transcribed
+AUDIO_ONLY = os.getenv('AUDIO_ONLY', 'true').lower() == 'true'
+AUDIO_ONLY_CONFIG_OVERRIDES = {
+    'startAudioOnly': True,
+    'channelLastN': 0,
+    'startWithVideoMuted': True,
+    'disableSimulcast': True,
+}
+if AUDIO_ONLY:
+    MEETING_CONFIG_OVERRIDES.update(AUDIO_ONLY_CONFIG_OVERRIDES)
+
+if JOIN_VIA_URL:
+    MEETING_URL = build_meeting_url(MEETING_BASE_URL, BOT_NAME, MEETING_CONFIG_OVERRIDES, MEETING_INTERFACE_OVERRIDES)
+else:
+    MEETING_URL = MEETING_BASE_URL
+
+# Transcription pipeline
+TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', '4'))  # parallel recognizer workers
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv('TRANSCRIBE_QUEUE_SIZE', '32'))  # phrases waiting for a worker
+TRANSCRIBE_OVERFLOW_POLICY = os.getenv('TRANSCRIBE_OVERFLOW_POLICY', 'spill')  # block, drop_oldest, drop_newest or spill
+TRANSCRIBE_SPILL_DIR = os.getenv('TRANSCRIBE_SPILL_DIR', 'spill')  # where spilled phrases wait when the queue is full
+TRANSCRIBE_VAD = os.getenv('TRANSCRIBE_VAD', 'energy')  # energy (threshold only) or spectral (also rejects typing, clicks and other noise that isn't speech)
+TRANSCRIBE_SAMPLE_RATE = int(os.getenv('TRANSCRIBE_SAMPLE_RATE', '16000'))  # rate microphone audio is resampled to as it is captured, once for all recognizers; 0 keeps the device rate
+
+# Transcript (JSON Lines, one record per recognised phrase)
+TRANSCRIPT_FILE = os.getenv('TRANSCRIPT_FILE', 'transcript.jsonl')  # in the bot's storage directory
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv('TRANSCRIPT_FLUSH_INTERVAL', '1'))  # seconds records may wait before they are written
+TRANSCRIPT_FSYNC = os.getenv('TRANSCRIPT_FSYNC', 'interval')  # never, interval (after every flush) or always (every record)
+TRANSCRIPT_INDEX_DIR = os.getenv('TRANSCRIPT_INDEX_DIR', 'transcript_index')  # searchable index of every transcript, empty to disable
+
+# Audio capture
+AUDIO_CAPTURE_MODE = os.getenv('AUDIO_CAPTURE_MODE', 'microphone')  # microphone (host input device) or browser (per-participant tracks streamed from the page)
+PARTICIPANT_AUDIO_PORT = int(os.getenv('PARTICIPANT_AUDIO_PORT', '0'))  # local WebSocket port for browser capture, 0 picks a free one
+
+# Bot host (several meetings as tabs of one Chrome)
+HOST_STORAGE_DIR = os.getenv('HOST_STORAGE_DIR', 'meetings')  # each meeting's transcript and recordings go in a subdirectory
+HOST_CONTROL_PORT = int(os.getenv('HOST_CONTROL_PORT', '8700'))  # local HTTP API for adding and removing meetings
+HOST_MAX_MEETINGS = int(os.getenv('HOST_MAX_MEETINGS', '0'))  # concurrent meetings per host, 0 for no limit
+
+# Pool of browsers launched ahead of time, so that a meeting can be joined as soon as it is requested
+DRIVER_POOL_SIZE = int(os.getenv('DRIVER_POOL_SIZE', '2'))  # idle browsers kept ready
+DRIVER_POOL_MAX_IDLE = int(os.getenv('DRIVER_POOL_MAX_IDLE', '1800'))  # seconds before an idle browser is replaced by a fresh one
+DRIVER_POOL_HEALTH_INTERVAL = int(os.getenv('DRIVER_POOL_HEALTH_INTERVAL', '30'))  # seconds between health checks of idle browsers
+
+# Recording of the host input device
+RECORD_STREAM_MODE = os.getenv('RECORD_STREAM_MODE', 'callback')  # callback (PortAudio thread feeds the recorder) or blocking (a thread reads the stream)
+RECORD_SEGMENT_SECONDS = float(os.getenv('RECORD_SEGMENT_SECONDS', '20'))  # target length of each recording file
+RECORD_CUT_WINDOW_SECONDS = float(os.getenv('RECORD_CUT_WINDOW_SECONDS', '3'))  # files are cut at the quietest moment within this of the target
+RECORD_SILENCE_THRESHOLD = int(os.getenv('RECORD_SILENCE_THRESHOLD', '300'))  # RMS below which audio is silent, 0 keeps all silence
+RECORD_MAX_SILENCE_SECONDS = float(os.getenv('RECORD_MAX_SILENCE_SECONDS', '2'))  # longer silences end the file and are not stored
+RECORD_FORMAT = os.getenv('RECORD_FORMAT', 'opus')  # wav (a file per segment), or opus/flac (streamed through ffmpeg)
+RECORD_OPUS_BITRATE = os.getenv('RECORD_OPUS_BITRATE', '24k')  # Opus bitrate; 24k is plenty for speech
+RECORD_ROTATE_SECONDS = int(os.getenv('RECORD_ROTATE_SECONDS', '3600'))  # start a new opus/flac file after this long
+
+# Metrics
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # local port serving per-stage latency histograms in Prometheus format, 0 disables the timing hooks
@@ -0,0 +1,212 @@
+import collections
+import os
+import threading
+import time
+import uuid
+from bot import JitsiBot
+from bot_host import MEETING_ID_PATTERN
+from browser import SharedBrowser, create_driver
+from config import (
+    AUDIO_ONLY, MEETING_URL, HOST_STORAGE_DIR, DRIVER_POOL_SIZE, DRIVER_POOL_MAX_IDLE, DRIVER_POOL_HEALTH_INTERVAL
+)
+
+# Run in an idle browser to check that its renderer still responds
+HEALTH_CHECK_SCRIPT = "return document.readyState === 'complete';"
+
+
+class DriverPool:
+    """
+    Keeps ``size`` browsers launched ahead of time, so that a bot can join a meeting as soon as it is dispatched.
+
+    Each idle browser is fully started: chromedriver, the selenium-wire proxy and Chrome with a
+    fresh temporary profile and media permissions granted, sitting on a blank page. A background
+    thread keeps the pool full, health-checks idle browsers every ``health_interval`` seconds and
+    replaces those that stop responding or have been idle for longer than ``max_idle`` seconds.
+    Browsers are never reused across meetings: the bot quits its browser when it leaves.
+
+    ``dispatch`` hands a browser to a new bot and records the latency from the request until
+    the bot has joined in ``dispatches``. As with ``BotHost``, every dispatched bot gets its own
+    meeting id and storage directory under ``storage_dir``, and doesn't record the host's input
+    device, since the bots of a pool run side by side on one machine.
+    """
+
+    def __init__(self, size=DRIVER_POOL_SIZE, audio_only=AUDIO_ONLY, max_idle=DRIVER_POOL_MAX_IDLE,
+                 health_interval=DRIVER_POOL_HEALTH_INTERVAL, history_size=1000, storage_dir=HOST_STORAGE_DIR):
+        self.size = size
+        self.audio_only = audio_only
+        self.storage_dir = storage_dir
+        self.max_idle = max_idle
+        self.health_interval = health_interval
+
+        self.idle = collections.deque()  # (browser, seconds it took to launch, time it became idle), oldest first
+        self.condition = threading.Condition()
+        self.launching = 0  # browsers being launched by the refill thread
+        self.running = False
+        self.thread = None
+
+        self.stats = {"launched": 0, "dispatched": 0, "cold_starts": 0, "unhealthy": 0, "expired": 0, "launch_failures": 0}
+        self.dispatches = collections.deque(maxlen=history_size)  # latency of the most recent dispatches, oldest first
+
+    def start(self):
+        """Start filling the pool in the background."""
+        self.running = True
+        self.thread = threading.Thread(target=self._refill_loop, name="driver-pool", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop refilling and quit every idle browser; browsers already handed out are left alone."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        with self.condition:
+            idle, self.idle = list(self.idle), collections.deque()
+        for browser, _, _ in idle:
+            self._quit(browser)
+
+    def acquire(self):
+        """
+        Take a healthy idle browser out of the pool, launching one on the spot if none is ready.
+        Returns ``(browser, launch_seconds, warm)``, where ``warm`` is False for a browser launched on demand.
+        """
+        while True:
+            with self.condition:
+                if not self.idle:
+                    break
+                browser, launch_seconds, _ = self.idle.popleft()
+                self.condition.notify_all()  # wake the refill thread to replace it
+            if self._healthy(browser):
+                return browser, launch_seconds, True
+            self.stats["unhealthy"] += 1
+            self._quit(browser)
+        self.stats["cold_starts"] += 1
+        browser, launch_seconds = self._launch()
+        return browser, launch_seconds, False
+
+    def dispatch(self, meeting_url=MEETING_URL, meeting_id=None, **bot_options):
+        """
+        Start a bot in a pooled browser and join ``meeting_url`` on a new thread; returns the bot.
+        The bot's output goes in ``storage_dir/meeting_id``, with a new ``meeting_id`` generated
+        unless one is given. ``bot_options`` are passed on to ``JitsiBot``.
+        """
+        requested = time.monotonic()
+        meeting_id = meeting_id or f"pool-{uuid.uuid4().hex[:12]}"
+        if not MEETING_ID_PATTERN.match(meeting_id):
+            raise ValueError(f"Invalid meeting id: {meeting_id!r}")
+        storage_dir = os.path.join(self.storage_dir, meeting_id)
+        os.makedirs(storage_dir, exist_ok=True)
+        bot_options.setdefault("record_host_audio", False)
+        browser, launch_seconds, warm = self.acquire()
+        acquired = time.monotonic()
+        bot = JitsiBot(audio_only=self.audio_only, browser=browser, own_browser=True,
+                       meeting_id=meeting_id, storage_dir=storage_dir, **bot_options)
+        self.stats["dispatched"] += 1
+        dispatch = {
+            "meeting_id": meeting_id,
+            "meeting_url": meeting_url,
+            "warm": warm,
+            "launch": launch_seconds,  # how long the browser took to start, ahead of time if warm
+            "acquire": acquired - requested,  # how long the request waited for a browser
+            "join": None,  # from opening the meeting until joined
+            "total": None,  # from the request until joined
+        }
+
+        def on_joined(join_seconds):
+            dispatch["join"] = join_seconds
+            dispatch["total"] = time.monotonic() - requested
+            self.dispatches.append(dispatch)
+            print(f"Dispatched to {meeting_url} with a {'warm' if warm else 'cold'} browser: "
+                  f"waited {dispatch['acquire']:.2f}s for it, joined {dispatch['total']:.2f}s after the request")
+
+        threading.Thread(target=self._run, args=(bot, meeting_url, on_joined), name="dispatched-bot", daemon=True).start()
+        return bot
+
+    def _run(self, bot, meeting_url, on_joined):
+        """Bot thread: stays in the meeting until it ends, then shuts the bot down, quitting its browser."""
+        try:
+            bot.join_meeting(meeting_url, on_joined)
+        finally:
+            bot.quit()
+
+    def latency_summary(self):
+        """The median and maximum of each latency in ``dispatches``, split by warm and cold dispatches."""
+        summary = {}
+        for warm, name in ((True, "warm"), (False, "cold")):
+            dispatches = [dispatch for dispatch in self.dispatches if dispatch["warm"] == warm]
+            summary[name] = {"count": len(dispatches)}
+            for key in ("acquire", "join", "total"):
+                values = sorted(dispatch[key] for dispatch in dispatches)
+                summary[name][key] = {"median": values[len(values) // 2], "max": values[-1]} if values else None
+        return summary
+
+    def _refill_loop(self):
+        next_check = time.monotonic() + self.health_interval
+        while True:
+            with self.condition:
+                while self.running and len(self.idle) + self.launching >= self.size and time.monotonic() < next_check:
+                    self.condition.wait(max(0, next_check - time.monotonic()))
+                if not self.running:
+                    return
+                refill = len(self.idle) + self.launching < self.size
+                if refill:
+                    self.launching += 1
+            if refill:
+                try:
+                    browser, launch_seconds = self._launch()
+                except Exception as e:
+                    self.stats["launch_failures"] += 1
+                    print(f"Error launching a pooled browser: {e}")
+                    time.sleep(self.health_interval)  # don't spin while Chrome can't start
+                    browser = None
+                with self.condition:
+                    self.launching -= 1
+                    if browser is not None:
+                        self.idle.append((browser, launch_seconds, time.monotonic()))
+                        self.condition.notify_all()
+            if time.monotonic() >= next_check:
+                self._check_idle()
+                next_check = time.monotonic() + self.health_interval
+
+    def _check_idle(self):
+        """
+        Replace idle browsers that stopped responding or have been idle too long.
+
+        Browsers are checked where they are, so ``acquire`` can keep taking the healthy ones meanwhile;
+        only those that fail are taken out of the pool.
+        """
+        with self.condition:
+            idle = list(self.idle)
+        now = time.monotonic()
+        for entry in idle:
+            browser, _, since = entry
+            expired = self.max_idle is not None and now - since > self.max_idle
+            if not expired and self._healthy(browser):
+                continue
+            with self.condition:
+                if entry not in self.idle:
+                    continue  # handed out meanwhile; ``acquire`` checks it again itself
+                self.idle.remove(entry)
+            self.stats["expired" if expired else "unhealthy"] += 1
+            self._quit(browser)
+
+    def _launch(self):
+        started = time.monotonic()
+        browser = SharedBrowser(create_driver(self.audio_only))
+        with browser.tab(browser.current_handle) as driver:
+            driver.get("about:blank")
+        self.stats["launched"] += 1
+        return browser, time.monotonic() - started
+
+    def _healthy(self, browser):
+        try:
+            with browser.tab(browser.current_handle) as driver:
+                return bool(driver.execute_script(HEALTH_CHECK_SCRIPT))
+        except Exception:
+            return False
+
+    def _quit(self, browser):
+        try:
+            browser.quit()
+        except Exception as e:
+            print(f"Error quitting a pooled browser: {e}")
@@ -5,7 +5,6 @@
 from __future__ import annotations
 
 import aifc
-import audioop
 import base64
 import collections
 import hashlib
@@ -21,6 +20,7 @@ import threading
 import time
 import uuid
 import wave
+import weakref
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
@@ -30,6 +30,8 @@ try:
 except (ModuleNotFoundError, ImportError):
     pass
 
+from . import aio, dsp
+from .aio import AsyncHTTPTransport
 from .audio import AudioData, get_flac_converter
 from .exceptions import (
     RequestError,
@@ -38,6 +40,11 @@ from .exceptions import (
     UnknownValueError,
     WaitTimeoutError,
 )
+from .energy import EnergyReader
+from .noise_floor import NoiseFloorTracker
+from .resample import Resampler, ResamplingStream
+from .transport import HTTPTransport
+from .vad import SpectralVAD, VoiceActivityDetector
 
 __author__ = "Anthony Zhang (Uberi)"
 __version__ = "3.11.0"
@@ -70,10 +77,13 @@ class Microphone(AudioSource):
     Higher ``sample_rate`` values result in better audio quality, but also more bandwidth (and therefore, slower recognition). Additionally, some CPUs, such as those in older Raspberry Pi models, can't keep up if this value is too high.
 
     Higher ``chunk_size`` values help avoid triggering on rapidly changing ambient noise, but also makes detection less sensitive. This value, generally, should be left at its default.
+
+    If ``convert_rate`` is specified, the audio is recorded at ``sample_rate`` but resampled to ``convert_rate`` Hz as it is read, with a ``speech_recognition.resample.ResamplingStream``, and ``SAMPLE_RATE`` is ``convert_rate``. Audio captured at the rate a recognizer expects (such as 16 kHz) doesn't have to be resampled again for every phrase; the filter state is also kept across phrase boundaries.
     """
-    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024):
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024, convert_rate=None):
         assert device_index is None or isinstance(device_index, int), "Device index must be None or an integer"
         assert sample_rate is None or (isinstance(sample_rate, int) and sample_rate > 0), "Sample rate must be None or a positive integer"
+        assert convert_rate is None or (isinstance(convert_rate, int) and convert_rate > 0), "Sample rate to convert to must be None or a positive integer"
         assert isinstance(chunk_size, int) and chunk_size > 0, "Chunk size must be a positive integer"
 
         # set up PyAudio
@@ -93,7 +103,8 @@ class Microphone(AudioSource):
         self.device_index = device_index
         self.format = self.pyaudio_module.paInt16  # 16-bit int sampling
         self.SAMPLE_WIDTH = self.pyaudio_module.get_sample_size(self.format)  # size of each sample
-        self.SAMPLE_RATE = sample_rate  # sampling rate in Hertz
+        self.device_sample_rate = sample_rate  # sampling rate of the device in Hertz
+        self.SAMPLE_RATE = sample_rate if convert_rate is None else convert_rate  # sampling rate of the audio read from ``stream`` in Hertz
         self.CHUNK = chunk_size  # number of frames stored in each buffer
 
         self.audio = None
@@ -157,9 +168,9 @@ class Microphone(AudioSource):
                     continue
 
                 # compute RMS of debiased audio
-                energy = -audioop.rms(buffer, 2)
+                energy = -dsp.rms(buffer, 2)
                 energy_bytes = bytes([energy & 0xFF, (energy >> 8) & 0xFF])
-                debiased_energy = audioop.rms(audioop.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
+                debiased_energy = dsp.rms(dsp.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
 
                 if debiased_energy > 30:  # probably actually audio
                     result[device_index] = device_name
@@ -174,9 +185,11 @@ class Microphone(AudioSource):
             self.stream = Microphone.MicrophoneStream(
                 self.audio.open(
                     input_device_index=self.device_index, channels=1, format=self.format,
-                    rate=self.SAMPLE_RATE, frames_per_buffer=self.CHUNK, input=True,
+                    rate=self.device_sample_rate, frames_per_buffer=self.CHUNK, input=True,
                 )
             )
+            if self.SAMPLE_RATE != self.device_sample_rate:
+                self.stream = ResamplingStream(self.stream, self.device_sample_rate, self.SAMPLE_RATE, self.SAMPLE_WIDTH)
         except Exception:
             self.audio.terminate()
         return self
@@ -217,11 +230,15 @@ class AudioFile(AudioSource):
     Both AIFF and AIFF-C (compressed AIFF) formats are supported.
 
     FLAC files must be in native FLAC format; OGG-FLAC is not supported and may result in undefined behaviour.
+
+    If ``convert_rate`` is specified, the audio is resampled to ``convert_rate`` Hz as it is read, with a ``speech_recognition.resample.ResamplingStream``, and ``SAMPLE_RATE`` is ``convert_rate``. ``FRAME_COUNT`` is still the number of frames in the file.
     """
 
-    def __init__(self, filename_or_fileobject):
+    def __init__(self, filename_or_fileobject, convert_rate=None):
         assert isinstance(filename_or_fileobject, (type(""), type(u""))) or hasattr(filename_or_fileobject, "read"), "Given audio file must be a filename string or a file-like object"
+        assert convert_rate is None or (isinstance(convert_rate, int) and convert_rate > 0), "Sample rate to convert to must be None or a positive integer"
         self.filename_or_fileobject = filename_or_fileobject
+        self.convert_rate = convert_rate
         self.stream = None
         self.DURATION = None
 
@@ -236,7 +253,7 @@ class AudioFile(AudioSource):
         try:
             # attempt to read the file as WAV
             self.audio_reader = wave.open(self.filename_or_fileobject, "rb")
-            self.little_endian = True  # RIFF WAV is a little-endian format (most ``audioop`` operations assume that the frames are stored in little-endian form)
+            self.little_endian = True  # RIFF WAV is a little-endian format (the ``speech_recognition.dsp`` operations assume that the frames are stored in little-endian form)
         except (wave.Error, EOFError):
             try:
                 # attempt to read the file as AIFF
@@ -273,19 +290,14 @@ class AudioFile(AudioSource):
         assert 1 <= self.audio_reader.getnchannels() <= 2, "Audio must be mono or stereo"
         self.SAMPLE_WIDTH = self.audio_reader.getsampwidth()
 
-        # 24-bit audio needs some special handling for old Python versions (workaround for https://bugs.python.org/issue12866)
-        samples_24_bit_pretending_to_be_32_bit = False
-        if self.SAMPLE_WIDTH == 3:  # 24-bit audio
-            try: audioop.bias(b"", self.SAMPLE_WIDTH, 0)  # test whether this sample width is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
-            except audioop.error:  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
-                samples_24_bit_pretending_to_be_32_bit = True  # while the ``AudioFile`` instance will outwardly appear to be 32-bit, it will actually internally be 24-bit
-                self.SAMPLE_WIDTH = 4  # the ``AudioFile`` instance should present itself as a 32-bit stream now, since we'll be converting into 32-bit on the fly when reading
-
         self.SAMPLE_RATE = self.audio_reader.getframerate()
         self.CHUNK = 4096
         self.FRAME_COUNT = self.audio_reader.getnframes()
         self.DURATION = self.FRAME_COUNT / float(self.SAMPLE_RATE)
-        self.stream = AudioFile.AudioFileStream(self.audio_reader, self.little_endian, samples_24_bit_pretending_to_be_32_bit)
+        self.stream = AudioFile.AudioFileStream(self.audio_reader, self.little_endian)
+        if self.convert_rate is not None and self.convert_rate != self.SAMPLE_RATE:
+            self.stream = ResamplingStream(self.stream, self.SAMPLE_RATE, self.convert_rate, self.SAMPLE_WIDTH)
+            self.SAMPLE_RATE = self.convert_rate
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -295,10 +307,9 @@ class AudioFile(AudioSource):
         self.DURATION = None
 
     class AudioFileStream(object):
-        def __init__(self, audio_reader, little_endian, samples_24_bit_pretending_to_be_32_bit):
+        def __init__(self, audio_reader, little_endian):
             self.audio_reader = audio_reader  # an audio file object (e.g., a `wave.Wave_read` instance)
             self.little_endian = little_endian  # whether the audio data is little-endian (when working with big-endian things, we'll have to convert it to little-endian before we process it)
-            self.samples_24_bit_pretending_to_be_32_bit = samples_24_bit_pretending_to_be_32_bit  # this is true if the audio is 24-bit audio, but 24-bit audio isn't supported, so we have to pretend that this is 32-bit audio and convert it on the fly
 
         def read(self, size=-1):
             buffer = self.audio_reader.readframes(self.audio_reader.getnframes() if size == -1 else size)
@@ -306,17 +317,9 @@ class AudioFile(AudioSource):
 
             sample_width = self.audio_reader.getsampwidth()
             if not self.little_endian:  # big endian format, convert to little endian on the fly
-                if hasattr(audioop, "byteswap"):  # ``audioop.byteswap`` was only added in Python 3.4 (incidentally, that also means that we don't need to worry about 24-bit audio being unsupported, since Python 3.4+ always has that functionality)
-                    buffer = audioop.byteswap(buffer, sample_width)
-                else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
-                    buffer = buffer[sample_width - 1::-1] + b"".join(buffer[i + sample_width:i:-1] for i in range(sample_width - 1, len(buffer), sample_width))
-
-            # workaround for https://bugs.python.org/issue12866
-            if self.samples_24_bit_pretending_to_be_32_bit:  # we need to convert samples from 24-bit to 32-bit before we can process them with ``audioop`` functions
-                buffer = b"".join(b"\x00" + buffer[i:i + sample_width] for i in range(0, len(buffer), sample_width))  # since we're in little endian, we prepend a zero byte to each 24-bit sample to get a 32-bit sample
-                sample_width = 4  # make sure we thread the buffer as 32-bit audio now, after converting it from 24-bit audio
+                buffer = dsp.byteswap(buffer, sample_width)
             if self.audio_reader.getnchannels() != 1:  # stereo audio
-                buffer = audioop.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
+                buffer = dsp.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
             return buffer
 
 
@@ -335,6 +338,33 @@ class Recognizer(AudioSource):
         self.phrase_threshold = 0.3  # minimum seconds of speaking audio before we consider the speaking audio a phrase - values below this are ignored (for filtering out clicks and pops)
         self.non_speaking_duration = 0.5  # seconds of non-speaking audio to keep on both sides of the recording
 
+        self.energy_block_size = 1  # number of buffers that ``listen`` reads from the source and measures at once; larger blocks measure energy with one vectorized call per block, which speeds up replaying files and running many listeners, but delay live audio by up to a block
+        self._energy_readers = weakref.WeakKeyDictionary()  # ``EnergyReader`` of each source stream, holding the buffers read ahead of the current position
+
+        self.vad = None  # ``speech_recognition.vad.VoiceActivityDetector`` that decides which buffers are speech while listening, or ``None`` to compare their energy with ``energy_threshold``
+        self.noise_floor_tracker = None  # ``NoiseFloorTracker`` that continuously sets ``energy_threshold`` while listening (replacing ``dynamic_energy_threshold``), or ``None`` to disable
+        self.audio_encoder = None  # encoder name or ``speech_recognition.encoders.AudioEncoder`` for backends that accept several formats, or ``None`` to let each backend pick the cheapest encoder for its preferred format
+        self.transport = None  # ``speech_recognition.transport.HTTPTransport`` that API requests are sent through (reusing connections), or ``None`` to open a new connection per request with ``urlopen``
+        self.async_transport = None  # ``speech_recognition.aio.AsyncHTTPTransport`` used by the ``recognize_*_async`` coroutines, created on first use if ``None``
+        self.on_timing = None  # called as ``on_timing(stage, seconds)`` after the stages of a recognition request (``"encode"``, ``"request"``) where the backend reports them, or ``None``
+
+    def _urlopen(self, request, timeout):
+        """Sends an API request through ``self.transport`` if one is set, or with ``urlopen`` otherwise."""
+        if self.transport is not None:
+            return self.transport.open(request, timeout=timeout)
+        return urlopen(request, timeout=timeout)
+
+    def _energy_reader(self, source):
+        """Returns the ``EnergyReader`` for ``source``, which must be used for every read so that buffers read ahead in blocks are not skipped."""
+        try:
+            reader = self._energy_readers.get(source.stream)
+        except TypeError:  # the stream can't be weakly referenced, so it can't be read ahead either
+            return EnergyReader(source.stream, source.CHUNK, source.SAMPLE_WIDTH)
+        if reader is None:
+            reader = self._energy_readers[source.stream] = EnergyReader(source.stream, source.CHUNK, source.SAMPLE_WIDTH)
+        reader.block_size = self.energy_block_size
+        return reader
+
     def record(self, source, duration=None, offset=None):
         """
         Records up to ``duration`` seconds of audio from ``source`` (an ``AudioSource`` instance) starting at ``offset`` (or at the beginning if not specified) into an ``AudioData`` instance, which it returns.
@@ -344,6 +374,7 @@ class Recognizer(AudioSource):
         assert isinstance(source, AudioSource), "Source must be an audio source"
         assert source.stream is not None, "Audio source must be entered before recording, see documentation for ``AudioSource``; are you using ``source`` outside of a ``with`` statement?"
 
+        reader = self._energy_reader(source)
         frames = io.BytesIO()
         seconds_per_buffer = (source.CHUNK + 0.0) / source.SAMPLE_RATE
         elapsed_time = 0
@@ -355,7 +386,7 @@ class Recognizer(AudioSource):
                 if offset_time > offset:
                     offset_reached = True
 
-            buffer = source.stream.read(source.CHUNK)
+            buffer = reader.read()
             if len(buffer) == 0: break
 
             if offset_reached or not offset:
@@ -380,6 +411,7 @@ class Recognizer(AudioSource):
         assert source.stream is not None, "Audio source must be entered before adjusting, see documentation for ``AudioSource``; are you using ``source`` outside of a ``with`` statement?"
         assert self.pause_threshold >= self.non_speaking_duration >= 0
 
+        reader = self._energy_reader(source)
         seconds_per_buffer = (source.CHUNK + 0.0) / source.SAMPLE_RATE
         elapsed_time = 0
 
@@ -387,14 +419,57 @@ class Recognizer(AudioSource):
         while True:
             elapsed_time += seconds_per_buffer
             if elapsed_time > duration: break
-            buffer = source.stream.read(source.CHUNK)
-            energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
+            buffer, energy = reader.read_with_energy()  # energy of the audio signal
 
             # dynamically adjust the energy threshold using asymmetric weighted average
             damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
             target_energy = energy * self.dynamic_energy_ratio
             self.energy_threshold = self.energy_threshold * damping + target_energy * (1 - damping)
 
+    def calibrate_noise_floor(self, source, duration=1, tracker=None):
+        """
+        Enables continuous noise floor tracking, calibrating it with up to ``duration`` seconds of audio from ``source`` (an ``AudioSource`` instance).
+
+        This is the warmup phase of ``recognizer_instance.noise_floor_tracker``, and should be done once at the start of a session, on a period of audio without speech. After that, every buffer read by ``recognizer_instance.listen`` keeps the noise floor up to date, so there is no need to call ``recognizer_instance.adjust_for_ambient_noise`` (which discards the audio it reads) between phrases.
+
+        If ``tracker`` is given, it is used as the ``NoiseFloorTracker`` instance; otherwise the existing ``recognizer_instance.noise_floor_tracker`` is used, or a new one is created with a ratio of ``recognizer_instance.dynamic_energy_ratio``. If ``duration`` is 0, no audio is read and the tracker calibrates itself from the first buffers it sees.
+
+        Returns the calibrated energy threshold.
+        """
+        assert isinstance(source, AudioSource), "Source must be an audio source"
+        assert source.stream is not None, "Audio source must be entered before calibrating, see documentation for ``AudioSource``; are you using ``source`` outside of a ``with`` statement?"
+
+        if tracker is not None:
+            self.noise_floor_tracker = tracker
+        elif self.noise_floor_tracker is None:
+            self.noise_floor_tracker = NoiseFloorTracker(ratio=self.dynamic_energy_ratio)
+
+        reader = self._energy_reader(source)
+        seconds_per_buffer = (source.CHUNK + 0.0) / source.SAMPLE_RATE
+        energies = []
+        elapsed_time = seconds_per_buffer
+        while elapsed_time <= duration:
+            buffer, energy = reader.read_with_energy()
+            if len(buffer) == 0: break  # reached end of the stream
+            energies.append(energy)
+            elapsed_time += seconds_per_buffer
+
+        threshold = self.noise_floor_tracker.calibrate(energies, seconds_per_buffer)
+        if threshold is not None:
+            self.energy_threshold = threshold
+        return self.energy_threshold
+
+    @property
+    def threshold_state(self):
+        """A dictionary describing the current energy threshold and, when noise floor tracking is enabled, the state of ``recognizer_instance.noise_floor_tracker``."""
+        state = {
+            "energy_threshold": self.energy_threshold,
+            "mode": "noise_floor" if self.noise_floor_tracker is not None else ("dynamic" if self.dynamic_energy_threshold else "fixed"),
+        }
+        if self.noise_floor_tracker is not None:
+            state.update(self.noise_floor_tracker.state())
+        return state
+
     def snowboy_wait_for_hot_word(self, snowboy_location, snowboy_hot_word_files, source, timeout=None):
         # load snowboy library (NOT THREAD SAFE)
         sys.path.append(snowboy_location)
@@ -409,6 +484,7 @@ class Recognizer(AudioSource):
         detector.SetSensitivity(",".join(["0.4"] * len(snowboy_hot_word_files)).encode())
         snowboy_sample_rate = detector.SampleRate()
 
+        reader = self._energy_reader(source)
         elapsed_time = 0
         seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
         resampling_state = None
@@ -427,12 +503,12 @@ class Recognizer(AudioSource):
             if timeout and elapsed_time > timeout:
                 raise WaitTimeoutError("listening timed out while waiting for hotword to be said")
 
-            buffer = source.stream.read(source.CHUNK)
+            buffer = reader.read()
             if len(buffer) == 0: break  # reached end of the stream
             frames.append(buffer)
 
             # resample audio to the required sample rate
-            resampled_buffer, resampling_state = audioop.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
+            resampled_buffer, resampling_state = dsp.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
             resampled_frames.append(resampled_buffer)
             if time.time() - last_check > check_interval:
                 # run Snowboy on the resampled audio
@@ -444,6 +520,17 @@ class Recognizer(AudioSource):
 
         return b"".join(frames), elapsed_time
 
+    def _is_speech(self, buffer, source, energy, in_phrase=False):
+        """
+        Returns whether a buffer read from ``source`` is speech, according to ``self.vad`` if one is set, or to the energy threshold otherwise.
+
+        With ``self.vad``, only the detector can start a phrase. Within a phrase (``in_phrase``), a buffer above the energy threshold also continues it, as it would without a detector, so typing or music between sentences doesn't split a phrase that the energy threshold keeps whole.
+        """
+        if self.vad is not None:
+            is_speech = self.vad.is_speech(buffer, source.SAMPLE_RATE, source.SAMPLE_WIDTH, energy)
+            return is_speech or (in_phrase and energy > self.energy_threshold)
+        return energy > self.energy_threshold
+
     def listen(self, source, timeout=None, phrase_time_limit=None, snowboy_configuration=None, stream=False):
         """
         Records a single phrase from ``source`` (an ``AudioSource`` instance) into an ``AudioData`` instance, which it returns.
@@ -452,6 +539,8 @@ class Recognizer(AudioSource):
 
         This is done by waiting until the audio has an energy above ``recognizer_instance.energy_threshold`` (the user has started speaking), and then recording until it encounters ``recognizer_instance.pause_threshold`` seconds of non-speaking or there is no more audio input. The ending silence is not included.
 
+        If ``recognizer_instance.vad`` is set to a ``speech_recognition.vad.VoiceActivityDetector`` (such as ``speech_recognition.SpectralVAD``), it decides which audio is speaking instead of the energy threshold, so that loud audio that isn't speech doesn't start a phrase. Once a phrase has started, audio above the energy threshold also continues it, so typing or music between sentences doesn't split it into several phrases.
+
         The ``timeout`` parameter is the maximum number of seconds that this will wait for a phrase to start before giving up and throwing an ``speech_recognition.WaitTimeoutError`` exception. If ``timeout`` is ``None``, there will be no wait timeout.
 
         The ``phrase_time_limit`` parameter is the maximum number of seconds that this will allow a phrase to continue before stopping and returning the part of the phrase processed before the time limit was reached. The resulting audio will be the phrase cut off at the time limit. If ``phrase_timeout`` is ``None``, there will be no phrase time limit.
@@ -475,6 +564,7 @@ class Recognizer(AudioSource):
             for hot_word_file in snowboy_configuration[1]:
                 assert os.path.isfile(hot_word_file), "``snowboy_configuration[1]`` must be a list of Snowboy hot word configuration files"
 
+        reader = self._energy_reader(source)
         seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
         pause_buffer_count = int(math.ceil(self.pause_threshold / seconds_per_buffer))  # number of buffers of non-speaking audio during a phrase, before the phrase should be considered complete
         phrase_buffer_count = int(math.ceil(self.phrase_threshold / seconds_per_buffer))  # minimum number of buffers of speaking audio before we consider the speaking audio a phrase
@@ -494,18 +584,22 @@ class Recognizer(AudioSource):
                     if timeout and elapsed_time > timeout:
                         raise WaitTimeoutError("listening timed out while waiting for phrase to start")
 
-                    buffer = source.stream.read(source.CHUNK)
+                    buffer, energy = reader.read_with_energy()  # energy of the audio signal
                     if len(buffer) == 0: break  # reached end of the stream
                     frames.append(buffer)
                     if len(frames) > non_speaking_buffer_count:  # ensure we only keep the needed amount of non-speaking buffers
                         frames.popleft()
 
                     # detect whether speaking has started on audio input
-                    energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
-                    if energy > self.energy_threshold: break
+                    if self._is_speech(buffer, source, energy):
+                        if self.noise_floor_tracker is not None:
+                            self.energy_threshold = self.noise_floor_tracker.update(energy, seconds_per_buffer, True)
+                        break
 
                     # dynamically adjust the energy threshold using asymmetric weighted average
-                    if self.dynamic_energy_threshold:
+                    if self.noise_floor_tracker is not None:
+                        self.energy_threshold = self.noise_floor_tracker.update(energy, seconds_per_buffer, False)
+                    elif self.dynamic_energy_threshold:
                         damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
                         target_energy = energy * self.dynamic_energy_ratio
                         self.energy_threshold = self.energy_threshold * damping + target_energy * (1 - damping)
@@ -532,22 +626,24 @@ class Recognizer(AudioSource):
                 if phrase_time_limit and elapsed_time - phrase_start_time > phrase_time_limit:
                     break
 
-                buffer = source.stream.read(source.CHUNK)
+                buffer, energy = reader.read_with_energy()  # unit energy of the audio signal within the buffer
                 if len(buffer) == 0: break  # reached end of the stream
                 frames.append(buffer)
                 phrase_count += 1
 
                 # check if speaking has stopped for longer than the pause threshold on the audio input
-                energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # unit energy of the audio signal within the buffer
-                if energy > self.energy_threshold:
+                is_speech = self._is_speech(buffer, source, energy, in_phrase=True)
+                if is_speech:
                     pause_count = 0
                 else:
                     pause_count += 1
+                if self.noise_floor_tracker is not None:  # the tracker sees every buffer, including the one that ends the phrase
+                    self.energy_threshold = self.noise_floor_tracker.update(energy, seconds_per_buffer, is_speech)
                 if pause_count > pause_buffer_count:  # end of the phrase
                     break
 
                 # dynamically adjust the energy threshold using asymmetric weighted average
-                if self.dynamic_energy_threshold:
+                if self.noise_floor_tracker is None and self.dynamic_energy_threshold:
                     damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
                     target_energy = energy * self.dynamic_energy_ratio
                     self.energy_threshold = self.energy_threshold * damping + target_energy * (1 - damping)
@@ -578,7 +674,7 @@ class Recognizer(AudioSource):
 
         Returns a function object that, when called, requests that the background listener thread stop. The background thread is a daemon and will not stop the program from exiting if there are no other non-daemon threads. The function accepts one parameter, ``wait_for_stop``: if truthy, the function will wait for the background listener to stop before returning, otherwise it will return immediately and the background listener thread might still be running for a second or two afterwards. Additionally, if you are using a truthy value for ``wait_for_stop``, you must call the function from the same thread you originally called ``listen_in_background`` from.
 
-        Phrase recognition uses the exact same mechanism as ``recognizer_instance.listen(source)``. The ``phrase_time_limit`` parameter works in the same way as the ``phrase_time_limit`` parameter for ``recognizer_instance.listen(source)``, as well.
+        Phrase recognition uses the exact same mechanism as ``recognizer_instance.listen(source)``, including ``recognizer_instance.vad``. The ``phrase_time_limit`` parameter works in the same way as the ``phrase_time_limit`` parameter for ``recognizer_instance.listen(source)``, as well.
 
         The ``callback`` parameter is a function that should accept two parameters - the ``recognizer_instance``, and an ``AudioData`` instance representing the captured audio. Note that ``callback`` function will be called from a non-main thread.
         """
@@ -794,7 +890,7 @@ class Recognizer(AudioSource):
         url = "https://api.wit.ai/speech?v=20170307"
         request = Request(url, data=wav_data, headers={"Authorization": "Bearer {}".format(key), "Content-Type": "audio/wav"})
         try:
-            response = urlopen(request, timeout=self.operation_timeout)
+            response = self._urlopen(request, timeout=self.operation_timeout)
         except HTTPError as e:
             raise RequestError("recognition request failed: {}".format(e.reason))
         except URLError as e:
@@ -849,7 +945,7 @@ class Recognizer(AudioSource):
                 start_time = monotonic()
 
             try:
-                credential_response = urlopen(credential_request, timeout=60)  # credential response can take longer, use longer timeout instead of default one
+                credential_response = self._urlopen(credential_request, timeout=60)  # credential response can take longer, use longer timeout instead of default one
             except HTTPError as e:
                 raise RequestError("credential request failed: {}".format(e.reason))
             except URLError as e:
@@ -888,7 +984,7 @@ class Recognizer(AudioSource):
             })
 
         try:
-            response = urlopen(request, timeout=self.operation_timeout)
+            response = self._urlopen(request, timeout=self.operation_timeout)
         except HTTPError as e:
             raise RequestError("recognition request failed: {}".format(e.reason))
         except URLError as e:
@@ -943,7 +1039,7 @@ class Recognizer(AudioSource):
                 start_time = monotonic()
 
             try:
-                credential_response = urlopen(credential_request, timeout=60)  # credential response can take longer, use longer timeout instead of default one
+                credential_response = self._urlopen(credential_request, timeout=60)  # credential response can take longer, use longer timeout instead of default one
             except HTTPError as e:
                 raise RequestError("credential request failed: {}".format(e.reason))
             except URLError as e:
@@ -982,7 +1078,7 @@ class Recognizer(AudioSource):
             })
 
         try:
-            response = urlopen(request, timeout=self.operation_timeout)
+            response = self._urlopen(request, timeout=self.operation_timeout)
         except HTTPError as e:
             raise RequestError("recognition request failed: {}".format(e.reason))
         except URLError as e:
@@ -1068,7 +1164,7 @@ class Recognizer(AudioSource):
             "Hound-Client-Authentication": "{};{};{}".format(client_id, request_time, request_signature)
         })
         try:
-            response = urlopen(request, timeout=self.operation_timeout)
+            response = self._urlopen(request, timeout=self.operation_timeout)
         except HTTPError as e:
             raise RequestError("recognition request failed: {}".format(e.reason))
         except URLError as e:
@@ -1342,7 +1438,7 @@ class Recognizer(AudioSource):
         authorization_value = base64.standard_b64encode("{}:{}".format(username, password).encode("utf-8")).decode("utf-8")
         request.add_header("Authorization", "Basic {}".format(authorization_value))
         try:
-            response = urlopen(request, timeout=self.operation_timeout)
+            response = self._urlopen(request, timeout=self.operation_timeout)
         except HTTPError as e:
             raise RequestError("recognition request failed: {}".format(e.reason))
         except URLError as e:
@@ -1515,6 +1611,11 @@ except (ModuleNotFoundError, ImportError):
 else:
     Recognizer.recognize_google = google.recognize_legacy
     Recognizer.recognize_whisper_api = whisper.recognize_whisper_api
+    Recognizer.recognize_google_async = google.recognize_legacy_async
+    Recognizer.recognize_whisper_api_async = whisper.recognize_whisper_api_async
+
+Recognizer.alisten = aio.alisten
+Recognizer.recognize_http_async = aio.recognize_http_async
 
 
 # ===============================
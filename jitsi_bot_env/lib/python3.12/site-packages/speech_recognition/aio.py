@@ -0,0 +1,283 @@
+"""
+Asyncio support: a non-blocking HTTP transport and the coroutines behind ``recognizer_instance.recognize_*_async`` and ``recognizer_instance.alisten``.
+
+The coroutine backends send their requests through an ``AsyncHTTPTransport``, so any number of phrases can be in flight on one event loop without a thread per request. Encoding the audio is CPU work, so it runs in the event loop's default executor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import http.client
+import io
+import json
+import ssl
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import Request
+
+from .audio import AudioData
+from .encoders import get_encoder
+from .exceptions import RequestError, UnknownValueError, WaitTimeoutError
+from .transport import RETRY_STATUSES, HTTPTransport, TransportResponse, _pool_key, _unpack_request
+
+
+class _AsyncHostPool(object):
+    """Idle keep-alive connections to one endpoint, and a semaphore bounding the number of connections open to it."""
+
+    def __init__(self, max_connections):
+        self.idle = []  # list of ((reader, writer), time it was returned to the pool), most recently used last
+        self.slots = asyncio.Semaphore(max_connections)
+
+
+class AsyncHTTPTransport(HTTPTransport):
+    """
+    The coroutine counterpart of ``HTTPTransport``: persistent HTTP/1.1 connections pooled per endpoint, bounded concurrency, retries with backoff and per-request timings, using asyncio streams.
+
+    ``max_concurrency`` is the semaphore bounding the number of requests in flight across every coroutine using the transport. ``timeout`` bounds each attempt of a request as a whole; an attempt that times out or is cancelled closes its connection instead of returning it to the pool.
+
+    A transport must only be used from one event loop.
+    """
+
+    def __init__(self, max_connections_per_host=8, max_concurrency=32, retries=2, backoff=0.25, backoff_max=4, retry_statuses=RETRY_STATUSES, idle_timeout=60, history_size=1000):
+        super().__init__(max_connections_per_host, max_concurrency, retries, backoff, backoff_max, retry_statuses, idle_timeout, history_size)
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self._ssl_context = None
+
+    async def open(self, request, timeout=None):
+        """Sends ``request`` (a ``urllib.request.Request`` instance) and returns a ``TransportResponse``. Raises ``HTTPError`` for unsuccessful HTTP statuses and ``URLError`` for connection failures and timeouts."""
+        return await self.request(*_unpack_request(request), timeout=timeout)
+
+    async def request(self, method, url, body=None, headers=None, timeout=None):
+        """Sends an HTTP request to ``url`` and returns a ``TransportResponse``. Raises ``HTTPError`` for unsuccessful HTTP statuses and ``URLError`` for connection failures and timeouts."""
+        key, path = _pool_key(url)
+        headers = headers or {}
+
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _AsyncHostPool(self.max_connections_per_host)
+
+        attempt = 0
+        async with self._concurrency:
+            while True:
+                try:
+                    response = await asyncio.wait_for(self._send(key, pool, method, path, body, headers), timeout)
+                except asyncio.TimeoutError:
+                    error = "timed out"
+                except (OSError, http.client.HTTPException, asyncio.IncompleteReadError, ValueError) as e:
+                    error = e
+                else:
+                    response.url = url
+                    response.timing["attempts"] = attempt + 1
+                    if response.status not in self.retry_statuses or attempt >= self.retries:
+                        self._record(response.timing, error=response.status >= 400)
+                        if response.status >= 400:
+                            raise HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(response.read()))
+                        return response
+                    error = None
+
+                if attempt >= self.retries:
+                    self._record(None, error=True)
+                    raise URLError(error if isinstance(error, OSError) else str(error))
+                self._count("retries")
+                await asyncio.sleep(self._backoff_delay(attempt))
+                attempt += 1
+
+    async def _send(self, key, pool, method, path, body, headers):
+        """Sends one attempt of a request over a pooled connection, and returns the fully read response."""
+        scheme, host, port = key
+        default_port = 443 if scheme == "https" else 80
+        lines = ["{} {} HTTP/1.1".format(method, path), "Host: {}".format(host if port == default_port else "{}:{}".format(host, port))]
+        if body is not None or method in ("POST", "PUT"):
+            lines.append("Content-Length: {}".format(len(body or b"")))
+        lines.extend("{}: {}".format(name, value) for name, value in headers.items() if name.lower() not in ("host", "content-length", "connection"))
+        request_data = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+        async with pool.slots:
+            started = time.perf_counter()
+            (reader, writer), reused = await self._checkout(key, pool)
+            try:
+                connected = time.perf_counter()
+                try:
+                    writer.write(request_data)
+                    await writer.drain()
+                    status_line = await reader.readline()
+                    if not status_line:
+                        raise http.client.RemoteDisconnected("remote end closed connection without response")
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    if not reused:
+                        raise
+                    # the server closed the idle connection before we used it, try again on a new one
+                    writer.close()
+                    (reader, writer), reused = await self._connect(key), False
+                    connected = time.perf_counter()
+                    writer.write(request_data)
+                    await writer.drain()
+                    status_line = await reader.readline()
+                    if not status_line:
+                        raise http.client.RemoteDisconnected("remote end closed connection without response")
+
+                version, status, reason = _parse_status_line(status_line)
+                header_lines = [status_line]
+                while True:
+                    line = await reader.readline()
+                    header_lines.append(line)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                response_headers = http.client.parse_headers(io.BytesIO(b"".join(header_lines[1:])))
+                responded = time.perf_counter()
+
+                will_close = version == "HTTP/1.0" or response_headers.get("Connection", "").lower() == "close"
+                if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+                    data = b""
+                elif response_headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    data = await _read_chunked(reader)
+                elif response_headers.get("Content-Length") is not None:
+                    data = await reader.readexactly(int(response_headers["Content-Length"]))
+                else:
+                    data, will_close = await reader.read(), True  # the body ends when the server closes the connection
+                finished = time.perf_counter()
+            except BaseException:  # including cancellation and timeouts, which leave the connection in an unknown state
+                writer.close()
+                raise
+
+            if will_close:
+                writer.close()
+            else:
+                pool.idle.append(((reader, writer), time.monotonic()))
+
+        timing = {
+            "connect": connected - started,
+            "wait": responded - connected,
+            "read": finished - responded,
+            "total": finished - started,
+            "reused": reused,
+        }
+        return TransportResponse(None, status, reason, response_headers, data, timing)
+
+    async def _checkout(self, key, pool):
+        """Returns an idle connection to the endpoint if a fresh enough one exists, or a new connection otherwise, as a ``((reader, writer), reused)`` tuple."""
+        now = time.monotonic()
+        while pool.idle:
+            (reader, writer), returned = pool.idle.pop()
+            if (self.idle_timeout is not None and now - returned > self.idle_timeout) or reader.at_eof():
+                writer.close()
+                continue
+            self._count("connections_reused")
+            return (reader, writer), True
+        return await self._connect(key), False
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        connection = await asyncio.open_connection(host, port, ssl=ssl_context)
+        self._count("connections_opened")
+        return connection
+
+    def close(self):
+        """Closes every idle connection. The transport can still be used afterwards; new connections are opened as needed."""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for (reader, writer), _ in pool.idle:
+                writer.close()
+
+
+def _parse_status_line(line):
+    """Returns the ``(version, status, reason)`` of an HTTP status line."""
+    parts = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise http.client.BadStatusLine(line)
+    return parts[0], int(parts[1]), parts[2] if len(parts) > 2 else ""
+
+
+async def _read_chunked(reader):
+    """Reads a body sent with chunked transfer encoding, including the trailers."""
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            break
+        chunks.append(await reader.readexactly(size))
+        await reader.readline()  # CRLF after the chunk
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # trailers
+        pass
+    return b"".join(chunks)
+
+
+async def encode_async(encoder, audio_data, convert_rate=None, convert_width=None):
+    """Encodes ``audio_data`` with ``encoder`` (an ``AudioEncoder`` instance) in the event loop's default executor, so that the encoding doesn't block the loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, encoder.encode_audio, audio_data, convert_rate, convert_width)
+
+
+async def send_async(recognizer, request):
+    """Sends ``request`` through ``recognizer.async_transport`` (created on first use) with ``recognizer.operation_timeout``, and returns the response body as text. Raises ``speech_recognition.RequestError`` if the request fails or times out."""
+    if recognizer.async_transport is None:
+        recognizer.async_transport = AsyncHTTPTransport()
+    try:
+        response = await recognizer.async_transport.open(request, timeout=recognizer.operation_timeout)
+    except HTTPError as e:
+        raise RequestError("recognition request failed: {}".format(e.reason))
+    except URLError as e:
+        raise RequestError("recognition connection failed: {}".format(e.reason))
+    return response.read().decode("utf-8")
+
+
+async def recognize_http_async(recognizer, audio_data, url, *, headers=None, encoder="wav", convert_rate=None, convert_width=2, result_key="text", show_all=False):
+    """
+    Performs speech recognition on ``audio_data`` (an ``AudioData`` instance) by POSTing the audio to ``url`` and parsing the JSON response, for any HTTP backend that works this way.
+
+    The audio is encoded with ``encoder`` (an encoder name from ``speech_recognition.encoders.ENCODERS`` or an ``AudioEncoder`` instance, a WAV file by default) after converting it to ``convert_rate`` and ``convert_width`` (16-bit by default), and sent with the encoder's content type and the extra ``headers``.
+
+    Returns the ``result_key`` field of the JSON response if ``show_all`` is false (the default). Otherwise, returns the whole JSON response.
+
+    Raises a ``speech_recognition.UnknownValueError`` exception if the response has no transcription. Raises a ``speech_recognition.RequestError`` exception if the request failed, timed out, or if the response is not JSON.
+    """
+    assert isinstance(audio_data, AudioData), "Data must be audio data"
+    encoder = get_encoder(encoder)
+    data = await encode_async(encoder, audio_data, convert_rate, convert_width)
+    request_headers = {"Content-Type": encoder.content_type(convert_rate or audio_data.sample_rate)}
+    request_headers.update(headers or {})
+    response_text = await send_async(recognizer, Request(url, data=data, headers=request_headers))
+    try:
+        result = json.loads(response_text)
+    except ValueError:
+        raise RequestError("recognition response is not valid JSON")
+
+    if show_all:
+        return result
+    if not isinstance(result, dict) or not result.get(result_key):
+        raise UnknownValueError()
+    return result[result_key]
+
+
+async def alisten(recognizer, source, timeout=None, phrase_time_limit=None, poll_interval=1):
+    """
+    Asynchronously yields phrases from ``source`` (an ``AudioSource`` instance, already entered) as ``AudioData`` instances, like calling ``recognizer_instance.listen`` in a loop, until the source runs out of audio.
+
+    Audio sources are read with blocking calls, so listening runs on one dedicated thread per call; the event loop is free while waiting for a phrase. Listening stops within ``poll_interval`` seconds when the consumer stops iterating or the task is cancelled, unless a phrase is being recorded, which is then completed and discarded.
+
+    ``timeout`` and ``phrase_time_limit`` have the same meaning as in ``listen``: a ``speech_recognition.WaitTimeoutError`` exception is raised if no phrase starts within ``timeout`` seconds of the previous one.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="alisten")
+    try:
+        waited = 0
+        while True:
+            wait = poll_interval if timeout is None else min(poll_interval, timeout - waited)
+            try:
+                audio = await asyncio.wrap_future(executor.submit(recognizer.listen, source, wait, phrase_time_limit))
+            except WaitTimeoutError:
+                waited += wait
+                if timeout is not None and waited >= timeout:
+                    raise
+                continue
+            if len(audio.frame_data) == 0:
+                return  # reached the end of the stream
+            waited = 0
+            yield audio
+    finally:
+        executor.shutdown(wait=False)
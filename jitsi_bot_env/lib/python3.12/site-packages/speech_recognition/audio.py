@@ -1,40 +1,89 @@
 import aifc
-import audioop
+import collections
 import io
 import os
 import platform
 import stat
-import subprocess
 import sys
+import threading
 import wave
 
+from . import dsp
+from .encoders import get_encoder
+from .resample import resample
+
 
 class AudioData(object):
     """
     Creates a new ``AudioData`` instance, which represents mono audio data.
 
-    The raw audio data is specified by ``frame_data``, which is a sequence of bytes representing audio samples. This is the frame data structure used by the PCM WAV format.
+    The raw audio data is specified by ``frame_data``, which is a sequence of bytes representing audio samples. This is the frame data structure used by the PCM WAV format. Besides ``bytes``, it may be any object supporting the buffer protocol, such as a ``bytearray`` or a ``memoryview``, which is used without copying it; it must not be modified afterwards.
 
     The width of each sample, in bytes, is specified by ``sample_width``. Each group of ``sample_width`` bytes represents a single audio sample.
 
     The audio data is assumed to have a sample rate of ``sample_rate`` samples per second (Hertz).
 
     Usually, instances of this class are obtained from ``recognizer_instance.record`` or ``recognizer_instance.listen``, or in the callback for ``recognizer_instance.listen_in_background``, rather than instantiating them directly.
+
+    The results of ``get_raw_data``, ``get_wav_data``, ``get_aiff_data`` and ``get_flac_data`` are cached per format, sample rate and sample width, so sending the same audio to several recognizers (or also archiving it) converts it only once. At most ``conversion_cache_size`` results are kept, the least recently used ones being dropped first; set it to 0 to disable the cache.
     """
 
+    conversion_cache_size = 4  # most conversion results kept per instance
+
     def __init__(self, frame_data, sample_rate, sample_width):
         assert sample_rate > 0, "Sample rate must be a positive integer"
         assert (
             sample_width % 1 == 0 and 1 <= sample_width <= 4
         ), "Sample width must be between 1 and 4 inclusive"
+        self._conversions_lock = threading.Lock()
         self.frame_data = frame_data
         self.sample_rate = sample_rate
         self.sample_width = int(sample_width)
 
+    @property
+    def frame_data(self):
+        """The raw audio data, as ``bytes``. If the instance was created from another kind of buffer (such as by ``get_segment``), it is copied into ``bytes`` the first time this is read; use ``frame_view`` to read it without copying."""
+        if self._frame_bytes is None:
+            self._frame_bytes = self._frame_view.tobytes()
+        return self._frame_bytes
+
+    @frame_data.setter
+    def frame_data(self, frame_data):
+        self._frame_view = memoryview(frame_data).cast("B").toreadonly()
+        self._frame_bytes = frame_data if isinstance(frame_data, bytes) else None
+        with self._conversions_lock:
+            self._conversions = collections.OrderedDict()  # conversion results by format, sample rate and sample width, least recently used first
+
+    @property
+    def frame_view(self):
+        """The raw audio data, as a read-only ``memoryview`` of the buffer the instance was created from."""
+        return self._frame_view
+
+    def _output_width(self, convert_width):
+        """Returns the sample width of the converted audio, as part of a conversion cache key. Without ``convert_width``, 8-bit audio comes out signed, unlike the unsigned frame data, so it is keyed as ``None`` rather than 1."""
+        if convert_width is None:
+            return None if self.sample_width == 1 else self.sample_width
+        return convert_width
+
+    def _cached(self, key, convert):
+        """Returns the conversion result cached under ``key``, or calls ``convert`` to compute and cache it."""
+        with self._conversions_lock:
+            if key in self._conversions:
+                self._conversions.move_to_end(key)
+                return self._conversions[key]
+        result = convert()  # converted outside the lock, so that other conversions of the same audio can run meanwhile
+        with self._conversions_lock:
+            self._conversions[key] = result
+            while len(self._conversions) > self.conversion_cache_size:
+                self._conversions.popitem(last=False)
+        return result
+
     def get_segment(self, start_ms=None, end_ms=None):
         """
         Returns a new ``AudioData`` instance, trimmed to a given time interval. In other words, an ``AudioData`` instance with the same audio data except starting at ``start_ms`` milliseconds in and ending ``end_ms`` milliseconds in.
 
+        The new instance is a view of the audio data of this one, which isn't copied.
+
         If not specified, ``start_ms`` defaults to the beginning of the audio, and ``end_ms`` defaults to the end.
         """
         assert (
@@ -50,13 +99,13 @@ class AudioData(object):
                 (start_ms * self.sample_rate * self.sample_width) // 1000
             )
         if end_ms is None:
-            end_byte = len(self.frame_data)
+            end_byte = len(self._frame_view)
         else:
             end_byte = int(
                 (end_ms * self.sample_rate * self.sample_width) // 1000
             )
         return AudioData(
-            self.frame_data[start_byte:end_byte],
+            self._frame_view[start_byte:end_byte],
             self.sample_rate,
             self.sample_width,
         )
@@ -65,7 +114,7 @@ class AudioData(object):
         """
         Returns a byte string representing the raw frame data for the audio represented by the ``AudioData`` instance.
 
-        If ``convert_rate`` is specified and the audio sample rate is not ``convert_rate`` Hz, the resulting audio is resampled to match.
+        If ``convert_rate`` is specified and the audio sample rate is not ``convert_rate`` Hz, the resulting audio is resampled to match, with ``speech_recognition.resample.resample``. To avoid resampling every phrase again for every recognizer, an audio source can convert its audio as it is captured instead (see the ``convert_rate`` parameter of ``Microphone`` and ``AudioFile``).
 
         If ``convert_width`` is specified and the audio samples are not ``convert_width`` bytes each, the resulting audio is converted to match.
 
@@ -78,56 +127,37 @@ class AudioData(object):
             convert_width % 1 == 0 and 1 <= convert_width <= 4
         ), "Sample width to convert to must be between 1 and 4 inclusive"
 
-        raw_data = self.frame_data
+        if convert_rate in (None, self.sample_rate) and self._output_width(convert_width) == self.sample_width:
+            return self.frame_data
+        return self._cached(
+            ("raw", convert_rate or self.sample_rate, self._output_width(convert_width)),
+            lambda: self._convert_raw_data(convert_rate, convert_width),
+        )
+
+    def _convert_raw_data(self, convert_rate, convert_width):
+        raw_data = self._frame_view
 
         # make sure unsigned 8-bit audio (which uses unsigned samples) is handled like higher sample width audio (which uses signed samples)
         if self.sample_width == 1:
-            raw_data = audioop.bias(
+            raw_data = dsp.bias(
                 raw_data, 1, -128
             )  # subtract 128 from every sample to make them act like signed samples
 
         # resample audio at the desired rate if specified
         if convert_rate is not None and self.sample_rate != convert_rate:
-            raw_data, _ = audioop.ratecv(
-                raw_data,
-                self.sample_width,
-                1,
-                self.sample_rate,
-                convert_rate,
-                None,
+            raw_data = resample(
+                raw_data, self.sample_width, self.sample_rate, convert_rate
             )
 
         # convert samples to desired sample width if specified
         if convert_width is not None and self.sample_width != convert_width:
-            if (
-                convert_width == 3
-            ):  # we're converting the audio into 24-bit (workaround for https://bugs.python.org/issue12866)
-                raw_data = audioop.lin2lin(
-                    raw_data, self.sample_width, 4
-                )  # convert audio into 32-bit first, which is always supported
-                try:
-                    audioop.bias(
-                        b"", 3, 0
-                    )  # test whether 24-bit audio is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
-                except (
-                    audioop.error
-                ):  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
-                    raw_data = b"".join(
-                        raw_data[i + 1: i + 4]
-                        for i in range(0, len(raw_data), 4)
-                    )  # since we're in little endian, we discard the first byte from each 32-bit sample to get a 24-bit sample
-                else:  # 24-bit audio fully supported, we don't need to shim anything
-                    raw_data = audioop.lin2lin(
-                        raw_data, self.sample_width, convert_width
-                    )
-            else:
-                raw_data = audioop.lin2lin(
-                    raw_data, self.sample_width, convert_width
-                )
+            raw_data = dsp.lin2lin(
+                raw_data, self.sample_width, convert_width
+            )
 
         # if the output is 8-bit audio with unsigned samples, convert the samples we've been treating as signed to unsigned again
         if convert_width == 1:
-            raw_data = audioop.bias(
+            raw_data = dsp.bias(
                 raw_data, 1, 128
             )  # add 128 to every sample to make them act like unsigned samples again
 
@@ -143,6 +173,12 @@ class AudioData(object):
 
         Writing these bytes directly to a file results in a valid `WAV file <https://en.wikipedia.org/wiki/WAV>`__.
         """
+        return self._cached(
+            ("wav", convert_rate or self.sample_rate, self._output_width(convert_width)),
+            lambda: self._convert_wav_data(convert_rate, convert_width),
+        )
+
+    def _convert_wav_data(self, convert_rate, convert_width):
         raw_data = self.get_raw_data(convert_rate, convert_width)
         sample_rate = (
             self.sample_rate if convert_rate is None else convert_rate
@@ -174,6 +210,12 @@ class AudioData(object):
 
         Writing these bytes directly to a file results in a valid `AIFF-C file <https://en.wikipedia.org/wiki/Audio_Interchange_File_Format>`__.
         """
+        return self._cached(
+            ("aiff", convert_rate or self.sample_rate, self._output_width(convert_width)),
+            lambda: self._convert_aiff_data(convert_rate, convert_width),
+        )
+
+    def _convert_aiff_data(self, convert_rate, convert_width):
         raw_data = self.get_raw_data(convert_rate, convert_width)
         sample_rate = (
             self.sample_rate if convert_rate is None else convert_rate
@@ -183,15 +225,7 @@ class AudioData(object):
         )
 
         # the AIFF format is big-endian, so we need to convert the little-endian raw data to big-endian
-        if hasattr(
-            audioop, "byteswap"
-        ):  # ``audioop.byteswap`` was only added in Python 3.4
-            raw_data = audioop.byteswap(raw_data, sample_width)
-        else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
-            raw_data = raw_data[sample_width - 1:: -1] + b"".join(
-                raw_data[i + sample_width: i: -1]
-                for i in range(sample_width - 1, len(raw_data), sample_width)
-            )
+        raw_data = dsp.byteswap(raw_data, sample_width)
 
         # generate the AIFF-C file contents
         with io.BytesIO() as aiff_file:
@@ -206,7 +240,7 @@ class AudioData(object):
                 aiff_writer.close()
         return aiff_data
 
-    def get_flac_data(self, convert_rate=None, convert_width=None):
+    def get_flac_data(self, convert_rate=None, convert_width=None, encoder=None, compression_level=None):
         """
         Returns a byte string representing the contents of a FLAC file containing the audio represented by the ``AudioData`` instance.
 
@@ -216,6 +250,8 @@ class AudioData(object):
 
         If ``convert_width`` is specified and the audio samples are not ``convert_width`` bytes each, the resulting audio is converted to match.
 
+        The FLAC data is produced by ``encoder``, which is either a FLAC ``speech_recognition.encoders.AudioEncoder`` instance or the name of one (``"flac"``, ``"flac-worker"`` or ``"flac-subprocess"``). By default, the in-process encoder is used; the ``flac`` command line utility is only run when ``"flac-subprocess"`` is asked for. ``compression_level`` goes from 0 to 8 (smallest) and defaults to the encoder's own level.
+
         Writing these bytes directly to a file results in a valid `FLAC file <https://en.wikipedia.org/wiki/FLAC>`__.
         """
         assert convert_width is None or (
@@ -227,35 +263,12 @@ class AudioData(object):
         ):  # resulting WAV data would be 32-bit, which is not convertable to FLAC using our encoder
             convert_width = 3  # the largest supported sample width is 24-bit, so we'll limit the sample width to that
 
-        # run the FLAC converter with the WAV data to get the FLAC data
-        wav_data = self.get_wav_data(convert_rate, convert_width)
-        flac_converter = get_flac_converter()
-        if (
-            os.name == "nt"
-        ):  # on Windows, specify that the process is to be started without showing a console window
-            startup_info = subprocess.STARTUPINFO()
-            startup_info.dwFlags |= (
-                subprocess.STARTF_USESHOWWINDOW
-            )  # specify that the wShowWindow field of `startup_info` contains a value
-            startup_info.wShowWindow = (
-                subprocess.SW_HIDE
-            )  # specify that the console window should be hidden
-        else:
-            startup_info = None  # default startupinfo
-        process = subprocess.Popen(
-            [
-                flac_converter,
-                "--stdout",
-                "--totally-silent",  # put the resulting FLAC file in stdout, and make sure it's not mixed with any program output
-                "--best",  # highest level of compression available
-                "-",  # the input FLAC file contents will be given in stdin
-            ],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            startupinfo=startup_info,
+        flac_encoder = get_encoder(encoder, compression_level)
+        assert flac_encoder.format == "flac", "``encoder`` must be a FLAC encoder"
+        return self._cached(
+            ("flac", convert_rate or self.sample_rate, self._output_width(convert_width), encoder, compression_level),
+            lambda: flac_encoder.encode_audio(self, convert_rate, convert_width),
         )
-        flac_data, stderr = process.communicate(wav_data)
-        return flac_data
 
 
 def get_flac_converter():
@@ -0,0 +1,428 @@
+"""
+Sample-level DSP operations on raw PCM audio, used instead of the ``audioop`` module (deprecated, and removed in Python 3.13).
+
+The operations take and return little-endian PCM fragments like ``audioop`` does: ``rms``, ``bias``, ``byteswap``, ``lin2lin``, ``tomono``, ``add`` and ``ratecv``. ``rms_blocks`` measures consecutive blocks of a fragment at once. As in ``audioop``, 8-bit samples are treated as signed; callers apply ``bias`` to convert from and to unsigned 8-bit audio.
+
+Two interchangeable backends implement them:
+
+* ``NumpyBackend`` processes a whole fragment with vectorized NumPy operations. It is the default when NumPy is installed.
+* ``PythonBackend`` is written in pure Python, using the ``array`` module where it can. It is the fallback when NumPy is not installed.
+
+Both return bit-identical results to ``audioop``, including the rounding of ``rms``, the truncation of ``lin2lin`` and ``tomono``, and the output and state of ``ratecv``, so a ``ratecv`` state can be passed between them.
+
+The module-level functions use the backend selected with ``set_backend``.
+"""
+
+from __future__ import annotations
+
+import array
+import math
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _check_width(width):
+    if width not in (1, 2, 3, 4):
+        raise ValueError("Size should be 1, 2, 3 or 4")
+
+
+def _check_fragment(fragment, width):
+    _check_width(width)
+    if len(fragment) % width != 0:
+        raise ValueError("not a whole number of frames")
+
+
+def _sample_bounds(width):
+    """Returns the smallest and the largest signed sample value of the given width."""
+    return -(1 << (8 * width - 1)), (1 << (8 * width - 1)) - 1
+
+
+def _reduced_rates(width, nchannels, inrate, outrate, weightA, weightB):
+    """Validates the parameters of ``ratecv`` and returns the rates and weights divided by their greatest common divisors, as ``audioop.ratecv`` does."""
+    _check_width(width)
+    if nchannels < 1:
+        raise ValueError("# of channels should be >= 1")
+    if weightA < 1 or weightB < 0:
+        raise ValueError("weightA should be >= 1, weightB should be >= 0")
+    if inrate <= 0 or outrate <= 0:
+        raise ValueError("sampling rate not > 0")
+    rate_divisor = math.gcd(inrate, outrate)
+    weight_divisor = math.gcd(weightA, weightB)
+    return inrate // rate_divisor, outrate // rate_divisor, weightA // weight_divisor, weightB // weight_divisor
+
+
+def _parse_ratecv_state(state, nchannels, outrate):
+    """Returns ``(d, [(previous_sample, current_sample), ...])`` from a ``ratecv`` state, or the initial values if ``state`` is ``None``."""
+    if state is None:
+        return -outrate, [(0, 0)] * nchannels
+    try:
+        d, samples = state
+        samples = [(int(previous), int(current)) for previous, current in samples]
+    except (TypeError, ValueError):
+        raise ValueError("illegal state argument")
+    if len(samples) != nchannels:
+        raise ValueError("illegal state argument")
+    return int(d), samples
+
+
+class DSPBackend(object):
+    """Base class for DSP backends. Subclasses set ``name`` and implement every operation with the same signature and results as the ``audioop`` function of the same name."""
+
+    name = None
+
+    def rms(self, fragment, width):
+        """Returns the root mean square of the samples in ``fragment``, truncated to an integer."""
+        raise NotImplementedError("this is an abstract class")
+
+    def rms_blocks(self, fragment, width, block_size):
+        """Returns the ``rms`` of each consecutive block of ``block_size`` samples in ``fragment``, as a list. The last block may be shorter."""
+        _check_fragment(fragment, width)
+        block_bytes = block_size * width
+        return [self.rms(fragment[i:i + block_bytes], width) for i in range(0, len(fragment), block_bytes)]
+
+    def bias(self, fragment, width, bias):
+        """Returns ``fragment`` with ``bias`` added to every sample, wrapping around on overflow."""
+        raise NotImplementedError("this is an abstract class")
+
+    def byteswap(self, fragment, width):
+        """Returns ``fragment`` with the byte order of every sample reversed."""
+        raise NotImplementedError("this is an abstract class")
+
+    def lin2lin(self, fragment, width, newwidth):
+        """Returns ``fragment`` converted to samples ``newwidth`` bytes wide. Narrowing truncates the low bits."""
+        raise NotImplementedError("this is an abstract class")
+
+    def tomono(self, fragment, width, lfactor, rfactor):
+        """Returns the stereo ``fragment`` mixed down to mono as ``left * lfactor + right * rfactor``, clipped and rounded down."""
+        raise NotImplementedError("this is an abstract class")
+
+    def add(self, fragment1, fragment2, width):
+        """Returns the sample-wise sum of two fragments of the same length, clipped to the sample range."""
+        raise NotImplementedError("this is an abstract class")
+
+    def ratecv(self, fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+        """Resamples ``fragment`` from ``inrate`` to ``outrate``, continuing from ``state`` (``None`` at the start of a stream). Returns ``(converted_fragment, new_state)``."""
+        raise NotImplementedError("this is an abstract class")
+
+
+class PythonBackend(DSPBackend):
+    """Pure-Python implementation of the DSP operations, for when NumPy is not installed."""
+
+    name = "python"
+
+    _TYPECODES = {1: "b", 2: "h", 4: "i" if array.array("i").itemsize == 4 else "l"}
+
+    def _samples(self, fragment, width):
+        """Returns the signed samples of ``fragment`` as a sequence of integers."""
+        if width == 3:
+            fragment = bytes(fragment)
+            return [int.from_bytes(fragment[i:i + 3], "little", signed=True) for i in range(0, len(fragment), 3)]
+        samples = array.array(self._TYPECODES[width])
+        samples.frombytes(fragment)
+        if sys.byteorder == "big" and width > 1:
+            samples.byteswap()
+        return samples
+
+    def _fragment(self, samples, width):
+        """Returns signed samples (which must be within the sample range) as a fragment."""
+        if width == 3:
+            return b"".join(sample.to_bytes(3, "little", signed=True) for sample in samples)
+        samples = array.array(self._TYPECODES[width], samples)
+        if sys.byteorder == "big" and width > 1:
+            samples.byteswap()
+        return samples.tobytes()
+
+    def rms(self, fragment, width):
+        _check_fragment(fragment, width)
+        count = len(fragment) // width
+        if count == 0:
+            return 0
+        samples = self._samples(fragment, width)
+        if width <= 2 and count < (1 << 22):  # the sum of squares is below 2**53, so adding integers is exact and gives the same value as adding doubles
+            sum_squares = float(sum(sample * sample for sample in samples))
+        else:  # add doubles in order, rounding like ``audioop`` does
+            sum_squares = 0.0
+            for sample in samples:
+                value = float(sample)
+                sum_squares += value * value
+        return int(math.sqrt(sum_squares / count))
+
+    def bias(self, fragment, width, bias):
+        _check_fragment(fragment, width)
+        mask = (1 << (8 * width)) - 1
+        if width == 1:
+            return bytes((byte + bias) & mask for byte in bytes(fragment))
+        fragment = bytes(fragment)
+        return b"".join(
+            ((int.from_bytes(fragment[i:i + width], "little") + bias) & mask).to_bytes(width, "little")
+            for i in range(0, len(fragment), width)
+        )
+
+    def byteswap(self, fragment, width):
+        _check_fragment(fragment, width)
+        fragment = bytes(fragment)
+        if width == 1:
+            return fragment
+        return b"".join(fragment[i + width - 1:i - 1 if i else None:-1] for i in range(0, len(fragment), width))
+
+    def lin2lin(self, fragment, width, newwidth):
+        _check_fragment(fragment, width)
+        _check_width(newwidth)
+        if width == newwidth:
+            return bytes(fragment)
+        shift = 8 * (newwidth - width)
+        samples = self._samples(fragment, width)
+        if shift > 0:
+            return self._fragment([sample << shift for sample in samples], newwidth)
+        return self._fragment([sample >> -shift for sample in samples], newwidth)
+
+    def tomono(self, fragment, width, lfactor, rfactor):
+        _check_width(width)
+        if len(fragment) % (2 * width) != 0:
+            raise ValueError("not a whole number of frames")
+        minimum, maximum = _sample_bounds(width)
+        samples = self._samples(fragment, width)
+        lfactor, rfactor = float(lfactor), float(rfactor)
+        mixed = []
+        for i in range(0, len(samples), 2):
+            value = samples[i] * lfactor + samples[i + 1] * rfactor
+            mixed.append(int(math.floor(min(max(value, minimum), maximum))))
+        return self._fragment(mixed, width)
+
+    def add(self, fragment1, fragment2, width):
+        _check_fragment(fragment1, width)
+        _check_fragment(fragment2, width)
+        if len(fragment1) != len(fragment2):
+            raise ValueError("Lengths should be the same")
+        minimum, maximum = _sample_bounds(width)
+        samples1, samples2 = self._samples(fragment1, width), self._samples(fragment2, width)
+        return self._fragment([min(max(a + b, minimum), maximum) for a, b in zip(samples1, samples2)], width)
+
+    def ratecv(self, fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+        inrate, outrate, weightA, weightB = _reduced_rates(width, nchannels, inrate, outrate, weightA, weightB)
+        if len(fragment) % (width * nchannels) != 0:
+            raise ValueError("not a whole number of frames")
+        d, channel_samples = _parse_ratecv_state(state, nchannels, outrate)
+        previous = [sample[0] for sample in channel_samples]
+        current = [sample[1] for sample in channel_samples]
+
+        # samples are processed scaled up to 32 bits, like ``audioop`` does
+        shift = 32 - 8 * width
+        samples = [sample << shift for sample in self._samples(fragment, width)]
+        weight_sum = float(weightA) + float(weightB)
+        output = []
+        position = 0
+        while True:
+            while d < 0:
+                if position == len(samples):
+                    new_state = (d, tuple(zip(previous, current)))
+                    return self._fragment(output, width), new_state
+                for channel in range(nchannels):
+                    previous[channel] = current[channel]
+                    current[channel] = int((float(weightA) * samples[position] + float(weightB) * previous[channel]) / weight_sum)
+                    position += 1
+                d += outrate
+            while d >= 0:
+                for channel in range(nchannels):
+                    value = int((float(previous[channel]) * d + float(current[channel]) * (outrate - d)) / outrate)
+                    output.append(value >> shift)
+                d -= inrate
+
+
+class NumpyBackend(DSPBackend):
+    """Vectorized NumPy implementation of the DSP operations, which processes a fragment without a per-sample Python loop."""
+
+    name = "numpy"
+
+    _DTYPES = {1: "i1", 2: "<i2", 4: "<i4"}
+    _UNSIGNED_DTYPES = {1: "u1", 2: "<u2", 4: "<u4"}
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("the NumPy DSP backend requires NumPy; install it or use the \"python\" backend")
+        self._fallback = PythonBackend()
+
+    def _samples(self, fragment, width):
+        """Returns the signed samples of ``fragment`` as an ``int64`` array."""
+        if width == 3:
+            padded = np.zeros((len(fragment) // 3, 4), dtype=np.uint8)
+            padded[:, 1:] = np.frombuffer(fragment, dtype=np.uint8).reshape(-1, 3)
+            return padded.view("<i4").reshape(-1).astype(np.int64) >> 8
+        return np.frombuffer(fragment, dtype=self._DTYPES[width]).astype(np.int64)
+
+    def _fragment(self, samples, width):
+        """Returns signed samples (which must be within the sample range) as a fragment."""
+        if width == 3:
+            return samples.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+        return samples.astype(self._DTYPES[width]).tobytes()
+
+    def rms(self, fragment, width):
+        _check_fragment(fragment, width)
+        count = len(fragment) // width
+        if count == 0:
+            return 0
+        samples = self._samples(fragment, width)
+        if width <= 2 and count < (1 << 22):  # the sum of squares is below 2**53, so adding integers is exact and gives the same value as adding doubles
+            sum_squares = float(np.dot(samples, samples))
+        else:  # ``accumulate`` adds in order, rounding like ``audioop`` does (``sum`` uses pairwise summation, which rounds differently)
+            values = samples.astype(np.float64)
+            sum_squares = float(np.add.accumulate(values * values)[-1])
+        return int(math.sqrt(sum_squares / count))
+
+    def rms_blocks(self, fragment, width, block_size):
+        _check_fragment(fragment, width)
+        count = len(fragment) // width
+        full_blocks = count // block_size
+        if full_blocks == 0:
+            return DSPBackend.rms_blocks(self, fragment, width, block_size)
+        samples = self._samples(fragment, width)
+        blocks = samples[:full_blocks * block_size].reshape(full_blocks, block_size)
+        if width <= 2 and block_size < (1 << 22):  # exact, as in ``rms``
+            sums_squares = np.einsum("ij,ij->i", blocks, blocks).astype(np.float64)
+        else:  # in order along each block, as in ``rms``
+            values = blocks.astype(np.float64)
+            sums_squares = np.add.accumulate(values * values, axis=1)[:, -1]
+        energies = np.sqrt(sums_squares / block_size).astype(np.int64).tolist()
+        if count > full_blocks * block_size:
+            energies.append(self.rms(fragment[full_blocks * block_size * width:], width))
+        return energies
+
+    def bias(self, fragment, width, bias):
+        _check_fragment(fragment, width)
+        if width == 3:
+            samples = self._samples(fragment, 3)
+            return self._fragment(((samples + bias) & 0xFFFFFF) << 40 >> 40, 3)  # wrap around, then sign-extend back into the sample range
+        samples = np.frombuffer(fragment, dtype=self._UNSIGNED_DTYPES[width])
+        return (samples + samples.dtype.type(bias % (1 << (8 * width)))).tobytes()  # unsigned arithmetic wraps around like ``audioop``
+
+    def byteswap(self, fragment, width):
+        _check_fragment(fragment, width)
+        return np.frombuffer(fragment, dtype=np.uint8).reshape(-1, width)[:, ::-1].tobytes()
+
+    def lin2lin(self, fragment, width, newwidth):
+        _check_fragment(fragment, width)
+        _check_width(newwidth)
+        if width == newwidth:
+            return bytes(fragment)
+        shift = 8 * (newwidth - width)
+        samples = self._samples(fragment, width)
+        return self._fragment(samples << shift if shift > 0 else samples >> -shift, newwidth)
+
+    def tomono(self, fragment, width, lfactor, rfactor):
+        _check_width(width)
+        if len(fragment) % (2 * width) != 0:
+            raise ValueError("not a whole number of frames")
+        minimum, maximum = _sample_bounds(width)
+        samples = self._samples(fragment, width).astype(np.float64).reshape(-1, 2)
+        mixed = samples[:, 0] * float(lfactor) + samples[:, 1] * float(rfactor)
+        return self._fragment(np.floor(np.clip(mixed, minimum, maximum)).astype(np.int64), width)
+
+    def add(self, fragment1, fragment2, width):
+        _check_fragment(fragment1, width)
+        _check_fragment(fragment2, width)
+        if len(fragment1) != len(fragment2):
+            raise ValueError("Lengths should be the same")
+        minimum, maximum = _sample_bounds(width)
+        return self._fragment(np.clip(self._samples(fragment1, width) + self._samples(fragment2, width), minimum, maximum), width)
+
+    def ratecv(self, fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+        reduced_inrate, reduced_outrate, reduced_weightA, reduced_weightB = _reduced_rates(width, nchannels, inrate, outrate, weightA, weightB)
+        if reduced_weightB != 0:  # the weighted filter is recursive, so it can't be vectorized
+            return self._fallback.ratecv(fragment, width, nchannels, inrate, outrate, state, weightA, weightB)
+        inrate, outrate = reduced_inrate, reduced_outrate
+        if len(fragment) % (width * nchannels) != 0:
+            raise ValueError("not a whole number of frames")
+        d, channel_samples = _parse_ratecv_state(state, nchannels, outrate)
+
+        # every output frame ``m`` interpolates between input frames ``n - 1`` and ``n``, where ``n`` is the number of input frames consumed before it is produced;
+        # ``frames[n]`` and ``frames[n + 1]`` are those input frames, preceded by the two frames from the previous state, scaled up to 32 bits like ``audioop`` does
+        shift = 32 - 8 * width
+        frame_count = len(fragment) // (width * nchannels)
+        frames = np.empty((frame_count + 2, nchannels), dtype=np.int64)
+        frames[:2] = np.array(channel_samples, dtype=np.int64).T
+        frames[2:] = self._samples(fragment, width).reshape(-1, nchannels) << shift
+
+        final_position = d + frame_count * outrate
+        output_count = final_position // inrate + 1 if final_position >= 0 else 0
+        output_indices = np.arange(output_count, dtype=np.int64)
+        consumed = np.maximum(-((d - output_indices * inrate) // outrate), 0)  # the fewest frames that make ``d`` non-negative for that output
+        positions = (d + consumed * outrate - output_indices * inrate).astype(np.float64)[:, np.newaxis]
+        interpolated = (frames[consumed].astype(np.float64) * positions + frames[consumed + 1].astype(np.float64) * (outrate - positions)) / outrate
+        output = np.trunc(interpolated).astype(np.int64) >> shift
+
+        new_state = (int(final_position - output_count * inrate), tuple((int(previous), int(current)) for previous, current in frames[frame_count:frame_count + 2].T))
+        return self._fragment(output.reshape(-1), width), new_state
+
+
+BACKENDS = {
+    "numpy": NumpyBackend,
+    "python": PythonBackend,
+}
+
+_backends = {}
+_current_backend = None
+
+
+def get_backend(backend=None):
+    """
+    Returns a ``DSPBackend`` instance.
+
+    ``backend`` may be a ``DSPBackend`` instance, which is returned as is, or one of the names in ``BACKENDS``. ``None`` means the backend selected with ``set_backend``, which is ``"numpy"`` if NumPy is installed and ``"python"`` otherwise.
+    """
+    if isinstance(backend, DSPBackend):
+        return backend
+    if backend is None:
+        return _current_backend
+    if backend not in BACKENDS:
+        raise ValueError("unknown DSP backend {!r}; expected one of {}".format(backend, ", ".join(sorted(BACKENDS))))
+    if backend not in _backends:
+        _backends[backend] = BACKENDS[backend]()
+    return _backends[backend]
+
+
+def set_backend(backend=None):
+    """Selects the backend used by the module-level functions, by name or as a ``DSPBackend`` instance. ``None`` selects the default backend. Returns the selected backend."""
+    global _current_backend
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    _current_backend = get_backend(backend)
+    return _current_backend
+
+
+set_backend()
+
+
+def rms(fragment, width):
+    return _current_backend.rms(fragment, width)
+
+
+def rms_blocks(fragment, width, block_size):
+    return _current_backend.rms_blocks(fragment, width, block_size)
+
+
+def bias(fragment, width, bias):
+    return _current_backend.bias(fragment, width, bias)
+
+
+def byteswap(fragment, width):
+    return _current_backend.byteswap(fragment, width)
+
+
+def lin2lin(fragment, width, newwidth):
+    return _current_backend.lin2lin(fragment, width, newwidth)
+
+
+def tomono(fragment, width, lfactor, rfactor):
+    return _current_backend.tomono(fragment, width, lfactor, rfactor)
+
+
+def add(fragment1, fragment2, width):
+    return _current_backend.add(fragment1, fragment2, width)
+
+
+def ratecv(fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+    return _current_backend.ratecv(fragment, width, nchannels, inrate, outrate, state, weightA, weightB)
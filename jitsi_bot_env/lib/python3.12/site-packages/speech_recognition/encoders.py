@@ -0,0 +1,580 @@
+"""
+Audio encoders used to turn ``AudioData`` into the request payloads of the recognition backends.
+
+Three kinds of encoder are available:
+
+* ``FlacEncoder`` encodes FLAC in-process. It is written in pure Python, and uses NumPy for the per-sample work when NumPy is installed. It is the default FLAC encoder.
+* ``FlacWorkerEncoder`` runs ``FlacEncoder`` in a long-lived worker process, which keeps the encoding CPU off the process that is capturing audio.
+* ``SubprocessFlacEncoder`` runs the ``flac`` command line utility once per phrase. It is only used when asked for by name: starting a process per phrase looks cheap when timed on an idle machine, but it competes with capture and transcription for the CPU of a busy bot.
+
+``Linear16Encoder`` produces raw 16-bit little-endian PCM and ``WavEncoder`` produces a WAV file, which cost nothing to encode, for backends that accept them.
+
+``select_encoder`` picks the fastest available encoder for the formats a backend accepts, among those that don't start a process per phrase.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import functools
+import hashlib
+import io
+import multiprocessing
+import os
+import struct
+import subprocess
+import threading
+import wave
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_COMPRESSION_LEVEL = 3  # the cheapest level in-process, with the output size of levels 4-7 on speech
+
+
+class AudioEncoder(object):
+    """Base class for audio encoders. Subclasses set ``format`` and implement ``encode`` and ``content_type``."""
+
+    format = None  # name of the encoded format, such as ``"flac"`` or ``"l16"``
+    cost = 0  # measured seconds spent encoding each second of 16 kHz 16-bit audio, used by ``select_encoder`` to pick the fastest encoder
+    automatic = True  # whether ``select_encoder`` and ``get_encoder(None)`` may pick the encoder; others are only used when named
+
+    @classmethod
+    def available(cls):
+        """Returns whether the encoder can run here. Encoders that aren't available are never picked by ``select_encoder``."""
+        return True
+
+    def encode(self, raw_data, sample_rate, sample_width):
+        """Encodes ``raw_data`` (mono PCM in the form returned by ``AudioData.get_raw_data``: little-endian, unsigned if 8-bit and signed otherwise) and returns the encoded bytes."""
+        raise NotImplementedError("this is an abstract class")
+
+    def content_type(self, sample_rate):
+        """Returns the MIME type of the encoded data."""
+        raise NotImplementedError("this is an abstract class")
+
+    def encode_audio(self, audio_data, convert_rate=None, convert_width=None):
+        """Encodes an ``AudioData`` instance, converting its sample rate and sample width first if ``convert_rate`` or ``convert_width`` is given."""
+        raw_data = audio_data.get_raw_data(convert_rate, convert_width)
+        sample_rate = audio_data.sample_rate if convert_rate is None else convert_rate
+        sample_width = audio_data.sample_width if convert_width is None else convert_width
+        return self.encode(raw_data, sample_rate, sample_width)
+
+    def close(self):
+        """Releases any resources held by the encoder."""
+
+
+class Linear16Encoder(AudioEncoder):
+    """Raw 16-bit little-endian PCM (``LINEAR16``). Requires 16-bit input, which is passed through untouched."""
+
+    format = "l16"
+    cost = 0
+
+    def encode(self, raw_data, sample_rate, sample_width):
+        if sample_width != 2:
+            raise ValueError("LINEAR16 encoding requires 16-bit samples")
+        return bytes(raw_data)
+
+    def content_type(self, sample_rate):
+        return "audio/l16; rate={}".format(sample_rate)
+
+
+class WavEncoder(AudioEncoder):
+    """A WAV file containing the PCM data as is, for backends that take ``audio/wav`` uploads."""
+
+    format = "wav"
+    cost = 0
+
+    def encode(self, raw_data, sample_rate, sample_width):
+        # 8-bit WAV samples are unsigned, like ``raw_data``, so no conversion is needed
+        with io.BytesIO() as wav_file:
+            with wave.open(wav_file, "wb") as wav_writer:
+                wav_writer.setframerate(sample_rate)
+                wav_writer.setsampwidth(sample_width)
+                wav_writer.setnchannels(1)
+                wav_writer.writeframes(raw_data)
+            return wav_file.getvalue()
+
+    def content_type(self, sample_rate):
+        return "audio/wav"
+
+
+class FlacEncoder(AudioEncoder):
+    """
+    In-process FLAC encoder, using fixed linear predictors and Rice-coded residuals.
+
+    ``compression_level`` goes from 0 to 8 (smallest output), like the ``flac`` command line utility; higher levels try more predictor orders and Rice partitionings. Levels 0 to 2 use shorter blocks, which NumPy handles less efficiently, so level 3 is the cheapest. Samples of 8, 16 and 24 bits are supported.
+    """
+
+    format = "flac"
+    cost = 0.007 if np is not None else 0.15  # 0.034 s with NumPy and 0.74 s without for 5 seconds of audio, at level 3
+
+    def __init__(self, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        assert 0 <= compression_level <= 8, "``compression_level`` must be between 0 and 8 inclusive"
+        self.compression_level = compression_level
+
+    def encode(self, raw_data, sample_rate, sample_width):
+        return encode_flac(raw_data, sample_rate, sample_width, self.compression_level)
+
+    def content_type(self, sample_rate):
+        return "audio/x-flac; rate={}".format(sample_rate)
+
+
+class FlacWorkerEncoder(FlacEncoder):
+    """
+    Runs ``FlacEncoder`` in a long-lived worker process, started on first use and reused for every phrase afterwards.
+
+    Encoding requests are sent to the worker one at a time per encoder instance; call ``close`` to stop the worker.
+    """
+
+    cost = FlacEncoder.cost + 0.001  # the same work, plus sending the audio to the worker and the result back
+
+    def __init__(self, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        super(FlacWorkerEncoder, self).__init__(compression_level)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def encode(self, raw_data, sample_rate, sample_width):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            executor = self._executor
+        return executor.submit(encode_flac, bytes(raw_data), sample_rate, sample_width, self.compression_level).result()
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+class SubprocessFlacEncoder(FlacEncoder):
+    """Runs the ``flac`` command line utility once per phrase, at ``compression_level`` (``--best`` is level 8)."""
+
+    cost = 0.0014  # 0.007 s for 5 seconds of audio, including starting the process
+    automatic = False  # starts a process for every phrase
+
+    def __init__(self, compression_level=8):
+        super(SubprocessFlacEncoder, self).__init__(compression_level)
+
+    @classmethod
+    def available(cls):
+        """Returns whether a ``flac`` executable is found and runs (the bundled ones may not run on every system). Checked once."""
+        return _flac_converter_runs()
+
+    def encode(self, raw_data, sample_rate, sample_width):
+        from .audio import get_flac_converter
+
+        # generate the WAV file contents
+        with io.BytesIO() as wav_file:
+            wav_writer = wave.open(wav_file, "wb")
+            try:  # note that we can't use context manager, since that was only added in Python 3.4
+                wav_writer.setframerate(sample_rate)
+                wav_writer.setsampwidth(sample_width)
+                wav_writer.setnchannels(1)
+                wav_writer.writeframes(raw_data)
+                wav_data = wav_file.getvalue()
+            finally:  # make sure resources are cleaned up
+                wav_writer.close()
+
+        # run the FLAC converter with the WAV data to get the FLAC data
+        flac_converter = get_flac_converter()
+        if os.name == "nt":  # on Windows, specify that the process is to be started without showing a console window
+            startup_info = subprocess.STARTUPINFO()
+            startup_info.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # specify that the wShowWindow field of `startup_info` contains a value
+            startup_info.wShowWindow = subprocess.SW_HIDE  # specify that the console window should be hidden
+        else:
+            startup_info = None  # default startupinfo
+        process = subprocess.Popen([
+            flac_converter,
+            "--stdout", "--totally-silent",  # put the resulting FLAC file in stdout, and make sure it's not mixed with any program output
+            "-{}".format(self.compression_level),
+            "-",  # the input FLAC file contents will be given in stdin
+        ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, startupinfo=startup_info)
+        flac_data, _ = process.communicate(wav_data)
+        return flac_data
+
+
+ENCODERS = {
+    "l16": Linear16Encoder,
+    "wav": WavEncoder,
+    "flac": FlacEncoder,
+    "flac-worker": FlacWorkerEncoder,
+    "flac-subprocess": SubprocessFlacEncoder,
+}
+_shared_encoders = {}
+_shared_encoders_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _flac_converter_runs():
+    from .audio import get_flac_converter
+
+    try:
+        return subprocess.run([get_flac_converter(), "--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def _fastest_encoder(audio_format):
+    """Returns the name of the fastest available ``automatic`` encoder producing ``audio_format``, or ``None`` if there is none."""
+    candidates = [
+        name for name, encoder_class in ENCODERS.items()
+        if encoder_class.format == audio_format and encoder_class.automatic and encoder_class.available()
+    ]
+    return min(candidates, key=lambda name: ENCODERS[name].cost) if candidates else None
+
+
+def get_encoder(encoder=None, compression_level=None):
+    """
+    Returns an ``AudioEncoder`` instance.
+
+    ``encoder`` may be an ``AudioEncoder`` instance, which is returned as is, or one of the names in ``ENCODERS``. ``None`` means the fastest FLAC encoder that doesn't start a process per phrase, which is ``"flac"``; ``"flac-subprocess"`` must be named. Named encoders are shared per name and compression level, so that a ``FlacWorkerEncoder`` keeps reusing the same worker process.
+    """
+    if isinstance(encoder, AudioEncoder):
+        return encoder
+    name = _fastest_encoder("flac") if encoder is None else encoder
+    if name not in ENCODERS:
+        raise ValueError("unknown audio encoder {!r}; expected one of {}".format(name, ", ".join(sorted(ENCODERS))))
+    key = (name, compression_level)
+    with _shared_encoders_lock:
+        if key not in _shared_encoders:
+            if not issubclass(ENCODERS[name], FlacEncoder) or compression_level is None:
+                _shared_encoders[key] = ENCODERS[name]()
+            else:
+                _shared_encoders[key] = ENCODERS[name](compression_level)
+        return _shared_encoders[key]
+
+
+def select_encoder(formats, preferred=None, compression_level=None):
+    """
+    Picks the encoder for a backend that accepts the formats in ``formats``, listed in the backend's order of preference.
+
+    If ``preferred`` (an encoder name or ``AudioEncoder`` instance, such as ``recognizer_instance.audio_encoder``) produces one of the accepted formats, it is used. Otherwise, the fastest available encoder for the backend's most preferred format is used.
+    """
+    if preferred is not None:
+        encoder = get_encoder(preferred, compression_level)
+        if encoder.format in formats:
+            return encoder
+    for audio_format in formats:
+        name = _fastest_encoder(audio_format)
+        if name is not None:
+            return get_encoder(name, compression_level)
+    raise ValueError("no encoder available for any of the formats {}".format(", ".join(formats)))
+
+
+# ===============================
+#  FLAC encoding
+# ===============================
+
+# (block size, highest fixed predictor order, highest Rice partition order, exhaustive Rice parameter search) for each compression level
+FLAC_LEVELS = [
+    (1152, 1, 2, False),
+    (1152, 2, 3, False),
+    (1152, 2, 4, False),
+    (4096, 3, 4, False),
+    (4096, 4, 4, False),
+    (4096, 4, 5, False),
+    (4096, 4, 6, True),
+    (4096, 4, 6, True),
+    (4096, 4, 8, True),
+]
+
+SAMPLE_SIZE_CODES = {8: "001", 16: "100", 24: "110"}
+UNSIGNED_TO_SIGNED_8_BIT = bytes((byte - 128) & 0xFF for byte in range(256))
+
+
+def _crc_table(polynomial, width):
+    top_bit, mask = 1 << (width - 1), (1 << width) - 1
+    table = []
+    for byte in range(256):
+        crc = byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ polynomial) if crc & top_bit else (crc << 1)
+        table.append(crc & mask)
+    return table
+
+
+CRC8_TABLE = _crc_table(0x07, 8)
+CRC16_TABLE = _crc_table(0x8005, 16)
+
+
+def crc8(data):
+    crc, table = 0, CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+_crc16_tables = None
+CRC16_BLOCK = 64  # bytes per block when computing CRC-16 with NumPy
+
+
+def _build_crc16_tables():
+    """Builds the lookup tables used by ``crc16``, on first use."""
+    global _crc16_tables
+    table = CRC16_TABLE
+    word_table = [((table[high] << 8) & 0xFFFF) ^ table[(table[high] >> 8) ^ low] for high in range(256) for low in range(256)]
+    block_tables = zero_high = zero_low = None
+    if np is not None:
+        byte_table = np.array(table, dtype=np.int64)
+
+        def zero_byte(crc):  # the CRC after feeding one more zero byte
+            return ((crc << 8) & 0xFFFF) ^ byte_table[crc >> 8]
+
+        # block_tables[j][b] is the CRC of byte ``b`` at position ``j`` of a block, followed by the rest of the block as zeros
+        block_tables = [byte_table]
+        for _ in range(CRC16_BLOCK - 1):
+            block_tables.append(zero_byte(block_tables[-1]))
+        block_tables = np.array(block_tables[::-1])
+
+        # the CRC after feeding a whole block of zeros, split into the contributions of the high and low byte of the starting CRC
+        zero_high, zero_low = np.arange(256, dtype=np.int64) << 8, np.arange(256, dtype=np.int64)
+        for _ in range(CRC16_BLOCK):
+            zero_high, zero_low = zero_byte(zero_high), zero_byte(zero_low)
+        zero_high, zero_low = zero_high.tolist(), zero_low.tolist()
+    _crc16_tables = (word_table, block_tables, zero_high, zero_low)
+
+
+def crc16(data):
+    """CRC-16 of ``data``. With NumPy, the CRCs of 64-byte blocks are computed all at once and then chained; otherwise the data is processed two bytes at a time."""
+    if _crc16_tables is None:
+        _build_crc16_tables()
+    word_table, block_tables, zero_high, zero_low = _crc16_tables
+    crc, start = 0, 0
+    if np is not None and len(data) >= CRC16_BLOCK:
+        block_count = len(data) // CRC16_BLOCK
+        blocks = np.frombuffer(data, dtype=np.uint8, count=block_count * CRC16_BLOCK).reshape(block_count, CRC16_BLOCK)
+        block_crcs = np.bitwise_xor.reduce(block_tables[np.arange(CRC16_BLOCK), blocks], axis=1).tolist()
+        for block_crc in block_crcs:
+            crc = zero_high[crc >> 8] ^ zero_low[crc & 0xFF] ^ block_crc
+        start = block_count * CRC16_BLOCK
+    tail = data[start:]
+    for word in struct.unpack(">{}H".format(len(tail) // 2), tail[:len(tail) & ~1]):
+        crc = word_table[crc ^ word]
+    if len(tail) & 1:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ tail[-1]]
+    return crc
+
+
+def _bits(value, width):
+    """Returns ``value`` as a string of ``width`` binary digits, in two's complement if negative."""
+    return format(value & ((1 << width) - 1), "0{}b".format(width)) if width else ""
+
+
+def _utf8_number(number):
+    """Encodes a frame number the way FLAC does, with the UTF-8 scheme extended to 36 bits."""
+    if number < 0x80:
+        return bytes([number])
+    payload = []
+    while True:
+        payload.append(0x80 | (number & 0x3F))
+        number >>= 6
+        length = len(payload) + 1
+        if number < (1 << (7 - length)):
+            first = ((0xFF00 >> length) & 0xFF) | number
+            return bytes([first] + payload[::-1])
+
+
+def _bits_to_bytes(pieces):
+    """Packs bits into bytes, padding the end with zeros. ``pieces`` is a string of binary digits, or a list of such strings and NumPy arrays of bits."""
+    if isinstance(pieces, str):
+        pieces = [pieces]
+    if np is not None and not all(isinstance(piece, str) for piece in pieces):
+        bits = np.concatenate([np.frombuffer(piece.encode("ascii"), dtype=np.uint8) - ord("0") if isinstance(piece, str) else piece for piece in pieces])
+        return np.packbits(bits).tobytes()
+    bits = "".join(pieces)
+    bits += "0" * (-len(bits) % 8)  # pad to a byte boundary
+    return int(bits, 2).to_bytes(len(bits) // 8, "big") if bits else b""
+
+
+def _to_samples(raw_data, sample_width):
+    """Converts raw PCM into signed sample values: a NumPy ``int64`` array when NumPy is available, otherwise a list of ints."""
+    if sample_width == 1:
+        if np is not None:
+            return np.frombuffer(raw_data, dtype=np.uint8).astype(np.int64) - 128
+        return [byte - 128 for byte in raw_data]
+    if sample_width == 2:
+        if np is not None:
+            return np.frombuffer(raw_data, dtype="<i2").astype(np.int64)
+        return list(struct.unpack("<{}h".format(len(raw_data) // 2), raw_data))
+    if np is not None:  # 24-bit: assemble each sample from its three bytes
+        data = np.frombuffer(raw_data, dtype=np.uint8).reshape(-1, 3).astype(np.int64)
+        values = data[:, 0] | (data[:, 1] << 8) | (data[:, 2] << 16)
+        return values - ((values & 0x800000) << 1)
+    values = [int.from_bytes(raw_data[i:i + 3], "little", signed=True) for i in range(0, len(raw_data), 3)]
+    return values
+
+
+def _fixed_residuals(samples, order):
+    """Returns the residual of the fixed predictor of ``order`` for ``samples`` (excluding the ``order`` warmup samples)."""
+    if np is not None:
+        return np.diff(samples, n=order) if order else samples
+    residuals = samples
+    for _ in range(order):
+        residuals = [b - a for a, b in zip(residuals, residuals[1:])]
+    return residuals
+
+
+def _zigzag(residuals):
+    if np is not None:
+        return np.where(residuals >= 0, residuals << 1, ((-residuals) << 1) - 1)
+    return [r << 1 if r >= 0 else ((-r) << 1) - 1 for r in residuals]
+
+
+def _rice_cost(values, parameter):
+    """Number of bits needed to Rice code ``values`` (already zigzag encoded) with ``parameter``."""
+    if np is not None:
+        return int((values >> parameter).sum()) + len(values) * (parameter + 1)
+    return sum(value >> parameter for value in values) + len(values) * (parameter + 1)
+
+
+def _best_rice_parameter(values, exhaustive, max_parameter):
+    if len(values) == 0:
+        return 0, 0
+    total = int(values.sum()) if np is not None else sum(values)
+    mean = total // len(values)
+    estimate = min(max(mean.bit_length() - 1, 0), max_parameter)
+    candidates = range(max_parameter + 1) if exhaustive else range(max(estimate - 1, 0), min(estimate + 1, max_parameter) + 1)
+    return min((_rice_cost(values, parameter), parameter) for parameter in candidates)[::-1]
+
+
+def _rice_bits(values, parameter):
+    """Rice codes ``values`` (already zigzag encoded): each value is its quotient in unary (zeros ended by a one), then its ``parameter`` low bits. Returns a string of binary digits, or a NumPy array of bits when NumPy is available."""
+    if np is None:
+        mask = (1 << parameter) - 1
+        low_format = "0{}b".format(parameter)
+        if parameter == 0:
+            return "".join("0" * value + "1" for value in values)
+        return "".join("0" * (value >> parameter) + "1" + format(value & mask, low_format) for value in values)
+    if len(values) == 0:
+        return ""
+    # the stop bit and the remainder together are ``(1 << parameter) | remainder``, written in ``parameter + 1`` bits right after the quotient zeros
+    quotients = values >> parameter
+    lengths = quotients + (1 + parameter)
+    code_starts = np.cumsum(lengths) - (1 + parameter)
+    shifts = np.arange(parameter, -1, -1)
+    codes = ((values & ((1 << parameter) - 1)) | (1 << parameter))[:, np.newaxis] >> shifts
+    bits = np.zeros(int(lengths.sum()), dtype=np.uint8)
+    bits[code_starts[:, np.newaxis] + np.arange(parameter + 1)] = codes & 1
+    return bits
+
+
+def _partition_bounds(block_size, order, partition_order):
+    """Start and end indices of the Rice partitions of a residual (the first partition is shorter by the ``order`` warmup samples)."""
+    partition_size = block_size >> partition_order
+    return [0] + [partition_size * (i + 1) - order for i in range(1 << partition_order)]
+
+
+def _choose_partitioning(values, block_size, order, max_partition_order, exhaustive, max_parameter):
+    """Returns ``(bit_count, partition_order, parameters)`` for the cheapest Rice partitioning of ``values`` (zigzag encoded residuals)."""
+    partition_orders = []
+    for partition_order in range(max_partition_order + 1):
+        if block_size % (1 << partition_order) or (block_size >> partition_order) <= order:
+            break
+        partition_orders.append(partition_order)
+
+    best = None
+    if np is not None:
+        # cost of every parameter for every partition at the finest partition order, then merge neighbouring partitions for coarser orders
+        finest = partition_orders[-1]
+        parameters = np.arange(max_parameter + 1)
+        starts = _partition_bounds(block_size, order, finest)[:-1]
+        quotient_sums = np.add.reduceat(values[np.newaxis, :] >> parameters[:, np.newaxis], starts, axis=1)
+        counts = np.diff(_partition_bounds(block_size, order, finest))
+        for partition_order in partition_orders:
+            group = 1 << (finest - partition_order)
+            costs = quotient_sums.reshape(len(parameters), -1, group).sum(axis=2) + counts.reshape(-1, group).sum(axis=1) * (parameters[:, np.newaxis] + 1)
+            chosen = costs.argmin(axis=0)
+            cost = int(costs.min(axis=0).sum())
+            parameter_bits = 5 if chosen.max() > 14 else 4
+            cost += 2 + 4 + parameter_bits * len(chosen)
+            if best is None or cost < best[0]:
+                best = (cost, partition_order, [int(parameter) for parameter in chosen])
+        return best
+
+    for partition_order in partition_orders:
+        bounds = _partition_bounds(block_size, order, partition_order)
+        chosen, cost = [], 0
+        for start, end in zip(bounds, bounds[1:]):
+            parameter, partition_cost = _best_rice_parameter(values[start:end], exhaustive, max_parameter)
+            chosen.append(parameter)
+            cost += partition_cost
+        parameter_bits = 5 if max(chosen) > 14 else 4
+        cost += 2 + 4 + parameter_bits * len(chosen)
+        if best is None or cost < best[0]:
+            best = (cost, partition_order, chosen)
+    return best
+
+
+def _encode_residual(residuals, block_size, order, max_partition_order, exhaustive, bits_per_sample):
+    """Chooses the Rice partitioning of ``residuals`` and returns ``(bit_count, encode)``, where ``encode()`` produces the residual section bits."""
+    values = _zigzag(residuals)
+    max_parameter = 30 if bits_per_sample > 16 else 14
+    cost, partition_order, parameters = _choose_partitioning(values, block_size, order, max_partition_order, exhaustive, max_parameter)
+
+    def encode():
+        parameter_bits = 5 if max(parameters) > 14 else 4
+        pieces = ["01" if parameter_bits == 5 else "00", _bits(partition_order, 4)]
+        bounds = _partition_bounds(block_size, order, partition_order)
+        for parameter, start, end in zip(parameters, bounds, bounds[1:]):
+            pieces.append(_bits(parameter, parameter_bits))
+            pieces.append(_rice_bits(values[start:end], parameter))
+        return pieces
+    return cost, encode
+
+
+def _encode_subframe(samples, bits_per_sample, max_order, max_partition_order, exhaustive):
+    block_size = len(samples)
+    first = int(samples[0])
+    if bool((samples == first).all()) if np is not None else all(sample == first for sample in samples):
+        return "0" + "000000" + "0" + _bits(first, bits_per_sample)  # CONSTANT subframe
+
+    best_cost, best = bits_per_sample * block_size, None  # VERBATIM unless a predictor does better
+    for order in range(min(max_order, block_size - 1) + 1):
+        cost, encode = _encode_residual(_fixed_residuals(samples, order), block_size, order, max_partition_order, exhaustive, bits_per_sample)
+        cost += order * bits_per_sample
+        if cost < best_cost:
+            best_cost, best = cost, (order, encode)
+
+    if best is None:
+        return "0" + "000001" + "0" + "".join(_bits(int(sample), bits_per_sample) for sample in samples)  # VERBATIM subframe
+    order, encode = best
+    warmup = "".join(_bits(int(sample), bits_per_sample) for sample in samples[:order])
+    return ["0" + "001" + _bits(order, 3) + "0" + warmup] + encode()  # FIXED subframe
+
+
+def encode_flac(raw_data, sample_rate, sample_width, compression_level=DEFAULT_COMPRESSION_LEVEL):
+    """Encodes raw mono PCM (in the form returned by ``AudioData.get_raw_data``) as a native FLAC file and returns its contents."""
+    assert 1 <= sample_width <= 3, "FLAC encoding supports sample widths between 1 and 3 inclusive"
+    assert 0 < sample_rate < (1 << 20), "Sample rate must be a positive integer that fits in 20 bits"
+    block_size, max_order, max_partition_order, exhaustive = FLAC_LEVELS[compression_level]
+    bits_per_sample = sample_width * 8
+    samples = _to_samples(raw_data, sample_width)
+    sample_count = len(samples)
+
+    # the MD5 signature covers the signed sample data
+    signed_data = bytes(raw_data).translate(UNSIGNED_TO_SIGNED_8_BIT) if sample_width == 1 else raw_data
+    md5 = hashlib.md5(signed_data).digest()
+
+    frames = []
+    for frame_number, start in enumerate(range(0, sample_count, block_size)):
+        block = samples[start:start + block_size]
+        header = _bits_to_bytes(
+            "11111111111110" + "0" + "0"  # sync code, reserved bit, fixed block size
+            + "0111"  # block size: 16-bit (block size - 1) at the end of the header
+            + "0000"  # sample rate: from STREAMINFO
+            + "0000"  # channel assignment: mono
+            + SAMPLE_SIZE_CODES[bits_per_sample] + "0"
+        ) + _utf8_number(frame_number) + struct.pack(">H", len(block) - 1)
+        header += bytes([crc8(header)])
+        frame = header + _bits_to_bytes(_encode_subframe(block, bits_per_sample, max_order, max_partition_order, exhaustive))
+        frames.append(frame + struct.pack(">H", crc16(frame)))
+
+    stream_info = _bits_to_bytes(
+        _bits(block_size, 16) + _bits(block_size, 16)  # minimum and maximum block size
+        + _bits(min(len(frame) for frame in frames) if frames else 0, 24) + _bits(max(len(frame) for frame in frames) if frames else 0, 24)
+        + _bits(sample_rate, 20) + _bits(0, 3) + _bits(bits_per_sample - 1, 5) + _bits(sample_count, 36)
+    ) + md5
+    metadata_header = bytes([0x80]) + struct.pack(">I", len(stream_info))[1:]  # last metadata block, type STREAMINFO
+    return b"fLaC" + metadata_header + stream_info + b"".join(frames)
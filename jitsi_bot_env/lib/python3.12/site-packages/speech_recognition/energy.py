@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import collections
+
+from . import dsp
+
+
+class EnergyReader(object):
+    """
+    Reads buffers of ``chunk`` frames from an audio stream, together with their RMS energy, for ``recognizer_instance.listen``.
+
+    With a ``block_size`` of 1, each buffer is read from the stream on its own and measured with ``speech_recognition.dsp.rms``, like ``listen`` has always done. With a larger ``block_size``, ``block_size`` buffers are read from the stream at once and measured with a single vectorized ``speech_recognition.dsp.rms_blocks`` call. The buffers read ahead are then handed out one at a time, so the caller sees exactly the same buffers and energies either way, and buffers left over when a phrase ends are the first ones returned for the next phrase.
+
+    Reading a block waits until the whole block is available. That costs nothing when replaying a file, but delays live audio by up to ``block_size - 1`` buffers.
+    """
+
+    def __init__(self, stream, chunk, sample_width, block_size=1):
+        assert block_size >= 1, "``block_size`` must be at least 1"
+        self.stream = stream
+        self.chunk = chunk
+        self.sample_width = sample_width
+        self.block_size = block_size
+        self.pending = collections.deque()  # ``(buffer, energy)`` pairs read ahead but not returned yet
+
+    def read(self):
+        """Returns the next buffer, without measuring its energy. Returns ``b""`` once the stream has ended."""
+        if self.pending:
+            return self.pending.popleft()[0]
+        return self.stream.read(self.chunk)
+
+    def read_with_energy(self):
+        """Returns the next buffer and its RMS energy as a ``(buffer, energy)`` tuple. The buffer is ``b""`` once the stream has ended."""
+        if not self.pending:
+            if self.block_size == 1:
+                buffer = self.stream.read(self.chunk)
+                return buffer, dsp.rms(buffer, self.sample_width)
+            self._read_block()
+            if not self.pending:
+                return b"", 0
+        return self.pending.popleft()
+
+    def _read_block(self):
+        data = self.stream.read(self.chunk * self.block_size)
+        buffer_bytes = self.chunk * self.sample_width
+        energies = dsp.rms_blocks(data, self.sample_width, self.chunk)
+        self.pending.extend(zip((data[i:i + buffer_bytes] for i in range(0, len(data), buffer_bytes)), energies))
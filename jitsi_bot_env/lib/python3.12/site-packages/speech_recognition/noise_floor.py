@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+
+class NoiseFloorTracker(object):
+    """
+    Continuously estimates the ambient noise floor from the audio buffers a ``Recognizer`` already reads while listening, and derives the energy threshold from it.
+
+    Unlike ``recognizer_instance.adjust_for_ambient_noise``, tracking never consumes audio of its own: every buffer seen by ``recognizer_instance.listen`` is passed to ``update``. The only explicit calibration is the optional warmup done once at the start of a session with ``recognizer_instance.calibrate_noise_floor``.
+
+    The floor follows the energy with an asymmetric weighted average: it falls quickly when the energy drops below it (``fall_damping``), rises slowly during non-speaking audio (``rise_damping``), and rises very slowly during speech (``speech_rise_damping``) so that a permanent increase in background noise is eventually absorbed without speech dragging the floor up. Dampings are the fraction of the old value kept after one second, like ``recognizer_instance.dynamic_energy_adjustment_damping``.
+
+    The resulting threshold is ``noise_floor * ratio``, but never lower than ``minimum_threshold``.
+    """
+
+    def __init__(self, ratio=1.5, fall_damping=0.15, rise_damping=0.85, speech_rise_damping=0.99, minimum_threshold=50):
+        assert ratio >= 1, "``ratio`` must be at least 1"
+        assert all(0 <= damping < 1 for damping in (fall_damping, rise_damping, speech_rise_damping)), "Dampings must be between 0 (inclusive) and 1 (exclusive)"
+        self.ratio = ratio
+        self.fall_damping = fall_damping
+        self.rise_damping = rise_damping
+        self.speech_rise_damping = speech_rise_damping
+        self.minimum_threshold = minimum_threshold
+
+        self.noise_floor = None  # current noise floor estimate (RMS energy), or ``None`` before the first buffer
+        self.threshold = None  # current energy threshold derived from the noise floor
+        self.calibrated = False  # whether the warmup calibration has been done
+        self.buffers_seen = 0
+        self.speech_buffers = 0
+
+    def calibrate(self, energies, seconds_per_buffer):
+        """Seeds the noise floor from the energies of a warmup period, which should contain no speech. Uses the median so a stray click doesn't skew the estimate."""
+        energies = sorted(energies)
+        if energies:
+            self.noise_floor = float(energies[len(energies) // 2])
+            self.threshold = max(self.minimum_threshold, self.noise_floor * self.ratio)
+            self.buffers_seen += len(energies)
+        self.calibrated = True
+        return self.threshold
+
+    def update(self, energy, seconds_per_buffer, is_speech):
+        """Updates the noise floor with the energy of one buffer lasting ``seconds_per_buffer`` seconds, and returns the new energy threshold."""
+        self.buffers_seen += 1
+        if is_speech:
+            self.speech_buffers += 1
+
+        if self.noise_floor is None:  # not calibrated, start from the first buffer we see
+            self.noise_floor = float(energy)
+        else:
+            if energy < self.noise_floor:
+                damping = self.fall_damping
+            elif is_speech:
+                damping = self.speech_rise_damping
+            else:
+                damping = self.rise_damping
+            damping **= seconds_per_buffer  # account for different chunk sizes and rates
+            self.noise_floor = self.noise_floor * damping + energy * (1 - damping)
+
+        self.threshold = max(self.minimum_threshold, self.noise_floor * self.ratio)
+        return self.threshold
+
+    def state(self):
+        """Returns a snapshot of the tracker state as a dictionary."""
+        return {
+            "noise_floor": self.noise_floor,
+            "threshold": self.threshold,
+            "calibrated": self.calibrated,
+            "buffers_seen": self.buffers_seen,
+            "speech_buffers": self.speech_buffers,
+        }
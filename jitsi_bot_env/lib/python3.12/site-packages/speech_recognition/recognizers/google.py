@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import time
 from typing import Dict, Literal, TypedDict
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
@@ -9,6 +10,7 @@ from urllib.request import Request, urlopen
 from typing_extensions import NotRequired
 
 from speech_recognition.audio import AudioData
+from speech_recognition.encoders import AudioEncoder, get_encoder, select_encoder
 from speech_recognition.exceptions import RequestError, UnknownValueError
 
 
@@ -31,6 +33,7 @@ ProfanityFilterLevel = Literal[0, 1]
 RequestHeaders = Dict[str, str]
 
 ENDPOINT = "http://www.google.com/speech-api/v2/recognize"
+AUDIO_FORMATS = ("flac", "l16")  # formats accepted by the endpoint, in order of preference
 
 
 class RequestBuilder:
@@ -41,11 +44,13 @@ class RequestBuilder:
         key: str,
         language: str,
         filter_level: ProfanityFilterLevel,
+        encoder: AudioEncoder | None = None,
     ) -> None:
         self.endpoint = endpoint
         self.key = key
         self.language = language
         self.filter_level = filter_level
+        self.encoder = get_encoder(encoder)
 
     def build(self, audio_data: AudioData) -> Request:
         if not isinstance(audio_data, AudioData):
@@ -81,15 +86,16 @@ class RequestBuilder:
         {'Content-Type': 'audio/x-flac; rate=16000'}
         """
         rate = audio_data.sample_rate
-        headers = {"Content-Type": f"audio/x-flac; rate={rate}"}
+        headers = {"Content-Type": self.encoder.content_type(rate)}
         return headers
 
     def build_data(self, audio_data: AudioData) -> bytes:
-        flac_data = audio_data.get_flac_data(
+        encoded_data = self.encoder.encode_audio(
+            audio_data,
             convert_rate=self.to_convert_rate(audio_data.sample_rate),
             convert_width=2,  # audio samples must be 16-bit
         )
-        return flac_data
+        return encoded_data
 
     @staticmethod
     def to_convert_rate(sample_rate: int) -> int:
@@ -109,6 +115,7 @@ def create_request_builder(
     key: str | None = None,
     language: str = "en-US",
     filter_level: ProfanityFilterLevel = 0,
+    encoder: AudioEncoder | str | None = None,
 ) -> RequestBuilder:
     if not isinstance(language, str):
         raise ValueError("``language`` must be a string")
@@ -122,6 +129,7 @@ def create_request_builder(
         key=key,
         language=language,
         filter_level=filter_level,
+        encoder=select_encoder(AUDIO_FORMATS, encoder),
     )
 
 
@@ -210,9 +218,12 @@ class OutputParser:
         return best_hypothesis
 
 
-def obtain_transcription(request: Request, timeout: int) -> str:
+def obtain_transcription(request: Request, timeout: int, transport=None) -> str:
     try:
-        response = urlopen(request, timeout=timeout)
+        if transport is not None:
+            response = transport.open(request, timeout=timeout)
+        else:
+            response = urlopen(request, timeout=timeout)
     except HTTPError as e:
         raise RequestError("recognition request failed: {}".format(e.reason))
     except URLError as e:
@@ -244,18 +255,84 @@ def recognize_legacy(
 
     The profanity filter level can be adjusted with ``pfilter``: 0 - No filter, 1 - Only shows the first character and replaces the rest with asterisks. The default is level 0.
 
+    The audio is sent as FLAC, encoded in-process without starting a process per phrase, unless ``recognizer_instance.audio_encoder`` selects another encoder; set it to ``"l16"`` to send uncompressed 16-bit PCM and skip encoding altogether.
+
+    The request is sent through ``recognizer_instance.transport`` if it is set, reusing pooled keep-alive connections, and with ``urlopen`` otherwise.
+
+    If ``recognizer_instance.on_timing`` is set, it is called as ``on_timing("encode", seconds)`` once the audio is encoded and ``on_timing("request", seconds)`` once the API responded.
+
     Returns the most likely transcription if ``show_all`` is false (the default). Otherwise, returns the raw API response as a JSON dictionary.
 
     Raises a ``speech_recognition.UnknownValueError`` exception if the speech is unintelligible. Raises a ``speech_recognition.RequestError`` exception if the speech recognition operation failed, if the key isn't valid, or if there is no internet connection.
     """
     request_builder = create_request_builder(
-        endpoint=endpoint, key=key, language=language, filter_level=pfilter
+        endpoint=endpoint,
+        key=key,
+        language=language,
+        filter_level=pfilter,
+        encoder=getattr(recognizer, "audio_encoder", None),
     )
+    on_timing = getattr(recognizer, "on_timing", None)
+    started = time.perf_counter()
     request = request_builder.build(audio_data)
+    if on_timing is not None:
+        on_timing("encode", time.perf_counter() - started)
+        started = time.perf_counter()
 
     response_text = obtain_transcription(
-        request, timeout=recognizer.operation_timeout
+        request,
+        timeout=recognizer.operation_timeout,
+        transport=getattr(recognizer, "transport", None),
+    )
+    if on_timing is not None:
+        on_timing("request", time.perf_counter() - started)
+
+    output_parser = OutputParser(
+        show_all=show_all, with_confidence=with_confidence
+    )
+    return output_parser.parse(response_text)
+
+
+async def recognize_legacy_async(
+    recognizer,
+    audio_data: AudioData,
+    key: str | None = None,
+    language: str = "en-US",
+    pfilter: ProfanityFilterLevel = 0,
+    show_all: bool = False,
+    with_confidence: bool = False,
+    *,
+    endpoint: str = ENDPOINT,
+):
+    """
+    Coroutine version of ``recognizer_instance.recognize_google``, taking the same arguments and returning the same results.
+
+    The audio is encoded in the event loop's default executor and the request is sent through ``recognizer_instance.async_transport``, so many phrases can be recognized concurrently on one event loop. The request is bounded by ``recognizer_instance.operation_timeout``, and cancelling the coroutine abandons the request.
+    """
+    from speech_recognition.aio import encode_async, send_async
+
+    request_builder = create_request_builder(
+        endpoint=endpoint,
+        key=key,
+        language=language,
+        filter_level=pfilter,
+        encoder=getattr(recognizer, "audio_encoder", None),
+    )
+    if not isinstance(audio_data, AudioData):
+        raise ValueError("``audio_data`` must be audio data")
+    data = await encode_async(
+        request_builder.encoder,
+        audio_data,
+        convert_rate=request_builder.to_convert_rate(audio_data.sample_rate),
+        convert_width=2,
     )
+    request = Request(
+        request_builder.build_url(),
+        data=data,
+        headers=request_builder.build_headers(audio_data),
+    )
+
+    response_text = await send_async(recognizer, request)
 
     output_parser = OutputParser(
         show_all=show_all, with_confidence=with_confidence
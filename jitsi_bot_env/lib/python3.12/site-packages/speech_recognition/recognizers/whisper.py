@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import json
 import os
+import uuid
 from io import BytesIO
+from urllib.request import Request
 
 from speech_recognition.audio import AudioData
-from speech_recognition.exceptions import SetupError
+from speech_recognition.exceptions import RequestError, SetupError
+
+ENDPOINT = "https://api.openai.com/v1/audio/transcriptions"
 
 
 def recognize_whisper_api(
@@ -41,3 +46,53 @@ def recognize_whisper_api(
     client = openai.OpenAI(api_key=api_key)
     transcript = client.audio.transcriptions.create(file=wav_data, model=model)
     return transcript.text
+
+
+async def recognize_whisper_api_async(
+    recognizer,
+    audio_data: "AudioData",
+    *,
+    model: str = "whisper-1",
+    api_key: str | None = None,
+    language: str | None = None,
+    endpoint: str = ENDPOINT,
+):
+    """
+    Coroutine version of ``recognizer_instance.recognize_whisper_api``, which sends the audio to the transcription endpoint directly rather than through the openai module.
+
+    ``endpoint`` can point at any server implementing the OpenAI ``audio/transcriptions`` API, such as a self-hosted Whisper server. ``language`` is an optional ISO-639-1 language code hint.
+
+    The request goes through ``recognizer_instance.async_transport`` and is bounded by ``recognizer_instance.operation_timeout``.
+
+    Raises a ``speech_recognition.exceptions.SetupError`` exception if the API key is missing. Raises a ``speech_recognition.RequestError`` exception if the request failed or timed out.
+    """
+    from speech_recognition.aio import send_async
+
+    if not isinstance(audio_data, AudioData):
+        raise ValueError("``audio_data`` must be an ``AudioData`` instance")
+    if api_key is None:
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if api_key is None:
+            raise SetupError("Set environment variable ``OPENAI_API_KEY``")
+
+    fields = {"model": model, "response_format": "json"}
+    if language is not None:
+        fields["language"] = language
+    boundary = uuid.uuid4().hex
+    parts = [
+        '--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'.format(boundary, name, value).encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append('--{}\r\nContent-Disposition: form-data; name="file"; filename="SpeechRecognition_audio.wav"\r\nContent-Type: audio/wav\r\n\r\n'.format(boundary).encode("utf-8"))
+    parts.append(audio_data.get_wav_data())
+    parts.append("\r\n--{}--\r\n".format(boundary).encode("utf-8"))
+    request = Request(endpoint, data=b"".join(parts), headers={
+        "Authorization": "Bearer {}".format(api_key),
+        "Content-Type": "multipart/form-data; boundary={}".format(boundary),
+    })
+
+    response_text = await send_async(recognizer, request)
+    try:
+        return json.loads(response_text)["text"]
+    except (ValueError, KeyError, TypeError):
+        raise RequestError("unexpected transcription response: {}".format(response_text[:200]))
@@ -0,0 +1,191 @@
+"""
+Streaming sample rate conversion of raw PCM audio.
+
+A ``Resampler`` converts mono little-endian PCM audio from one sample rate to another, one buffer at a time, and keeps its filter state between buffers, so converting a stream buffer by buffer gives the same audio as converting it all at once. ``ResamplingStream`` wraps the stream of an audio source (such as ``Microphone`` or ``AudioFile``) so that it is read at another sample rate; the sources do this themselves when given a ``convert_rate``, so audio can be converted once, as it is captured. ``resample`` converts a single fragment, and is what ``AudioData.get_raw_data`` uses.
+
+With NumPy, the conversion is a polyphase windowed-sinc filter: the rates are reduced to ``outrate / inrate = up / down``, and every output sample is the dot product of the last input samples with one of ``up`` precomputed filter phases. The filter bank of each rate pair is built once and cached, and the output samples of a buffer are computed with a few vectorized operations rather than one at a time. Unlike the linear interpolation of ``speech_recognition.dsp.ratecv``, this removes the frequencies above the new Nyquist frequency before downsampling, so they don't alias into the speech band (such as when converting 44.1 kHz audio to 16 kHz).
+
+Without NumPy, or for rate pairs that would need more than ``MAX_PHASES`` filter phases, the resamplers fall back to ``speech_recognition.dsp.ratecv``, still keeping its state between buffers.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+
+from . import dsp
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_PHASES = 1024  # rate pairs whose reduced output rate is higher than this use ``dsp.ratecv``, since their filter banks would be too large
+
+ZERO_CROSSINGS = 16  # zero crossings of the sinc filter on each side of its centre, at the lower of the two rates
+ROLLOFF = 0.92  # cutoff frequency of the filter, as a fraction of the lower of the two Nyquist frequencies
+KAISER_BETA = 8.6  # Kaiser window parameter; about 80 dB of stopband attenuation
+
+
+def _reduced(inrate, outrate):
+    divisor = math.gcd(inrate, outrate)
+    return outrate // divisor, inrate // divisor
+
+
+@functools.lru_cache(maxsize=16)
+def filter_bank(inrate, outrate):
+    """
+    Returns the polyphase filter bank for converting from ``inrate`` to ``outrate`` Hz, as ``(bank, delay)``. Requires NumPy. Results are cached per rate pair.
+
+    With the rates reduced to ``outrate / inrate = up / down``, ``bank`` is an ``(up, taps)`` array: output sample ``m`` is the dot product of row ``(m * down + delay) % up`` with the ``taps`` input samples ending at sample ``(m * down + delay) // up``. ``delay`` is the delay of the filter at the upsampled rate, which the resamplers compensate for, so the output is aligned with the input.
+    """
+    up, down = _reduced(inrate, outrate)
+    spacing = max(up, down) / ROLLOFF  # upsampled samples between zero crossings of the sinc
+    delay = int(math.ceil(ZERO_CROSSINGS * spacing))
+    indices = np.arange(2 * delay + 1) - delay
+    prototype = np.sinc(indices / spacing) * np.kaiser(2 * delay + 1, KAISER_BETA) * up / spacing  # low-pass at the cutoff, with a gain of ``up`` to make up for the inserted zeros
+    taps = -(-len(prototype) // up)
+    padded = np.zeros(up * taps)
+    padded[:len(prototype)] = prototype
+    bank = padded.reshape(taps, up).T[:, ::-1].copy()  # row ``p`` holds taps ``p, p + up, p + 2 * up, ...``, oldest input sample first
+    bank.setflags(write=False)
+    return bank, delay
+
+
+class Resampler(object):
+    """
+    Converts mono little-endian PCM audio of ``sample_width`` bytes per sample (signed; apply ``dsp.bias`` to 8-bit audio first, as for the ``dsp`` operations) from ``inrate`` to ``outrate`` Hz, keeping state between buffers.
+
+    Pass each buffer to ``process``, which returns the audio converted so far; the filter holds back the last few samples until it has seen the samples after them. ``flush`` returns the rest once the input has ended, and resets the resampler for the next stream. In total, ``n`` input samples give ``ceil(n * outrate / inrate)`` output samples, however the input is split into buffers.
+    """
+
+    def __init__(self, inrate, outrate, sample_width):
+        assert isinstance(inrate, int) and inrate > 0 and isinstance(outrate, int) and outrate > 0, "Sample rates must be positive integers"
+        assert sample_width in (1, 2, 3, 4), "Sample width must be between 1 and 4 inclusive"
+        self.inrate = inrate
+        self.outrate = outrate
+        self.sample_width = sample_width
+        self.up, self.down = _reduced(inrate, outrate)
+        self.polyphase = np is not None and self.up <= MAX_PHASES  # whether the polyphase filter is used, rather than ``dsp.ratecv``
+        if self.polyphase:
+            self.bank, self.delay = filter_bank(inrate, outrate)
+        self.reset()
+
+    def reset(self):
+        """Forgets the audio seen so far, to start converting another stream."""
+        self.input_count = 0  # input samples processed since the last reset
+        self.output_count = 0  # output samples returned since the last reset
+        if self.polyphase:
+            taps = self.bank.shape[1]
+            self._history = np.zeros(taps - 1)  # the last input samples, which the next output samples still depend on
+            self._position = (taps - 1) * self.up + self.delay  # position of the next output sample at the upsampled rate, counted from the start of ``_history``
+        else:
+            self._state = None
+
+    def _samples(self, fragment):
+        if self.sample_width == 3:
+            return np.frombuffer(dsp.lin2lin(fragment, 3, 4), dtype="<i4").astype(np.float64) / 256
+        return np.frombuffer(fragment, dtype={1: "i1", 2: "<i2", 4: "<i4"}[self.sample_width]).astype(np.float64)
+
+    def _fragment(self, samples):
+        bound = 1 << (8 * self.sample_width - 1)
+        samples = np.clip(np.rint(samples), -bound, bound - 1).astype(np.int64)
+        if self.sample_width == 3:
+            return dsp.lin2lin((samples << 8).astype("<i4").tobytes(), 4, 3)
+        return samples.astype({1: "i1", 2: "<i2", 4: "<i4"}[self.sample_width]).tobytes()
+
+    def _filter(self, samples, limit=None):
+        """Appends ``samples`` to the history and returns every output sample that can now be computed (at most ``limit`` of them)."""
+        signal = np.concatenate((self._history, samples))
+        count = max(0, (len(signal) * self.up - 1 - self._position) // self.down + 1)
+        if limit is not None:
+            count = min(count, limit)
+        taps = self.bank.shape[1]
+        windows = np.lib.stride_tricks.sliding_window_view(signal, taps)  # ``windows[n]`` holds the input samples that output samples at ``n + taps - 1`` depend on
+        if count < 8 * self.up:  # few outputs per phase, as for a short buffer: gather the window and phase of each output at once
+            positions = self._position + np.arange(count, dtype=np.int64) * self.down
+            output = np.einsum("ij,ij->i", windows[positions // self.up - (taps - 1)], self.bank[positions % self.up])
+        else:  # every ``up``-th output sample uses the same phase, with windows ``down`` samples apart: one matrix-vector product per phase, on a strided view of the input
+            output = np.empty(count)
+            for first in range(self.up):
+                position = self._position + first * self.down
+                output[first::self.up] = windows[position // self.up - (taps - 1)::self.down][:len(range(first, count, self.up))] @ self.bank[position % self.up]
+
+        consumed = len(signal) - len(self._history)
+        self._history = signal[consumed:]
+        self._position += count * self.down - consumed * self.up
+        return output
+
+    def process(self, fragment):
+        """Converts the next buffer of the stream and returns the converted audio that is ready, as bytes."""
+        if len(fragment) % self.sample_width != 0:
+            raise ValueError("not a whole number of frames")
+        self.input_count += len(fragment) // self.sample_width
+        if not self.polyphase:
+            converted, self._state = dsp.ratecv(fragment, self.sample_width, 1, self.inrate, self.outrate, self._state)
+            self.output_count += len(converted) // self.sample_width
+            return converted
+        if not fragment:
+            return b""
+        output = self._filter(self._samples(fragment))
+        self.output_count += len(output)
+        return self._fragment(output)
+
+    def flush(self):
+        """Returns the rest of the converted audio after the last buffer, and resets the resampler."""
+        remaining = -(-self.input_count * self.up // self.down) - self.output_count
+        output = b""
+        if self.polyphase and remaining > 0:  # feed silence until the last output samples can be computed
+            last_needed = ((self.output_count + remaining - 1) * self.down + self.delay) // self.up
+            output = self._fragment(self._filter(np.zeros(last_needed - self.input_count + 1), remaining))
+        self.reset()
+        return output
+
+
+def resample(fragment, sample_width, inrate, outrate):
+    """Converts a whole fragment of mono little-endian PCM audio from ``inrate`` to ``outrate`` Hz with a ``Resampler``."""
+    if inrate == outrate:
+        return fragment
+    resampler = Resampler(inrate, outrate, sample_width)
+    return resampler.process(fragment) + resampler.flush()
+
+
+class ResamplingStream(object):
+    """
+    Wraps the ``stream`` of an audio source, whose audio is mono little-endian PCM of ``sample_width`` bytes per sample at ``inrate`` Hz, so that reading it returns the audio converted to ``outrate`` Hz. As with the audio sources, 8-bit audio is unsigned.
+
+    ``read(size)`` returns ``size`` frames at the new rate, reading as much of the wrapped stream as it needs (fewer frames only once the wrapped stream has ended). ``read()`` with no size converts the rest of the wrapped stream.
+    """
+
+    def __init__(self, stream, inrate, outrate, sample_width):
+        self.stream = stream
+        self.sample_width = sample_width
+        self.resampler = Resampler(inrate, outrate, sample_width) if inrate != outrate else None
+        self.pending = b""  # converted audio not returned yet
+        self.ended = False
+
+    def _convert(self, buffer):
+        if self.resampler is None:
+            return buffer
+        if self.sample_width == 1:  # make unsigned samples signed for the resampler, and unsigned again after
+            return dsp.bias(self.resampler.process(dsp.bias(buffer, 1, -128)) if buffer else self.resampler.flush(), 1, 128)
+        return self.resampler.process(buffer) if buffer else self.resampler.flush()
+
+    def read(self, size=-1):
+        if size == -1:
+            buffer = self.stream.read(-1)
+            data = self.pending + self._convert(buffer) + (self._convert(b"") if buffer else b"")
+            self.pending = b""
+            self.ended = True
+            return data
+        needed = size * self.sample_width
+        while len(self.pending) < needed and not self.ended:
+            missing = (needed - len(self.pending)) // self.sample_width
+            buffer = self.stream.read(missing if self.resampler is None else -(-missing * self.resampler.down // self.resampler.up))
+            self.ended = not buffer
+            self.pending += self._convert(buffer)
+        data, self.pending = self.pending[:needed], self.pending[needed:]
+        return data
+
+    def close(self):
+        self.stream.close()
@@ -0,0 +1,258 @@
+"""
+Shared HTTP transport for the recognition backends.
+
+By default every ``recognizer_instance.recognize_*`` call goes through ``urllib.request.urlopen``, which opens a new connection (and does a new TLS handshake) for every phrase. Setting ``recognizer_instance.transport`` to an ``HTTPTransport`` instance makes those calls go through persistent keep-alive connections instead, pooled per endpoint and shared by every thread using the recognizer.
+
+The transport accepts the same ``urllib.request.Request`` objects as ``urlopen`` and raises the same ``HTTPError`` and ``URLError`` exceptions, so the backends handle its errors exactly as before.
+"""
+
+from __future__ import annotations
+
+import collections
+import http.client
+import io
+import random
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)  # HTTP statuses considered transient
+
+
+def _unpack_request(request):
+    """Returns the ``(method, url, body, headers)`` of a ``urllib.request.Request`` instance."""
+    body = request.data
+    headers = dict(request.header_items())
+    if body is not None and hasattr(body, "read"):  # read file bodies up front so that they can be resent on retries
+        body = body.read()
+        headers.pop("Transfer-encoding", None)
+    if body is not None and "Content-type" not in headers:
+        headers["Content-type"] = "application/x-www-form-urlencoded"  # same default as ``urlopen``
+    return request.get_method(), request.full_url, body, headers
+
+
+def _pool_key(url):
+    """Returns the ``(scheme, host, port)`` endpoint of ``url`` and the path to request from it."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise URLError("unsupported URL scheme: {}".format(parts.scheme))
+    key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return key, path
+
+
+class TransportResponse(object):
+    """
+    A fully read HTTP response, with the interface of the responses returned by ``urlopen``.
+
+    ``timing`` is a dictionary with the timings of the request in seconds: ``connect`` (0 when an existing connection was reused), ``wait`` (from sending the request until the response headers arrived), ``read`` and ``total``, as well as the number of ``attempts`` and whether the connection was ``reused``.
+    """
+
+    def __init__(self, url, status, reason, headers, body, timing):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.timing = timing
+        self._body = io.BytesIO(body)
+
+    def read(self, amount=-1):
+        return self._body.read(amount)
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _HostPool(object):
+    """Idle keep-alive connections to one endpoint, and a semaphore bounding the number of connections open to it."""
+
+    def __init__(self, max_connections):
+        self.idle = []  # list of (connection, time it was returned to the pool), most recently used last
+        self.slots = threading.BoundedSemaphore(max_connections)
+
+
+class HTTPTransport(object):
+    """
+    Sends recognition requests over pooled, persistent HTTP/1.1 connections.
+
+    Connections are pooled per endpoint (scheme, host and port). At most ``max_connections_per_host`` connections are open to one endpoint and at most ``max_concurrency`` requests are in flight in total; callers beyond these limits wait for a slot. Connections idle for longer than ``idle_timeout`` seconds are closed instead of being reused.
+
+    Requests that fail with a connection error, or with one of the ``retry_statuses``, are retried up to ``retries`` times, waiting ``backoff * 2 ** attempt`` seconds (capped at ``backoff_max``, with jitter) between attempts. A request that fails because the server closed an idle keep-alive connection is resent on a fresh connection immediately, without counting as a retry.
+
+    Unlike ``urlopen``, the transport does not use the proxies configured in the environment.
+    """
+
+    def __init__(self, max_connections_per_host=4, max_concurrency=8, retries=2, backoff=0.25, backoff_max=4, retry_statuses=RETRY_STATUSES, idle_timeout=60, history_size=1000):
+        assert max_connections_per_host >= 1 and max_concurrency >= 1, "Connection limits must be positive"
+        assert retries >= 0, "``retries`` must be a non-negative integer"
+        self.max_connections_per_host = max_connections_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idle_timeout = idle_timeout
+
+        self._pools = {}  # (scheme, host, port) -> _HostPool
+        self._lock = threading.Lock()
+        self._concurrency = threading.BoundedSemaphore(max_concurrency)
+
+        self.stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0, "retries": 0, "errors": 0}
+        self.history = collections.deque(maxlen=history_size)  # ``timing`` of the most recent requests, oldest first
+        self._stats_lock = threading.Lock()
+
+    def open(self, request, timeout=None):
+        """Sends ``request`` (a ``urllib.request.Request`` instance) like ``urlopen(request, timeout=timeout)``, and returns a ``TransportResponse``. Raises ``HTTPError`` for unsuccessful HTTP statuses and ``URLError`` for connection failures."""
+        return self.request(*_unpack_request(request), timeout=timeout)
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        """Sends an HTTP request to ``url`` and returns a ``TransportResponse``. Raises ``HTTPError`` for unsuccessful HTTP statuses and ``URLError`` for connection failures."""
+        key, path = _pool_key(url)
+        headers = headers or {}
+
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _HostPool(self.max_connections_per_host)
+
+        attempt = 0
+        with self._concurrency:
+            while True:
+                try:
+                    response = self._send(key, pool, method, path, body, headers, timeout)
+                except (OSError, http.client.HTTPException) as e:
+                    error = e
+                else:
+                    response.url = url
+                    response.timing["attempts"] = attempt + 1
+                    if response.status not in self.retry_statuses or attempt >= self.retries:
+                        self._record(response.timing, error=response.status >= 400)
+                        if response.status >= 400:
+                            raise HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(response.read()))
+                        return response
+                    error = None
+
+                if attempt >= self.retries:
+                    self._record(None, error=True)
+                    raise URLError(error if isinstance(error, OSError) else str(error))
+                self._count("retries")
+                time.sleep(self._backoff_delay(attempt))
+                attempt += 1
+
+    def _send(self, key, pool, method, path, body, headers, timeout):
+        """Sends one attempt of a request over a pooled connection, and returns the fully read response."""
+        with pool.slots:
+            started = time.perf_counter()
+            connection, reused = self._checkout(key, pool, timeout)
+            try:
+                connected = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    if not reused:
+                        raise
+                    # the server closed the idle connection before we used it, try again on a new one
+                    connection.close()
+                    connection, reused = self._connect(key, timeout), False
+                    connected = time.perf_counter()
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                responded = time.perf_counter()
+                data = response.read()
+                finished = time.perf_counter()
+            except BaseException:
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    pool.idle.append((connection, time.monotonic()))
+
+        timing = {
+            "connect": connected - started,
+            "wait": responded - connected,
+            "read": finished - responded,
+            "total": finished - started,
+            "reused": reused,
+        }
+        return TransportResponse(None, response.status, response.reason, response.msg, data, timing)
+
+    def _checkout(self, key, pool, timeout):
+        """Returns an idle connection to the endpoint if a fresh enough one exists, or a new connection otherwise, as a ``(connection, reused)`` tuple."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not pool.idle:
+                    break
+                connection, returned = pool.idle.pop()
+            if self.idle_timeout is not None and now - returned > self.idle_timeout:
+                connection.close()
+                continue
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            self._count("connections_reused")
+            return connection, True
+        return self._connect(key, timeout), False
+
+    def _connect(self, key, timeout):
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(host, port, timeout=timeout)
+        connection.connect()  # connect eagerly so that ``timing["connect"]`` includes the handshakes
+        self._count("connections_opened")
+        return connection
+
+    def _backoff_delay(self, attempt):
+        delay = min(self.backoff_max, self.backoff * 2 ** attempt)
+        return delay * random.uniform(0.5, 1)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _record(self, timing, error):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            if error:
+                self.stats["errors"] += 1
+            if timing is not None:
+                self.history.append(timing)
+
+    def timing_summary(self):
+        """Returns the mean and maximum of each timing in ``history``, as a dictionary like ``{"total": {"mean": ..., "max": ...}, ...}``."""
+        with self._stats_lock:
+            history = list(self.history)
+        summary = {}
+        for name in ("connect", "wait", "read", "total"):
+            values = [timing[name] for timing in history]
+            summary[name] = {"mean": sum(values) / len(values), "max": max(values)} if values else {"mean": None, "max": None}
+        return summary
+
+    def close(self):
+        """Closes every idle connection. The transport can still be used afterwards; new connections are opened as needed."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for connection, _ in pool.idle:
+                connection.close()
@@ -0,0 +1,126 @@
+"""
+Voice activity detectors that ``recognizer_instance.listen`` can use instead of the energy threshold to decide which buffers are speech.
+
+Set ``recognizer_instance.vad`` to a ``VoiceActivityDetector`` to use one; ``None`` (the default) keeps the energy threshold. The detector sees every buffer ``listen`` reads, in order, and decides whether it is speech. Only the detector starts a phrase; within a phrase, buffers above the energy threshold also count as speech, as they do without a detector, so the phrase isn't split by loud audio between sentences. The energy threshold is still kept up to date, so switching back to it later works as before.
+
+``SpectralVAD`` is the built-in detector. It rejects loud audio that doesn't look like speech, such as typing, clicks and music, which would otherwise start a phrase and cost a recognition request.
+"""
+
+from __future__ import annotations
+
+from . import dsp
+from .noise_floor import NoiseFloorTracker
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class VoiceActivityDetector(object):
+    """Base class for voice activity detectors. Subclasses implement ``is_speech``, and ``reset`` if they keep state."""
+
+    def is_speech(self, buffer, sample_rate, sample_width, energy):
+        """Returns whether ``buffer`` (raw little-endian PCM as read from the audio source) contains speech. ``energy`` is the RMS energy of the buffer, as computed for the energy threshold."""
+        raise NotImplementedError("this is an abstract class")
+
+    def reset(self):
+        """Forgets the state kept from the audio seen so far, for example when switching to another source."""
+
+
+class SpectralVAD(VoiceActivityDetector):
+    """
+    Frame-level voice activity detector combining energy, zero-crossing rate and band-energy ratio, with onset and hangover smoothing. Requires NumPy.
+
+    Each buffer is split into frames of ``frame_duration`` seconds (samples left over are carried into the next buffer), and all frames of a buffer are analysed at once. A frame looks like speech when all of these hold:
+
+    * its RMS energy is above the noise floor times ``energy_ratio``. The noise floor is followed by a ``NoiseFloorTracker`` fed with the buffers judged not to be speech, and never goes below ``minimum_energy``.
+    * its zero-crossing rate (crossings per sample) is at most ``max_zero_crossing_rate``. Broadband noise, such as keyboard clicks and hiss, crosses zero far more often than voiced speech.
+    * at least ``min_band_ratio`` of its energy lies in the voice band, ``band`` (in Hz).
+
+    Frames only count as speech after ``onset_frames`` speech-like frames in a row, which rejects clicks and other short transients, and stay speech for ``hangover_frames`` frames after the last such run, which bridges short gaps and unvoiced sounds within words. A buffer is speech if any of its frames is.
+    """
+
+    def __init__(self, frame_duration=0.02, energy_ratio=2.0, minimum_energy=50, max_zero_crossing_rate=0.25, band=(250, 4000), min_band_ratio=0.6, onset_frames=3, hangover_frames=15):
+        if np is None:
+            raise RuntimeError("SpectralVAD requires NumPy")
+        assert frame_duration > 0, "``frame_duration`` must be positive"
+        assert onset_frames >= 1 and hangover_frames >= 0, "``onset_frames`` must be at least 1 and ``hangover_frames`` at least 0"
+        assert 0 <= band[0] < band[1], "``band`` must be a (low, high) pair of frequencies"
+        self.frame_duration = frame_duration
+        self.energy_ratio = energy_ratio
+        self.minimum_energy = minimum_energy
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.band = band
+        self.min_band_ratio = min_band_ratio
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_tracker = NoiseFloorTracker(ratio=self.energy_ratio, minimum_threshold=self.minimum_energy)
+        self._leftover = np.zeros(0)  # samples after the last whole frame of the previous buffer
+        self._raw_history = np.zeros(self.onset_frames - 1, dtype=bool)  # speech-like flags of the last frames, for the onset rule
+        self._onset_history = np.zeros(self.hangover_frames, dtype=bool)  # onset flags of the last frames, for the hangover rule
+        self.frames_seen = 0
+        self.speech_frames = 0
+        self.loud_frames_rejected = 0  # frames above the energy threshold that didn't look like speech
+
+    def _samples(self, buffer, sample_width):
+        if sample_width == 1:  # 8-bit audio is unsigned
+            buffer = dsp.bias(buffer, 1, -128)
+        return np.frombuffer(dsp.lin2lin(buffer, sample_width, 2), dtype="<i2").astype(np.float64)
+
+    def features(self, frames, sample_rate):
+        """Returns the RMS energy, zero-crossing rate and voice band energy ratio of each row of ``frames``, as three arrays."""
+        energies = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zero_crossing_rates = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        spectra = np.abs(np.fft.rfft(frames * np.hanning(frames.shape[1]), axis=1)) ** 2
+        frequencies = np.fft.rfftfreq(frames.shape[1], 1.0 / sample_rate)
+        in_band = (frequencies >= self.band[0]) & (frequencies <= self.band[1])
+        totals = spectra[:, 1:].sum(axis=1)  # leave out DC
+        band_ratios = np.divide(spectra[:, in_band].sum(axis=1), totals, out=np.zeros_like(totals), where=totals > 0)
+        return energies, zero_crossing_rates, band_ratios
+
+    def is_speech(self, buffer, sample_rate, sample_width, energy):
+        seconds = len(buffer) / float(sample_width * sample_rate)
+        if self.noise_floor_tracker.threshold is None:  # start the noise floor from the first buffer
+            self.noise_floor_tracker.update(energy, seconds, False)
+
+        samples = np.concatenate((self._leftover, self._samples(buffer, sample_width)))
+        frame_length = max(2, int(sample_rate * self.frame_duration))
+        frame_count = len(samples) // frame_length
+        self._leftover = samples[frame_count * frame_length:]
+        if frame_count == 0:
+            return bool(self._onset_history.any())  # too little audio to decide: still speech if an onset happened within the hangover
+        frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+
+        energies, zero_crossing_rates, band_ratios = self.features(frames, sample_rate)
+        loud = energies > self.noise_floor_tracker.threshold
+        raw = loud & (zero_crossing_rates <= self.max_zero_crossing_rate) & (band_ratios >= self.min_band_ratio)
+
+        # onset: the frame ends a run of ``onset_frames`` speech-like frames; hangover: an onset happened within the last ``hangover_frames`` frames
+        raw_run = np.concatenate((self._raw_history, raw))
+        onsets = np.convolve(raw_run, np.ones(self.onset_frames, dtype=int), "valid") == self.onset_frames
+        onset_run = np.concatenate((self._onset_history, onsets))
+        speech = np.convolve(onset_run, np.ones(self.hangover_frames + 1, dtype=int), "valid") > 0
+        self._raw_history = raw_run[len(raw_run) - (self.onset_frames - 1):]
+        self._onset_history = onset_run[len(onset_run) - self.hangover_frames:]
+
+        is_speech = bool(speech.any())
+        self.frames_seen += frame_count
+        self.speech_frames += int(speech.sum())
+        self.loud_frames_rejected += int((loud & ~raw).sum())
+        self.noise_floor_tracker.update(energy, seconds, is_speech)
+        return is_speech
+
+    def state(self):
+        """Returns a snapshot of the detector state as a dictionary."""
+        return {
+            "noise_floor": self.noise_floor_tracker.noise_floor,
+            "energy_threshold": self.noise_floor_tracker.threshold,
+            "frames_seen": self.frames_seen,
+            "speech_frames": self.speech_frames,
+            "loud_frames_rejected": self.loud_frames_rejected,
+        }
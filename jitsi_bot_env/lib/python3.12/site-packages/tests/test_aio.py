@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+import asyncio
+import io
+import json
+import threading
+import time
+import unittest
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import speech_recognition as sr
+from speech_recognition.aio import AsyncHTTPTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.requests.append((self.path, self.headers, body))
+            server.client_ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.statuses.pop(0) if server.statuses else 200
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        payload = server.payload.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if server.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(payload), 7):
+                chunk = payload[start:start + 7]
+                self.wfile.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_wav(seconds, sample_rate=16000):
+    """Half-second tone bursts separated by two seconds of silence, as an in-memory WAV file."""
+    import math
+    frames = bytearray()
+    for i in range(int(seconds * sample_rate)):
+        in_burst = (i / sample_rate) % 2.5 < 0.5
+        frames += int(8000 * math.sin(i / 5.0) if in_burst else 0).to_bytes(2, "little", signed=True)
+    wav_file = io.BytesIO()
+    with wave.open(wav_file, "wb") as wav_writer:
+        wav_writer.setnchannels(1)
+        wav_writer.setsampwidth(2)
+        wav_writer.setframerate(sample_rate)
+        wav_writer.writeframes(bytes(frames))
+    wav_file.seek(0)
+    return wav_file
+
+
+class TestAsyncRecognition(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests, self.server.client_ports, self.server.statuses = [], set(), []
+        self.server.in_flight = self.server.max_in_flight = 0
+        self.server.delay = 0
+        self.server.chunked = False
+        self.server.payload = json.dumps({"text": "hello"})
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{}/v1/audio/transcriptions".format(self.server.server_address[1])
+
+        self.recognizer = sr.Recognizer()
+        self.recognizer.async_transport = AsyncHTTPTransport(max_connections_per_host=4, max_concurrency=4, backoff=0.01)
+        self.audio = sr.AudioData(b"\x00\x01" * 1600, 16000, 2)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def asyncTearDown(self):
+        self.recognizer.async_transport.close()
+
+    async def test_concurrent_requests_share_connections(self):
+        self.server.delay = 0.05
+        results = await asyncio.gather(*[self.recognizer.recognize_http_async(self.audio, self.url) for _ in range(12)])
+        self.assertEqual(results, ["hello"] * 12)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+        self.assertLessEqual(len(self.server.client_ports), 4)
+        self.assertEqual(self.recognizer.async_transport.stats["requests"], 12)
+        path, headers, body = self.server.requests[0]
+        self.assertEqual(headers["Content-Type"], "audio/wav")
+        self.assertEqual(body[:4], b"RIFF")
+
+    async def test_chunked_response_and_retry(self):
+        self.server.chunked = True
+        self.server.statuses = [503]
+        self.assertEqual(await self.recognizer.recognize_http_async(self.audio, self.url, encoder="l16", headers={"X-Test": "1"}), "hello")
+        self.assertEqual(self.recognizer.async_transport.stats["retries"], 1)
+        self.assertEqual(self.server.requests[-1][1]["Content-Type"], "audio/l16; rate=16000")
+        self.assertEqual(self.server.requests[-1][1]["X-Test"], "1")
+
+        self.server.payload = json.dumps({"text": ""})
+        with self.assertRaises(sr.UnknownValueError):
+            await self.recognizer.recognize_http_async(self.audio, self.url)
+
+    async def test_timeout_and_cancellation(self):
+        self.server.delay = 0.5
+        self.recognizer.operation_timeout = 0.1
+        self.recognizer.async_transport.retries = 0
+        with self.assertRaises(sr.RequestError):
+            await self.recognizer.recognize_http_async(self.audio, self.url)
+
+        self.recognizer.operation_timeout = None
+        task = asyncio.ensure_future(self.recognizer.recognize_http_async(self.audio, self.url))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.recognizer.async_transport._pools[("http", "127.0.0.1", self.server.server_address[1])].idle, [])
+
+    async def test_google_and_whisper_api(self):
+        self.server.payload = '{"result":[]}\n' + json.dumps({"result": [{"alternative": [{"transcript": "one two three"}], "final": True}], "result_index": 0})
+        self.assertEqual(await self.recognizer.recognize_google_async(self.audio, endpoint=self.url), "one two three")
+        self.assertEqual(self.server.requests[-1][1]["Content-Type"], "audio/x-flac; rate=16000")
+        self.assertEqual(self.server.requests[-1][2][:4], b"fLaC")
+
+        self.server.payload = json.dumps({"text": "bonjour"})
+        self.assertEqual(await self.recognizer.recognize_whisper_api_async(self.audio, api_key="key", language="fr", endpoint=self.url), "bonjour")
+        path, headers, body = self.server.requests[-1]
+        self.assertEqual(headers["Authorization"], "Bearer key")
+        self.assertIn(b'name="language"\r\n\r\nfr\r\n', body)
+        self.assertIn(b"RIFF", body)
+
+        self.server.statuses = [401]
+        with self.assertRaises(sr.RequestError):
+            await self.recognizer.recognize_whisper_api_async(self.audio, api_key="key", endpoint=self.url)
+
+    async def test_alisten(self):
+        with sr.AudioFile(make_wav(7)) as source:
+            phrases = [phrase async for phrase in self.recognizer.alisten(source)]
+        self.assertEqual(len(phrases), 3)
+        for phrase in phrases:
+            self.assertGreater(len(phrase.frame_data), 0)
+
+        with sr.AudioFile(make_wav(1)) as source:
+            with self.assertRaises(sr.WaitTimeoutError):
+                async for phrase in self.recognizer.alisten(source, timeout=0.2, poll_interval=0.1):
+                    pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -142,5 +142,57 @@ class TestAudioFile(unittest.TestCase):
             self.assertSimilar(audio.get_raw_data()[:32], b"\x00\x00\x00\x00\x00\x00\xfe\xff\x00\x00\x02\x00\x00\x00\xfe\xff\x00\x00\x00\x00\x00\xff\x01\x00\x00\x02\xfc\xff\x00\xfe\x01\x00")
 
 
+class TestAudioData(unittest.TestCase):
+    def setUp(self):
+        self.frames = bytes(range(256)) * 64  # 0.512 seconds of 16-bit audio at 16 kHz
+        self.audio = sr.AudioData(self.frames, 16000, 2)
+
+    def test_buffer_frame_data(self):
+        for frame_data in (bytearray(self.frames), memoryview(self.frames)):
+            audio = sr.AudioData(frame_data, 16000, 2)
+            self.assertEqual(audio.frame_data, self.frames)
+            self.assertIsInstance(audio.frame_data, bytes)
+            self.assertEqual(audio.get_wav_data(convert_rate=8000), self.audio.get_wav_data(convert_rate=8000))
+        self.assertIs(self.audio.frame_data, self.frames)
+
+    def test_segments_are_views(self):
+        segment = self.audio.get_segment(100, 300).get_segment(50)
+        self.assertIs(segment.frame_view.obj, self.frames)
+        self.assertEqual(segment.frame_data, self.frames[(150 * 16000 * 2) // 1000:(300 * 16000 * 2) // 1000])
+        self.assertEqual(segment.get_raw_data(convert_width=1), sr.AudioData(segment.frame_data, 16000, 2).get_raw_data(convert_width=1))
+
+    def test_conversions_are_cached(self):
+        wav_data = self.audio.get_wav_data(convert_rate=8000)
+        self.assertIs(self.audio.get_wav_data(convert_rate=8000), wav_data)
+        self.assertIsNot(self.audio.get_wav_data(convert_rate=8000, convert_width=1), wav_data)
+        self.assertIs(self.audio.get_raw_data(convert_rate=16000, convert_width=2), self.audio.get_raw_data())  # no conversion is the frame data itself
+        self.assertIs(self.audio.get_wav_data(16000, 2), self.audio.get_wav_data())
+
+    def test_cache_is_bounded(self):
+        self.audio.conversion_cache_size = 2
+        first = self.audio.get_raw_data(convert_rate=8000)
+        self.audio.get_raw_data(convert_rate=11025)
+        self.assertIs(self.audio.get_raw_data(convert_rate=8000), first)  # now the most recently used
+        self.audio.get_raw_data(convert_rate=22050)  # drops 11025 Hz
+        self.assertIs(self.audio.get_raw_data(convert_rate=8000), first)
+        self.audio.get_raw_data(convert_rate=32000)
+        self.audio.get_raw_data(convert_rate=44100)
+        self.assertIsNot(self.audio.get_raw_data(convert_rate=8000), first)
+        self.assertEqual(self.audio.get_raw_data(convert_rate=8000), first)
+
+    def test_8_bit_audio_comes_out_signed(self):
+        audio = sr.AudioData(bytes([0, 128, 255, 10]), 8000, 1)
+        for _ in range(2):  # computed, then cached
+            self.assertEqual(audio.get_raw_data(), bytes([128, 0, 127, 138]))
+            self.assertEqual(audio.get_raw_data(convert_width=1), bytes([0, 128, 255, 10]))
+            self.assertEqual(audio.get_aiff_data()[-4:], bytes([128, 0, 127, 138]))
+            self.assertEqual(audio.get_aiff_data(convert_width=1)[-4:], bytes([0, 128, 255, 10]))
+
+    def test_setting_frame_data_clears_cache(self):
+        wav_data = self.audio.get_wav_data()
+        self.audio.frame_data = self.frames[::-1]
+        self.assertNotEqual(self.audio.get_wav_data(), wav_data)
+
+
 if __name__ == "__main__":
     unittest.main()
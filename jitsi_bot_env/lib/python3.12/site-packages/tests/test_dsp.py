@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+import warnings
+
+from speech_recognition import dsp
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # removed in Python 3.13
+        audioop = None
+
+
+def random_fragment(rng, sample_count, sample_width):
+    return bytes(rng.getrandbits(8) for _ in range(sample_count * sample_width))
+
+
+class DSPBackendTests(object):
+    backend_name = None
+
+    def setUp(self):
+        try:
+            self.backend = dsp.get_backend(self.backend_name)
+        except RuntimeError as e:
+            self.skipTest(str(e))
+        self.reference = dsp.get_backend("python")
+
+    def test_matches_audioop(self):
+        if audioop is None:
+            self.skipTest("requires audioop to compare against")
+        rng = random.Random(0)
+        for sample_width in (1, 2, 3, 4):
+            for sample_count in (0, 2, 1024, 3001 * 2):
+                fragment = random_fragment(rng, sample_count, sample_width)
+                other = random_fragment(rng, sample_count, sample_width)
+                self.assertEqual(self.backend.rms(fragment, sample_width), audioop.rms(fragment, sample_width))
+                self.assertEqual(self.backend.bias(fragment, sample_width, -128), audioop.bias(fragment, sample_width, -128))
+                self.assertEqual(self.backend.byteswap(fragment, sample_width), audioop.byteswap(fragment, sample_width))
+                self.assertEqual(self.backend.tomono(fragment, sample_width, 0.3, -1.7), audioop.tomono(fragment, sample_width, 0.3, -1.7))
+                self.assertEqual(self.backend.add(fragment, other, sample_width), audioop.add(fragment, other, sample_width))
+                for new_width in (1, 2, 3, 4):
+                    self.assertEqual(self.backend.lin2lin(fragment, sample_width, new_width), audioop.lin2lin(fragment, sample_width, new_width))
+
+    def test_ratecv_matches_audioop_across_fragments(self):
+        if audioop is None:
+            self.skipTest("requires audioop to compare against")
+        rng = random.Random(1)
+        fragments = [random_fragment(rng, count, 2) for count in (1000, 1, 4096, 0, 777)]
+        for inrate, outrate in ((44100, 16000), (16000, 44100), (48000, 16000), (16000, 16000)):
+            for weights in ((1, 0), (3, 2)):
+                state, expected_state = None, None
+                for fragment in fragments:
+                    converted, state = self.backend.ratecv(fragment, 2, 1, inrate, outrate, state, *weights)
+                    expected, expected_state = audioop.ratecv(fragment, 2, 1, inrate, outrate, expected_state, *weights)
+                    self.assertEqual(converted, expected)
+                    self.assertEqual(state, expected_state)
+
+    def test_matches_python_backend(self):
+        rng = random.Random(2)
+        fragment = random_fragment(rng, 2048, 3)
+        self.assertEqual(self.backend.rms(fragment, 3), self.reference.rms(fragment, 3))
+        self.assertEqual(self.backend.lin2lin(fragment, 3, 2), self.reference.lin2lin(fragment, 3, 2))
+        self.assertEqual(self.backend.bias(fragment, 3, 1 << 23), self.reference.bias(fragment, 3, 1 << 23))
+        self.assertEqual(self.backend.tomono(fragment, 3, 1, 1), self.reference.tomono(fragment, 3, 1, 1))
+        self.assertEqual(
+            self.backend.ratecv(fragment, 3, 2, 22050, 16000, None),
+            self.reference.ratecv(fragment, 3, 2, 22050, 16000, None),
+        )
+
+    def test_known_values(self):
+        samples = b"".join(value.to_bytes(2, "little", signed=True) for value in (3, -4, 32767, -32768))
+        self.assertEqual(self.backend.rms(samples[:4], 2), 3)  # sqrt((9 + 16) / 2) = 3.53..., truncated
+        self.assertEqual(self.backend.add(samples[4:], samples[4:], 2), b"\xff\x7f\x00\x80")  # clipped
+        self.assertEqual(self.backend.bias(b"\xff\x00", 1, 1), b"\x00\x01")  # wraps around
+        self.assertEqual(self.backend.lin2lin(b"\xff\xff", 2, 1), b"\xff")  # -1 >> 8 rounds down
+        self.assertEqual(self.backend.byteswap(b"\x01\x02\x03\x04\x05\x06", 3), b"\x03\x02\x01\x06\x05\x04")
+
+    def test_rejects_partial_frames(self):
+        with self.assertRaises(ValueError):
+            self.backend.rms(b"\x00\x00\x00", 2)
+        with self.assertRaises(ValueError):
+            self.backend.tomono(b"\x00\x00", 2, 1, 1)
+        with self.assertRaises(ValueError):
+            self.backend.add(b"\x00\x00", b"\x00\x00\x00\x00", 2)
+
+
+class TestNumpyBackend(DSPBackendTests, unittest.TestCase):
+    backend_name = "numpy"
+
+
+class TestPythonBackend(DSPBackendTests, unittest.TestCase):
+    backend_name = "python"
+
+
+class TestBackendSelection(unittest.TestCase):
+    def tearDown(self):
+        dsp.set_backend()
+
+    def test_module_functions_use_selected_backend(self):
+        backend = dsp.set_backend("python")
+        self.assertIs(dsp.get_backend(), backend)
+        self.assertEqual(dsp.rms(b"\x03\x00\xfc\xff", 2), 3)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            dsp.get_backend("fortran")
+
+
+if __name__ == "__main__":
+    unittest.main()
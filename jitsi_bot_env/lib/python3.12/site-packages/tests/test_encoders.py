@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import math
+import random
+import subprocess
+import unittest
+from unittest.mock import patch
+
+import speech_recognition as sr
+from speech_recognition import encoders
+from speech_recognition.audio import get_flac_converter
+
+
+def make_raw(sample_count, sample_width, seed=0):
+    """Noisy sine wave as raw PCM in the ``AudioData.get_raw_data`` format (8-bit samples are unsigned)."""
+    rng = random.Random(seed)
+    amplitude = (1 << (8 * sample_width - 1)) - 1
+    samples = [int(amplitude * 0.6 * math.sin(i / 7.0)) + rng.randint(-amplitude // 50, amplitude // 50) for i in range(sample_count)]
+    raw_data = b"".join(sample.to_bytes(sample_width, "little", signed=True) for sample in samples)
+    if sample_width == 1:
+        raw_data = bytes((byte + 128) & 0xFF for byte in raw_data)
+    return raw_data
+
+
+def decode_flac(flac_data):
+    """Decodes FLAC data with the ``flac`` utility into signed little-endian raw PCM."""
+    process = subprocess.run([
+        get_flac_converter(), "--decode", "--stdout", "--totally-silent",
+        "--force-raw-format", "--endian=little", "--sign=signed", "-",
+    ], input=flac_data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise AssertionError("flac could not decode the data: {}".format(process.stderr))
+    return process.stdout
+
+
+class TestFlacEncoder(unittest.TestCase):
+    def setUp(self):
+        try:
+            get_flac_converter()
+        except OSError:
+            self.skipTest("requires the flac utility to check the encoded data")
+
+    def test_lossless_round_trip(self):
+        for sample_width in (1, 2, 3):
+            for sample_count in (1, 1000, 4096, 4097, 9000):
+                raw_data = make_raw(sample_count, sample_width)
+                signed_data = bytes((byte - 128) & 0xFF for byte in raw_data) if sample_width == 1 else raw_data
+                for compression_level in (0, 5, 8):
+                    flac_data = encoders.encode_flac(raw_data, 16000, sample_width, compression_level)
+                    self.assertEqual(decode_flac(flac_data), signed_data, "width {}, {} samples, level {}".format(sample_width, sample_count, compression_level))
+
+    def test_constant_and_empty_audio(self):
+        self.assertEqual(decode_flac(encoders.encode_flac(b"\x10\x00" * 5000, 8000, 2)), b"\x10\x00" * 5000)
+        self.assertEqual(decode_flac(encoders.encode_flac(b"", 8000, 2)), b"")
+
+    def test_numpy_and_pure_python_agree(self):
+        if encoders.np is None:
+            self.skipTest("requires NumPy")
+        raw_data = make_raw(9000, 2)
+        with_numpy = encoders.encode_flac(raw_data, 16000, 2, 5)
+        numpy_module, encoders.np = encoders.np, None
+        try:
+            without_numpy = encoders.encode_flac(raw_data, 16000, 2, 5)
+        finally:
+            encoders.np = numpy_module
+        self.assertEqual(with_numpy, without_numpy)
+
+    def test_get_flac_data(self):
+        audio = sr.AudioData(make_raw(5000, 2), 16000, 2)
+        self.assertEqual(decode_flac(audio.get_flac_data()), audio.get_raw_data())
+        self.assertEqual(decode_flac(audio.get_flac_data(encoder="flac-subprocess", compression_level=0)), audio.get_raw_data())
+        self.assertEqual(decode_flac(audio.get_flac_data(convert_width=3)), audio.get_raw_data(convert_width=3))
+
+    def test_worker_encoder(self):
+        encoder = encoders.FlacWorkerEncoder(compression_level=2)
+        try:
+            raw_data = make_raw(5000, 2)
+            self.assertEqual(decode_flac(encoder.encode(raw_data, 16000, 2)), raw_data)
+            self.assertEqual(decode_flac(encoder.encode(raw_data, 16000, 2)), raw_data)
+        finally:
+            encoder.close()
+
+
+class TestEncoderSelection(unittest.TestCase):
+    def test_fastest_encoder_for_preferred_format(self):
+        self.assertIs(type(encoders.select_encoder(("flac", "l16"))), encoders.FlacEncoder)
+        self.assertIs(type(encoders.get_encoder()), encoders.FlacEncoder)
+        self.assertIsInstance(encoders.select_encoder(("l16",)), encoders.Linear16Encoder)
+
+    def test_subprocess_encoder_only_when_named(self):
+        with patch.object(encoders.SubprocessFlacEncoder, "available", classmethod(lambda cls: True)):
+            self.assertIs(type(encoders.select_encoder(("flac", "l16"))), encoders.FlacEncoder)
+            self.assertIs(type(encoders.get_encoder()), encoders.FlacEncoder)
+            self.assertIsInstance(encoders.select_encoder(("flac", "l16"), "flac-subprocess"), encoders.SubprocessFlacEncoder)
+
+    def test_preferred_encoder(self):
+        self.assertIsInstance(encoders.select_encoder(("flac", "l16"), "l16"), encoders.Linear16Encoder)
+        self.assertIsInstance(encoders.select_encoder(("flac",), "l16"), encoders.FlacEncoder)  # not accepted by the backend
+        self.assertIs(encoders.get_encoder("flac", 3), encoders.get_encoder("flac", 3))
+        with self.assertRaises(ValueError):
+            encoders.get_encoder("mp3")
+
+    def test_google_request_uses_encoder(self):
+        from speech_recognition.recognizers import google
+        audio = sr.AudioData(make_raw(1600, 2), 16000, 2)
+        builder = google.create_request_builder(endpoint="http://localhost/", encoder="l16")
+        self.assertEqual(builder.build_headers(audio), {"Content-Type": "audio/l16; rate=16000"})
+        self.assertEqual(builder.build_data(audio), audio.get_raw_data())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import io
+import math
+import random
+import struct
+import unittest
+import wave
+
+import speech_recognition as sr
+
+
+def make_wav(segments, sample_rate=16000, seed=0):
+    """Builds a mono 16-bit WAV file from ``(seconds, amplitude)`` pairs of noisy sine tones."""
+    rng = random.Random(seed)
+    frames = bytearray()
+    for seconds, amplitude in segments:
+        frames += b"".join(struct.pack("<h", max(-32768, min(32767, int(amplitude * math.sin(i / 5.0)) + rng.randint(-150, 150)))) for i in range(int(seconds * sample_rate)))
+    wav_file = io.BytesIO()
+    writer = wave.open(wav_file, "wb")
+    writer.setnchannels(1)
+    writer.setsampwidth(2)
+    writer.setframerate(sample_rate)
+    writer.writeframes(bytes(frames))
+    writer.close()
+    return wav_file.getvalue()
+
+
+SEGMENTS = [(0.7, 0), (0.9, 6000), (0.2, 0), (0.8, 5000), (1.6, 0), (0.1, 9000), (1.6, 0), (1.3, 7000), (0.5, 0)]
+
+
+def listen_all(block_size, calibrate=False, stream=False, **settings):
+    """Listens to the whole of ``SEGMENTS`` and returns the phrases (or streamed chunks) and the final threshold."""
+    r = sr.Recognizer()
+    r.energy_block_size = block_size
+    for name, value in settings.items():
+        setattr(r, name, value)
+    phrases = []
+    with sr.AudioFile(io.BytesIO(make_wav(SEGMENTS))) as source:
+        if calibrate:
+            r.calibrate_noise_floor(source, duration=0.5)
+        while True:
+            if stream:
+                phrase = b"".join(chunk.frame_data for chunk in r.listen(source, stream=True))
+            else:
+                phrase = r.listen(source).frame_data
+            if not phrase:
+                break
+            phrases.append(phrase)
+            if len(phrases) > 20:
+                raise AssertionError("listen did not reach the end of the file")
+    return phrases, r.energy_threshold
+
+
+class TestBlockEnergy(unittest.TestCase):
+    def test_blocks_give_identical_phrases(self):
+        for settings in ({}, {"dynamic_energy_threshold": False}, {"pause_threshold": 0.5, "non_speaking_duration": 0.3}):
+            expected = listen_all(1, **settings)
+            self.assertGreaterEqual(len(expected[0]), 2)
+            for block_size in (2, 7, 64):
+                self.assertEqual(listen_all(block_size, **settings), expected, (settings, block_size))
+
+    def test_blocks_with_noise_floor_tracking(self):
+        expected = listen_all(1, calibrate=True)
+        self.assertEqual(listen_all(16, calibrate=True), expected)
+
+    def test_blocks_when_streaming(self):
+        self.assertEqual(listen_all(8, stream=True), listen_all(1, stream=True))
+
+    def test_buffers_read_ahead_are_not_skipped(self):
+        data = make_wav(SEGMENTS)
+        rests = []
+        for block_size in (32, 1):
+            r = sr.Recognizer()
+            r.energy_block_size = block_size
+            with sr.AudioFile(io.BytesIO(data)) as source:
+                r.listen(source)
+                rests.append(r.record(source).frame_data)
+        self.assertGreater(len(rests[1]), 0)
+        self.assertEqual(rests[0], rests[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
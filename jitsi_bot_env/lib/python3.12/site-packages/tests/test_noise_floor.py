@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import io
+import math
+import struct
+import unittest
+import wave
+
+import speech_recognition as sr
+
+
+def make_wav(segments, sample_rate=16000):
+    """Builds a mono 16-bit WAV file from ``(seconds, amplitude)`` pairs of sine tones (amplitude 0 is silence)."""
+    frames = bytearray()
+    for seconds, amplitude in segments:
+        frames += b"".join(struct.pack("<h", int(amplitude * math.sin(i / 5.0))) for i in range(int(seconds * sample_rate)))
+    wav_file = io.BytesIO()
+    writer = wave.open(wav_file, "wb")
+    writer.setnchannels(1)
+    writer.setsampwidth(2)
+    writer.setframerate(sample_rate)
+    writer.writeframes(bytes(frames))
+    writer.close()
+    wav_file.seek(0)
+    return wav_file
+
+
+class TestNoiseFloorTracker(unittest.TestCase):
+    def test_floor_falls_fast_and_rises_slowly(self):
+        tracker = sr.NoiseFloorTracker(ratio=2, minimum_threshold=0)
+        tracker.calibrate([100, 100, 5000], 0.1)  # median ignores the click
+        self.assertEqual(tracker.noise_floor, 100)
+        self.assertEqual(tracker.threshold, 200)
+
+        tracker.update(10, 1, False)
+        self.assertLess(tracker.noise_floor, 30)
+        low = tracker.noise_floor
+        tracker.update(1000, 1, True)
+        self.assertLess(tracker.noise_floor - low, 20)
+
+    def test_listen_tracks_without_consuming_audio(self):
+        r = sr.Recognizer()
+        with sr.AudioFile(make_wav([(1, 200), (1, 8000), (2, 200), (1, 8000), (2, 200)])) as source:
+            threshold = r.calibrate_noise_floor(source, duration=0.5)
+            self.assertGreater(threshold, 200)
+            self.assertTrue(r.threshold_state["calibrated"])
+            seen = r.threshold_state["buffers_seen"]
+
+            first = r.listen(source)
+            self.assertGreater(r.threshold_state["buffers_seen"], seen)
+            second = r.listen(source)
+        self.assertEqual(r.threshold_state["mode"], "noise_floor")
+        self.assertGreater(len(first.frame_data), 16000 * 2 * 0.9)
+        self.assertGreater(len(second.frame_data), 16000 * 2 * 0.9)
+
+    def test_default_mode_unchanged(self):
+        r = sr.Recognizer()
+        self.assertIsNone(r.noise_floor_tracker)
+        self.assertEqual(r.threshold_state, {"energy_threshold": 300, "mode": "dynamic"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import io
+import math
+import random
+import struct
+import unittest
+import wave
+
+import speech_recognition as sr
+from speech_recognition import dsp, resample
+
+
+def tone(frequency, seconds, sample_rate, amplitude=10000):
+    return b"".join(struct.pack("<h", int(amplitude * math.sin(2 * math.pi * frequency * i / sample_rate))) for i in range(int(seconds * sample_rate)))
+
+
+def rms(fragment, skip=200):
+    """RMS energy of a 16-bit fragment, leaving out the filter's edges."""
+    return dsp.rms(fragment[2 * skip:-2 * skip], 2)
+
+
+class TestResampler(unittest.TestCase):
+    def test_streaming_matches_whole_conversion(self):
+        rng = random.Random(0)
+        for inrate, outrate in ((44100, 16000), (48000, 16000), (8000, 16000), (16000, 22050)):
+            fragment = bytes(rng.getrandbits(8) for _ in range(2 * inrate // 4))
+            resampler = sr.Resampler(inrate, outrate, 2)
+            parts, position = [], 0
+            while position < len(fragment):
+                size = 2 * rng.randint(1, 3000)
+                parts.append(resampler.process(fragment[position:position + size]))
+                position += size
+            parts.append(resampler.flush())
+            converted = resample.resample(fragment, 2, inrate, outrate)
+            self.assertEqual(b"".join(parts), converted, (inrate, outrate))
+            self.assertEqual(len(converted) // 2, -(-(len(fragment) // 2) * outrate // inrate))
+
+    def test_resampler_is_reusable_after_flush(self):
+        fragment = tone(440, 0.2, 44100)
+        resampler = sr.Resampler(44100, 16000, 2)
+        first = resampler.process(fragment) + resampler.flush()
+        self.assertEqual(resampler.process(fragment) + resampler.flush(), first)
+
+    def test_downsampling_removes_aliases(self):
+        if not sr.Resampler(44100, 16000, 2).polyphase:
+            self.skipTest("the polyphase filter requires NumPy")
+        kept = resample.resample(tone(1000, 0.5, 44100), 2, 44100, 16000)
+        self.assertAlmostEqual(rms(kept), 10000 / math.sqrt(2), delta=100)
+        expected = tone(1000, 0.5, 16000)
+        self.assertLess(max(abs(a - b) for (a,), (b,) in zip(struct.iter_unpack("<h", kept[400:-400]), struct.iter_unpack("<h", expected[400:-400]))), 8)  # aligned with the input, not delayed by the filter
+
+        aliased = resample.resample(tone(12000, 0.5, 44100), 2, 44100, 16000)  # above the new Nyquist frequency
+        self.assertLess(rms(aliased), 50)
+        self.assertGreater(rms(dsp.ratecv(tone(12000, 0.5, 44100), 2, 1, 44100, 16000, None)[0]), 1000)  # linear interpolation lets it through as a 4 kHz tone
+
+    def test_sample_widths(self):
+        for width in (1, 2, 3, 4):
+            fragment = dsp.lin2lin(tone(500, 0.1, 32000), 2, width)
+            converted = resample.resample(fragment, width, 32000, 16000)
+            self.assertEqual(len(converted), len(fragment) // 2)
+            self.assertAlmostEqual(dsp.rms(dsp.lin2lin(converted, width, 2)[400:-400], 2), 10000 / math.sqrt(2), delta=150)
+
+    def test_without_polyphase_filter(self):
+        resampler = sr.Resampler(44100, 16000, 2)
+        resampler.polyphase = False
+        resampler.reset()
+        fragment = tone(440, 0.2, 44100)
+        converted = b"".join(resampler.process(fragment[i:i + 1000]) for i in range(0, len(fragment), 1000)) + resampler.flush()
+        self.assertEqual(converted, dsp.ratecv(fragment, 2, 1, 44100, 16000, None)[0])
+
+
+class TestResamplingSources(unittest.TestCase):
+    def make_wav(self, sample_rate, seconds, sample_width=2):
+        wav_file = io.BytesIO()
+        writer = wave.open(wav_file, "wb")
+        writer.setnchannels(1)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        frames = tone(300, seconds, sample_rate)
+        writer.writeframes(dsp.bias(dsp.lin2lin(frames, 2, 1), 1, 128) if sample_width == 1 else frames)
+        writer.close()
+        wav_file.seek(0)
+        return wav_file
+
+    def test_audio_file_converted_on_capture(self):
+        r = sr.Recognizer()
+        with sr.AudioFile(self.make_wav(44100, 1.5), convert_rate=16000) as source:
+            self.assertEqual(source.SAMPLE_RATE, 16000)
+            self.assertEqual(len(source.stream.read(source.CHUNK)), source.CHUNK * 2)
+            audio = r.record(source)
+        self.assertEqual(audio.sample_rate, 16000)
+        self.assertEqual(audio.get_raw_data(convert_rate=16000), audio.frame_data)  # nothing left to convert
+
+        with sr.AudioFile(self.make_wav(44100, 1.5)) as source:
+            whole = r.record(source).get_raw_data(convert_rate=16000)
+        with sr.AudioFile(self.make_wav(44100, 1.5), convert_rate=16000) as source:
+            streamed = b"".join(iter(lambda: source.stream.read(source.CHUNK), b""))
+        self.assertEqual(streamed, whole)
+
+    def test_unsigned_8_bit_audio(self):
+        with sr.AudioFile(self.make_wav(32000, 0.5, 1), convert_rate=16000) as source:
+            audio = sr.Recognizer().record(source)
+        self.assertAlmostEqual(dsp.rms(audio.get_raw_data(convert_width=2)[800:-800], 2), 10000 / math.sqrt(2), delta=200)
+
+
+if __name__ == "__main__":
+    unittest.main()
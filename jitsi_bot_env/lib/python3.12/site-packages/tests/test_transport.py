@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.request import Request
+
+import speech_recognition as sr
+from speech_recognition.transport import HTTPTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("Content-Type"), body))
+            server.client_ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.statuses.pop(0) if server.statuses else 200
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        payload = server.payload.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests, self.server.client_ports, self.server.statuses = [], set(), []
+        self.server.in_flight = self.server.max_in_flight = 0
+        self.server.delay = 0
+        self.server.payload = "{}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{}/recognize".format(self.server.server_address[1])
+        self.transport = HTTPTransport(backoff=0.01)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reuse(self):
+        for i in range(5):
+            response = self.transport.open(Request(self.url + "?n={}".format(i), data=b"audio", headers={"Content-Type": "audio/l16"}))
+            self.assertEqual(response.read(), b"{}")
+        self.assertEqual(len(self.server.client_ports), 1)
+        self.assertEqual(self.transport.stats["connections_opened"], 1)
+        self.assertEqual(self.transport.stats["connections_reused"], 4)
+        self.assertEqual(self.server.requests[-1], ("/recognize?n=4", "audio/l16", b"audio"))
+        self.assertEqual(len(self.transport.history), 5)
+        self.assertFalse(self.transport.history[0]["reused"])
+        self.assertTrue(self.transport.history[-1]["reused"])
+        self.assertIsNotNone(self.transport.timing_summary()["total"]["mean"])
+
+    def test_retry_on_transient_status(self):
+        self.server.statuses = [503, 502]
+        response = self.transport.open(Request(self.url, data=b"audio"))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.timing["attempts"], 3)
+        self.assertEqual(self.transport.stats["retries"], 2)
+
+        self.server.statuses = [503, 503, 503]
+        with self.assertRaises(HTTPError) as context:
+            self.transport.open(Request(self.url, data=b"audio"))
+        self.assertEqual(context.exception.code, 503)
+
+        self.server.statuses = [400]
+        with self.assertRaises(HTTPError):
+            self.transport.open(Request(self.url, data=b"audio"))
+        self.assertEqual(len(self.server.requests), 1 + 2 + 3 + 1)  # client errors are not retried
+
+    def test_connection_failure(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)  # so that tearDown has something to shut down
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        with self.assertRaises(URLError):
+            self.transport.open(Request(self.url, data=b"audio"), timeout=1)
+        self.assertEqual(self.transport.stats["errors"], 1)
+
+    def test_bounded_concurrency(self):
+        self.server.delay = 0.05
+        transport = HTTPTransport(max_connections_per_host=2, max_concurrency=8)
+        threads = [threading.Thread(target=transport.open, args=(Request(self.url, data=b"audio"),)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        transport.close()
+        self.assertEqual(len(self.server.requests), 8)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+        self.assertLessEqual(transport.stats["connections_opened"], 2)
+
+    def test_recognize_google_through_transport(self):
+        self.server.payload = '{"result":[]}\n' + json.dumps({"result": [{"alternative": [{"transcript": "one two three"}], "final": True}], "result_index": 0})
+        r = sr.Recognizer()
+        r.transport = self.transport
+        r.audio_encoder = "l16"
+        audio = sr.AudioData(b"\x00\x01" * 1600, 16000, 2)
+        self.assertEqual(r.recognize_google(audio, endpoint=self.url), "one two three")
+        self.assertEqual(r.recognize_google(audio, endpoint=self.url), "one two three")
+        self.assertEqual(self.transport.stats["connections_opened"], 1)
+        self.assertEqual(self.server.requests[0][1], "audio/l16; rate=16000")
+
+        self.server.statuses = [403]
+        with self.assertRaises(sr.RequestError):
+            r.recognize_google(audio, endpoint=self.url)
+
+
+if __name__ == "__main__":
+    unittest.main()
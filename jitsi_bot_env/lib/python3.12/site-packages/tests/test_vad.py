@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import io
+import math
+import random
+import struct
+import unittest
+import wave
+
+import speech_recognition as sr
+
+RATE = 16000
+
+
+def voice(seconds, rng):
+    """Syllables of a harmonic voice around a 600 Hz formant, with short gaps."""
+    samples = []
+    while len(samples) < seconds * RATE:
+        f0, length = rng.uniform(100, 200), int(rng.uniform(0.15, 0.3) * RATE)
+        for i in range(length):
+            t = i / RATE
+            value = sum(math.exp(-((k * f0 - 600) / 300.0) ** 2) * math.sin(2 * math.pi * k * f0 * t) for k in range(1, 12))
+            samples.append(4000 * value * math.sin(math.pi * i / length) ** 2)
+        samples.extend([0] * int(0.05 * RATE))
+    return samples[:int(seconds * RATE)]
+
+
+def typing(seconds, rng):
+    """Key clicks: short decaying bursts of white noise."""
+    samples = [0.0] * int(seconds * RATE)
+    position = 0
+    while position + 160 < len(samples):
+        for i in range(160):
+            samples[position + i] = rng.gauss(0, 8000) * math.exp(-i / 25.0)
+        position += int(rng.uniform(0.08, 0.2) * RATE)
+    return samples
+
+
+def make_wav(samples, rng):
+    frames = b"".join(struct.pack("<h", max(-32768, min(32767, int(value + rng.gauss(0, 40))))) for value in samples)
+    wav_file = io.BytesIO()
+    writer = wave.open(wav_file, "wb")
+    writer.setnchannels(1)
+    writer.setsampwidth(2)
+    writer.setframerate(RATE)
+    writer.writeframes(frames)
+    writer.close()
+    wav_file.seek(0)
+    return wav_file
+
+
+def phrase_count(wav_file, vad):
+    """Returns the number of phrases ``listen`` finds, which must end at least a pause before the end of the file."""
+    r = sr.Recognizer()
+    r.vad = vad
+    count = 0
+    with sr.AudioFile(wav_file) as source:
+        r.calibrate_noise_floor(source, duration=0.5)
+        while True:
+            try:
+                audio = r.listen(source, timeout=30)
+            except sr.WaitTimeoutError:
+                break
+            if source.audio_reader.tell() == source.FRAME_COUNT:  # what is left at the end of the file, not a phrase
+                break
+            count += 1
+    return count
+
+
+class TestSpectralVAD(unittest.TestCase):
+    def setUp(self):
+        try:
+            sr.SpectralVAD()
+        except RuntimeError as e:
+            self.skipTest(str(e))
+        self.rng = random.Random(0)
+
+    def test_typing_starts_no_phrase(self):
+        silence = [0.0] * RATE
+        samples = silence + typing(4, self.rng) + silence * 3
+        self.assertGreater(phrase_count(make_wav(samples, self.rng), None), 0)  # the energy threshold is fooled
+        self.assertEqual(phrase_count(make_wav(samples, self.rng), sr.SpectralVAD()), 0)
+
+    def test_voice_is_detected(self):
+        silence = [0.0] * RATE
+        samples = silence + voice(2, self.rng) + silence * 3 + voice(2, self.rng) + silence * 3
+        vad = sr.SpectralVAD()
+        self.assertEqual(phrase_count(make_wav(samples, self.rng), vad), 2)
+        self.assertGreater(vad.state()["speech_frames"], 0)
+
+    def test_typing_within_a_phrase_does_not_split_it(self):
+        silence = [0.0] * RATE
+        samples = silence + voice(2, self.rng) + typing(2, self.rng) + voice(2, self.rng) + silence * 3
+        self.assertEqual(phrase_count(make_wav(samples, self.rng), None), 1)
+        self.assertEqual(phrase_count(make_wav(samples, self.rng), sr.SpectralVAD()), 1)
+
+    def test_onset_and_hangover(self):
+        vad = sr.SpectralVAD(onset_frames=3, hangover_frames=5)
+        tone = b"".join(struct.pack("<h", int(3000 * math.sin(2 * math.pi * 500 * i / RATE))) for i in range(320))  # one 20 ms frame
+        quiet = b"\x00\x00" * 320
+        vad.is_speech(quiet, RATE, 2, 0)  # seed the noise floor
+        self.assertFalse(vad.is_speech(tone * 2, RATE, 2, 2121))  # two frames are not enough for an onset
+        self.assertTrue(vad.is_speech(tone, RATE, 2, 2121))
+        self.assertTrue(vad.is_speech(quiet * 2, RATE, 2, 0))  # held through the hangover
+        self.assertTrue(vad.is_speech(quiet[:200], RATE, 2, 0))  # less than a frame: still within the hangover
+        self.assertTrue(vad.is_speech(quiet[200:] + quiet * 2, RATE, 2, 0))
+        self.assertFalse(vad.is_speech(quiet, RATE, 2, 0))
+
+
+class TestCustomVAD(unittest.TestCase):
+    def test_listen_uses_the_detector(self):
+        class LoudHalfVAD(sr.VoiceActivityDetector):
+            def __init__(self):
+                self.buffers = 0
+
+            def is_speech(self, buffer, sample_rate, sample_width, energy):
+                self.buffers += 1
+                return 8 <= self.buffers < 16  # speech from the 8th buffer to the 15th, whatever the audio
+
+        r = sr.Recognizer()
+        r.vad = LoudHalfVAD()
+        with sr.AudioFile(make_wav([0.0] * (RATE * 8), random.Random(1))) as source:
+            audio = r.listen(source)
+        self.assertGreater(len(audio.frame_data), 8 * source.CHUNK * 2)
+        self.assertGreater(r.vad.buffers, 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
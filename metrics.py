@@ -0,0 +1,178 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency buckets: 0.5 ms to ~2 minutes, each 25% wider than the last,
+# so an interpolated quantile is within a few percent of the true one
+LATENCY_BUCKETS = tuple(round(0.0005 * 1.25 ** i, 6) for i in range(56))
+QUANTILES = (0.5, 0.95, 0.99)
+EXPORTED_BUCKET_STEP = 4  # every 4th bucket (each ~2.4 times wider) is exported, to keep scrapes small
+
+
+class Histogram:
+    """Counts observations in fixed buckets; quantiles are interpolated within the bucket they fall in."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one counts observations above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """The value below which a fraction ``q`` of the observations fall, or ``None`` without observations."""
+        with self.lock:
+            counts, count = list(self.counts), self.count
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # beyond the last bucket: all we know is that it is larger
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class Metrics:
+    """
+    Per-meeting latency histograms for the stages of the transcription pipeline, exported in Prometheus text format.
+
+    Stages are timed by hooks that call ``observe(stage, seconds, meeting)``: ``listen``,
+    ``encode``, ``request``, ``speaker_lookup`` and ``transcript_write``. Counters that components
+    already keep (dropped phrases, recognizer errors, input overflows) are not counted twice:
+    collectors added with ``add_collector`` read them when the metrics are rendered, returning
+    ``(name, labels, value)`` samples of counters declared in ``COUNTERS``.
+
+    Nothing creates a ``Metrics`` unless metrics are enabled; the hooks check for ``None`` and do
+    nothing else.
+    """
+
+    COUNTERS = {
+        "meetingbot_phrases_captured_total": "Phrases captured by the transcription pipeline",
+        "meetingbot_phrases_dropped_total": "Phrases dropped because the transcription queue was full",
+        "meetingbot_phrases_spilled_total": "Phrases spilled to disk because the transcription queue was full",
+        "meetingbot_recognizer_errors_total": "Recognition requests that failed or returned no transcription",
+        "meetingbot_input_overflows_total": "Input overflows reported by PyAudio while recording",
+    }
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}  # (meeting, stage) -> Histogram
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds, meeting=None):
+        """Record that ``stage`` took ``seconds`` in ``meeting``."""
+        key = (meeting or "", stage)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram(self.buckets))
+        histogram.observe(seconds)
+
+    def timer(self, meeting=None):
+        """Return ``on_timing(stage, seconds)`` recording the stages of ``meeting``, as taken by the hooks."""
+        return lambda stage, seconds: self.observe(stage, seconds, meeting)
+
+    def add_collector(self, collector):
+        with self.lock:
+            self.collectors.append(collector)
+
+    def remove_collector(self, collector):
+        with self.lock:
+            if collector in self.collectors:
+                self.collectors.remove(collector)
+
+    def summary(self, meeting=None):
+        """``{stage: {"count", "p50", "p95", "p99"}}`` of ``meeting``, in seconds."""
+        with self.lock:
+            histograms = {stage: histogram for (name, stage), histogram in self.histograms.items() if name == (meeting or "")}
+        return {
+            stage: dict(count=histogram.count, **{f"p{int(q * 100)}": histogram.quantile(q) for q in QUANTILES})
+            for stage, histogram in sorted(histograms.items())
+        }
+
+    def render(self):
+        """The metrics in Prometheus text exposition format."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            collectors = list(self.collectors)
+        lines = [
+            "# HELP meetingbot_stage_seconds Time spent in each stage of the transcription pipeline",
+            "# TYPE meetingbot_stage_seconds histogram",
+        ]
+        for (meeting, stage), histogram in histograms:
+            with histogram.lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+            labels = f'meeting="{_escape(meeting)}",stage="{stage}"'
+            cumulative = 0
+            for index, (bucket, bucket_count) in enumerate(zip(histogram.buckets, counts)):
+                cumulative += bucket_count
+                if index % EXPORTED_BUCKET_STEP == EXPORTED_BUCKET_STEP - 1:
+                    lines.append(f'meetingbot_stage_seconds_bucket{{{labels},le="{bucket}"}} {cumulative}')
+            lines.append(f'meetingbot_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"meetingbot_stage_seconds_sum{{{labels}}} {total}")
+            lines.append(f"meetingbot_stage_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP meetingbot_stage_quantile_seconds Quantiles of meetingbot_stage_seconds, interpolated from its buckets",
+            "# TYPE meetingbot_stage_quantile_seconds gauge",
+        ]
+        for (meeting, stage), histogram in histograms:
+            for q in QUANTILES:
+                value = histogram.quantile(q)
+                if value is not None:
+                    lines.append(f'meetingbot_stage_quantile_seconds{{meeting="{_escape(meeting)}",stage="{stage}",quantile="{q}"}} {value:.6g}')
+
+        samples = {}
+        for collector in collectors:
+            try:
+                for name, labels, value in collector():
+                    samples.setdefault(name, []).append((labels, value))
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        for name, help_text in self.COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for labels, value in samples.get(name, []):
+                label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in sorted(labels.items()))
+                lines.append(f"{name}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host="127.0.0.1", port=9464):
+        """Serve ``GET /metrics`` on a background thread; returns the server (``shutdown()`` stops it)."""
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                data = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        print(f"Metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
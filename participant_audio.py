@@ -0,0 +1,421 @@
+import json
+import struct
+import threading
+
+import speech_recognition as sr
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+SAMPLE_RATE = 16000  # the browser downsamples every track to 16 kHz mono
+SAMPLE_WIDTH = 2  # signed 16-bit little-endian PCM
+FRAME_SAMPLES = 320  # 20 ms of audio per WebSocket frame
+
+# Injected into the meeting page with the receiver URL as the first argument. Taps every remote
+# audio track with an AudioWorklet (falling back to a ScriptProcessor if the worklet can't load),
+# downsamples it to 16 kHz int16 and streams it over a WebSocket as binary frames:
+#   uint8 version, uint8 id length, participant id (UTF-8), uint32 sequence number,
+#   float64 capture time of the first sample (ms since the epoch), int16 PCM samples
+# all little-endian. Frames wait in a bounded queue while the socket is congested
+# (bufferedAmount above the high water mark) or reconnecting; the oldest are dropped when it is full.
+CAPTURE_SCRIPT = """
+const wsUrl = arguments[0], targetRate = arguments[1], frameSamples = arguments[2];
+if (window.__participantAudio) {
+    return window.__participantAudio.stats();
+}
+const HIGH_WATER = 64 * 1024;  // bytes buffered in the socket before frames are held back
+const MAX_PENDING = 500;  // frames held back (10 s of audio for one speaker) before dropping the oldest
+
+const DOWNSAMPLER = `
+class Downsampler {
+    constructor(inputRate, outputRate, frameSamples) {
+        this.inputRate = inputRate;
+        this.step = inputRate / outputRate;
+        this.frameDuration = frameSamples / outputRate;
+        this.position = 0;
+        this.sum = 0;
+        this.count = 0;
+        this.frame = new Int16Array(frameSamples);
+        this.filled = 0;
+    }
+    // averages the input over each output sample period, which also low-pass filters it
+    push(input, time, onFrame) {
+        for (let i = 0; i < input.length; i++) {
+            this.sum += input[i];
+            this.count++;
+            this.position += 1;
+            if (this.position < this.step) continue;
+            this.position -= this.step;
+            const value = Math.max(-1, Math.min(1, this.sum / this.count));
+            this.sum = 0;
+            this.count = 0;
+            this.frame[this.filled++] = value < 0 ? value * 0x8000 : value * 0x7FFF;
+            if (this.filled === this.frame.length) {
+                onFrame(this.frame.slice(0), time + (i + 1) / this.inputRate - this.frameDuration);
+                this.filled = 0;
+            }
+        }
+    }
+}`;
+
+const PROCESSOR = DOWNSAMPLER + `
+registerProcessor('participant-tap', class extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        const {targetRate, frameSamples} = options.processorOptions;
+        this.downsampler = new Downsampler(sampleRate, targetRate, frameSamples);
+    }
+    process(inputs) {
+        const channels = inputs[0];
+        if (channels && channels.length) {
+            let samples = channels[0];
+            if (channels.length > 1) {
+                samples = new Float32Array(samples.length);
+                for (const channel of channels) {
+                    for (let i = 0; i < channel.length; i++) samples[i] += channel[i] / channels.length;
+                }
+            }
+            this.downsampler.push(samples, currentTime, (pcm, start) => this.port.postMessage({pcm, start}, [pcm.buffer]));
+        }
+        return true;
+    }
+});`;
+const Downsampler = new Function(DOWNSAMPLER + '; return Downsampler;')();
+
+const conference = window.APP.conference._room;
+const events = window.JitsiMeetJS ? window.JitsiMeetJS.events.conference : {
+    TRACK_ADDED: 'conference.trackAdded', TRACK_REMOVED: 'conference.trackRemoved',
+    USER_LEFT: 'conference.userLeft', DISPLAY_NAME_CHANGED: 'conference.displayNameChanged'
+};
+const audioContext = new AudioContext();
+audioContext.resume();
+const epochAtZero = Date.now() - audioContext.currentTime * 1000;  // wall clock time of audio context time 0
+const silent = audioContext.createGain();
+silent.gain.value = 0;
+silent.connect(audioContext.destination);
+const encoder = new TextEncoder();
+const state = {
+    socket: null, pending: [], taps: {}, names: {}, sequence: {}, mode: null,
+    sent: 0, dropped: 0, reconnects: 0, backoff: 250, closed: false
+};
+
+function control(message) {
+    if (state.socket && state.socket.readyState === WebSocket.OPEN) state.socket.send(JSON.stringify(message));
+}
+
+function announce(id, event) {
+    control({type: 'participant', id, event, name: state.names[id] || null});
+}
+
+function flush() {
+    const socket = state.socket;
+    while (state.pending.length && socket && socket.readyState === WebSocket.OPEN && socket.bufferedAmount < HIGH_WATER) {
+        socket.send(state.pending.shift());
+        state.sent++;
+    }
+}
+
+function enqueue(id, pcm, timestamp) {
+    const idBytes = encoder.encode(id);
+    const header = 2 + idBytes.length + 12;
+    const buffer = new ArrayBuffer(header + pcm.byteLength);
+    const view = new DataView(buffer);
+    view.setUint8(0, 1);
+    view.setUint8(1, idBytes.length);
+    new Uint8Array(buffer, 2, idBytes.length).set(idBytes);
+    const sequence = state.sequence[id] = ((state.sequence[id] || 0) + 1) >>> 0;
+    view.setUint32(2 + idBytes.length, sequence, true);
+    view.setFloat64(6 + idBytes.length, timestamp, true);
+    new Uint8Array(buffer, header).set(new Uint8Array(pcm.buffer, pcm.byteOffset, pcm.byteLength));  // typed arrays are little-endian on every supported platform
+    state.pending.push(buffer);
+    if (state.pending.length > MAX_PENDING) {
+        state.pending.shift();
+        state.dropped++;
+    }
+    flush();
+}
+
+function connect() {
+    const socket = state.socket = new WebSocket(wsUrl);
+    socket.binaryType = 'arraybuffer';
+    socket.onopen = () => {
+        state.backoff = 250;
+        control({type: 'hello', sampleRate: targetRate, frameSamples, mode: state.mode});
+        Object.keys(state.names).forEach(id => announce(id, 'joined'));  // a restarted receiver learns who is here
+        flush();
+    };
+    socket.onclose = () => {
+        if (state.closed) return;
+        state.reconnects++;
+        setTimeout(connect, state.backoff);
+        state.backoff = Math.min(state.backoff * 2, 5000);
+    };
+}
+
+function tap(track) {
+    if (!track || track.isLocal() || track.getType() !== 'audio' || state.taps[track.getId()]) return;
+    const id = track.getParticipantId();
+    const participant = conference.getParticipantById(id);
+    state.names[id] = participant ? participant.getDisplayName() : null;
+    const source = audioContext.createMediaStreamSource(track.getOriginalStream());
+    const send = (pcm, start) => enqueue(id, pcm, epochAtZero + start * 1000);
+    let node;
+    if (state.mode === 'worklet') {
+        node = new AudioWorkletNode(audioContext, 'participant-tap', {
+            numberOfInputs: 1, numberOfOutputs: 0, processorOptions: {targetRate, frameSamples}
+        });
+        node.port.onmessage = event => send(event.data.pcm, event.data.start);
+    } else {
+        node = audioContext.createScriptProcessor(4096, 1, 1);
+        const downsampler = new Downsampler(audioContext.sampleRate, targetRate, frameSamples);
+        node.onaudioprocess = event => downsampler.push(event.inputBuffer.getChannelData(0), audioContext.currentTime, send);
+        node.connect(silent);  // a ScriptProcessor only runs while connected to the destination
+    }
+    source.connect(node);
+    state.taps[track.getId()] = {id, source, node};
+    announce(id, 'joined');
+}
+
+function untap(track) {
+    const entry = state.taps[track.getId()];
+    if (!entry) return;
+    entry.source.disconnect();
+    entry.node.disconnect();
+    delete state.taps[track.getId()];
+}
+
+const ready = audioContext.audioWorklet
+    .addModule(URL.createObjectURL(new Blob([PROCESSOR], {type: 'application/javascript'})))
+    .then(() => { state.mode = 'worklet'; }, () => { state.mode = 'script-processor'; });
+
+ready.then(() => {
+    conference.getParticipants().forEach(participant => participant.getTracks().forEach(tap));
+    conference.on(events.TRACK_ADDED, tap);
+    conference.on(events.TRACK_REMOVED, untap);
+    conference.on(events.USER_LEFT, id => announce(String(id), 'left'));
+    conference.on(events.DISPLAY_NAME_CHANGED, (id, name) => {
+        state.names[id] = name;
+        announce(String(id), 'renamed');
+    });
+    connect();
+});
+state.flushTimer = setInterval(flush, 50);
+
+window.__participantAudio = {
+    stats: () => ({
+        mode: state.mode, taps: Object.keys(state.taps).length, pending: state.pending.length,
+        sent: state.sent, dropped: state.dropped, reconnects: state.reconnects,
+        connected: !!state.socket && state.socket.readyState === WebSocket.OPEN
+    }),
+    stop: () => {
+        state.closed = true;
+        clearInterval(state.flushTimer);
+        Object.values(state.taps).forEach(entry => { entry.source.disconnect(); entry.node.disconnect(); });
+        if (state.socket) state.socket.close();
+        audioContext.close();
+        delete window.__participantAudio;
+    }
+};
+return {status: 'starting'};
+"""
+
+STOP_SCRIPT = """
+if (window.__participantAudio) {
+    window.__participantAudio.stop();
+    return true;
+}
+return false;
+"""
+
+
+class ParticipantStream:
+    """
+    Buffered 16 kHz int16 audio of one participant, as received from the browser.
+
+    ``read`` blocks until enough audio has arrived, like reading a microphone, and returns
+    ``b""`` once the stream is closed and drained. When the reader falls more than
+    ``max_buffer_seconds`` behind, the oldest audio is dropped and counted in ``dropped_bytes``.
+    """
+
+    def __init__(self, participant_id, name=None, max_buffer_seconds=30):
+        self.participant_id = participant_id
+        self.name = name
+        self.max_buffer_bytes = int(max_buffer_seconds * SAMPLE_RATE) * SAMPLE_WIDTH
+        self.buffer = bytearray()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.frames_received = 0
+        self.frames_lost = 0  # frames the browser dropped before sending, from gaps in the sequence numbers
+        self.dropped_bytes = 0  # audio dropped here because the reader fell behind
+        self.last_sequence = None
+        self.last_timestamp = None  # wall clock time (seconds) of the first sample of the latest frame
+
+    def feed(self, pcm, sequence, timestamp):
+        with self.condition:
+            if self.closed:
+                return
+            if self.last_sequence is not None and sequence > self.last_sequence + 1:
+                self.frames_lost += sequence - self.last_sequence - 1
+            self.last_sequence, self.last_timestamp = sequence, timestamp
+            self.frames_received += 1
+            self.buffer += pcm
+            overflow = len(self.buffer) - self.max_buffer_bytes
+            if overflow > 0:
+                overflow += overflow % SAMPLE_WIDTH  # keep samples aligned
+                del self.buffer[:overflow]
+                self.dropped_bytes += overflow
+            self.condition.notify_all()
+
+    def read(self, size):
+        """Return ``size`` frames of audio, waiting for them if needed; fewer (possibly none) once the stream is closed."""
+        needed = size * SAMPLE_WIDTH
+        with self.condition:
+            while len(self.buffer) < needed and not self.closed:
+                self.condition.wait()
+            data = bytes(self.buffer[:needed])
+            del self.buffer[:needed]
+            return data
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "name": self.name,
+                "frames_received": self.frames_received,
+                "frames_lost": self.frames_lost,
+                "dropped_bytes": self.dropped_bytes,
+                "buffered_seconds": len(self.buffer) / float(SAMPLE_RATE * SAMPLE_WIDTH),
+            }
+
+
+class ParticipantAudioSource(sr.AudioSource):
+    """A ``speech_recognition`` audio source that reads one participant's ``ParticipantStream``."""
+
+    def __init__(self, participant_stream, chunk_size=1024):
+        self.participant_stream = participant_stream
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = SAMPLE_WIDTH
+        self.CHUNK = chunk_size
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = self.participant_stream
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+
+class ParticipantAudioReceiver:
+    """
+    Local WebSocket server receiving the per-participant audio streamed by ``CAPTURE_SCRIPT``.
+
+    Every participant gets a ``ParticipantStream``; ``on_participant(stream)`` is called from the
+    server thread the first time audio arrives for a participant, and the stream is closed when the
+    participant leaves or the receiver stops. The browser reconnects on its own if the connection
+    drops, so the receiver can be restarted on the same port without re-injecting the script.
+    """
+
+    def __init__(self, on_participant=None, host="127.0.0.1", port=0, max_buffer_seconds=30):
+        self.on_participant = on_participant
+        self.host = host
+        self.port = port  # 0 picks a free port; the actual port is set by start()
+        self.max_buffer_seconds = max_buffer_seconds
+        self.streams = {}  # participant id -> ParticipantStream
+        self.names = {}  # participant id -> display name, from the browser's control messages
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "frames": 0, "bytes": 0, "bad_frames": 0}
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        """Start the WebSocket server on a background thread."""
+        self.server = serve(self._handle_connection, self.host, self.port, max_size=2 ** 20, compression=None)
+        self.port = self.server.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="participant-audio", daemon=True)
+        self.thread.start()
+        print(f"Participant audio receiver listening on {self.url}")
+
+    def stop(self):
+        """Stop the server and close every participant stream, which ends their transcription."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.thread.join()
+            self.server = None
+        with self.lock:
+            streams = list(self.streams.values())
+        for stream in streams:
+            stream.close()
+
+    def inject(self, execute):
+        """Start capturing in the meeting page, where ``execute(script, *args)`` runs scripts (normally ``JitsiBot.run_script``); returns the capture stats, or ``{"status": "starting"}`` the first time."""
+        return execute(CAPTURE_SCRIPT, self.url, SAMPLE_RATE, FRAME_SAMPLES)
+
+    def _handle_connection(self, websocket):
+        with self.lock:
+            self.stats["connections"] += 1
+        try:
+            for message in websocket:
+                if isinstance(message, str):
+                    self._handle_control(json.loads(message))
+                else:
+                    self._handle_frame(message)
+        except ConnectionClosed:
+            pass  # the browser reconnects by itself
+
+    def _handle_control(self, message):
+        if message.get("type") != "participant":
+            return
+        participant_id = message["id"]
+        with self.lock:
+            if message.get("name"):
+                self.names[participant_id] = message["name"]
+            stream = self.streams.get(participant_id)
+            if stream is not None and message.get("name"):
+                stream.name = message["name"]
+            if stream is not None and message.get("event") == "left":
+                del self.streams[participant_id]
+        if stream is not None and message.get("event") == "left":
+            stream.close()
+
+    def _handle_frame(self, frame):
+        try:
+            version, id_length = frame[0], frame[1]
+            if version != 1:
+                raise ValueError(f"unknown frame version {version}")
+            participant_id = frame[2:2 + id_length].decode("utf-8")
+            sequence, timestamp = struct.unpack_from("<Id", frame, 2 + id_length)
+            pcm = frame[14 + id_length:]
+        except (IndexError, ValueError, struct.error):
+            with self.lock:
+                self.stats["bad_frames"] += 1
+            return
+
+        new_stream = None
+        with self.lock:
+            self.stats["frames"] += 1
+            self.stats["bytes"] += len(frame)
+            stream = self.streams.get(participant_id)
+            if stream is None:
+                stream = new_stream = self.streams[participant_id] = ParticipantStream(
+                    participant_id, self.names.get(participant_id), self.max_buffer_seconds
+                )
+        stream.feed(pcm, sequence, timestamp / 1000.0)
+        if new_stream is not None and self.on_participant is not None:
+            try:
+                self.on_participant(new_stream)
+            except Exception as e:
+                print(f"Error handling new participant {participant_id}: {e}")
+
+    def participant_stats(self):
+        with self.lock:
+            streams = dict(self.streams)
+        return {participant_id: stream.stats() for participant_id, stream in streams.items()}
@@ -0,0 +1,275 @@
+import collections
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from datetime import datetime
+from audio_only import process_tree_usage
+
+try:
+    import fcntl
+except ImportError:  # no advisory file locks (Windows): unfinished files are told apart by their age
+    fcntl = None
+
+PART_SUFFIX = ".part"  # files still being written; finished files are renamed without it
+STALE_PART_SECONDS = 60  # without file locks, a ``.part`` file untouched for this long is taken as abandoned
+
+# ffmpeg output options per recording format: (file extension, codec options)
+ENCODED_FORMATS = {
+    "opus": ("opus", ["-c:a", "libopus", "-ar", "48000", "-f", "ogg"]),  # libopus only takes 48 kHz and its divisors
+    "flac": ("flac", ["-c:a", "flac", "-compression_level", "5", "-f", "flac"]),
+}
+RECORD_FORMATS = ("wav",) + tuple(ENCODED_FORMATS)
+
+SAMPLE_FORMATS = {1: "u8", 2: "s16le", 3: "s24le", 4: "s32le"}  # ffmpeg raw input format per sample width
+
+
+def timestamped_path(directory, prefix, start_time, extension):
+    timestamp = datetime.fromtimestamp(start_time).strftime("%Y%m%d-%H%M%S-%f")[:-3]
+    return os.path.join(directory, f"{prefix}_{timestamp}.{extension}")
+
+
+def open_partial_file(path):
+    """
+    Create the ``.part`` file ``path`` for writing, locked until the returned file is closed.
+
+    The lock tells ``recover_partial_files`` that the file is still being written, by this or
+    another recorder sharing the directory; keep the file open until it has been renamed.
+    """
+    part_file = open(path, "wb")
+    if fcntl is not None:
+        fcntl.flock(part_file, fcntl.LOCK_EX)
+    return part_file
+
+
+def _abandoned(path):
+    """Whether no recorder is writing the ``.part`` file ``path`` any more."""
+    if fcntl is None:
+        return time.time() - os.path.getmtime(path) >= STALE_PART_SECONDS
+    with open(path, "rb") as part_file:
+        try:
+            fcntl.flock(part_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+    return True
+
+
+def recover_partial_files(directory):
+    """
+    Finalise files left behind by a recorder that did not shut down cleanly; returns their paths.
+
+    Files that other recorders are still writing are left alone: they hold a lock on them
+    (see ``open_partial_file``), or without file locks, they were modified recently.
+
+    Ogg/Opus, FLAC and WAV are written as streams, so a file cut short is still decodable up to
+    its last complete packet (a WAV header may claim fewer frames than the file holds).
+    """
+    recovered = []
+    if not os.path.isdir(directory):
+        return recovered
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(PART_SUFFIX):
+            path = os.path.join(directory, name)
+            try:
+                if not _abandoned(path):
+                    continue
+                os.replace(path, path[:-len(PART_SUFFIX)])
+            except FileNotFoundError:  # finished by its recorder meanwhile
+                continue
+            recovered.append(path[:-len(PART_SUFFIX)])
+    return recovered
+
+
+class WavSink:
+    """Writes every recording segment to its own WAV file."""
+
+    def __init__(self, directory, rate, channels=1, sample_width=2, filename_prefix="audio_chunk"):
+        self.directory = directory
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.filename_prefix = filename_prefix
+        self.wave = None
+        self.part_file = None  # the locked ``.part`` file the segment is written to
+        self.path = None
+        self.stats = {"bytes_in": 0, "bytes_out": 0}
+
+    def open_segment(self, start_time):
+        self.path = timestamped_path(self.directory, self.filename_prefix, start_time, "wav")
+        self.part_file = open_partial_file(self.path + PART_SUFFIX)
+        self.wave = wave.open(self.part_file, 'wb')
+        self.wave.setnchannels(self.channels)
+        self.wave.setsampwidth(self.sample_width)
+        self.wave.setframerate(self.rate)
+
+    def write(self, data):
+        self.wave.writeframes(data)
+        self.stats["bytes_in"] += len(data)
+
+    def close_segment(self):
+        """Finish the segment; returns its fields for the recording index."""
+        self.wave.close()
+        self.wave = None
+        os.replace(self.path + PART_SUFFIX, self.path)
+        self.part_file.close()
+        self.part_file = None
+        self.stats["bytes_out"] += os.path.getsize(self.path)
+        return {"file": os.path.basename(self.path), "offset": 0.0}
+
+    def close(self):
+        if self.wave is not None:
+            self.close_segment()
+
+
+class EncoderSink:
+    """
+    Streams recording segments through one long-lived ffmpeg process into compressed files.
+
+    Segments are appended to the same output file, and the index records each segment's
+    ``offset`` in seconds within it. The file is rotated, at a segment boundary, once it is
+    ``rotate_seconds`` old; only then is a new ffmpeg process started. The file being written
+    carries a ``.part`` suffix, removed once ffmpeg has finished it, and ``recover_partial_files``
+    finalises those left behind by a crash. If ffmpeg dies, the segment continues in a new file.
+
+    ``stats`` compares the PCM that went in with the bytes that came out, and counts the CPU time
+    the encoder processes used.
+    """
+
+    def __init__(self, directory, rate, channels=1, sample_width=2, record_format="opus", bitrate="24k",
+                 rotate_seconds=3600, filename_prefix="audio", converter=None):
+        if record_format not in ENCODED_FORMATS:
+            raise ValueError(f"Unknown encoded recording format {record_format!r}; expected one of {tuple(ENCODED_FORMATS)}")
+        if converter is None:
+            from pydub import AudioSegment  # pydub finds ffmpeg (or avconv) on the PATH
+            converter = AudioSegment.converter
+        self.directory = directory
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.record_format = record_format
+        self.bitrate = bitrate
+        self.rotate_seconds = rotate_seconds
+        self.filename_prefix = filename_prefix
+        self.converter = converter
+
+        self.process = None
+        self.errors = collections.deque(maxlen=20)  # last lines ffmpeg wrote to stderr
+        self.errors_thread = None  # reads ffmpeg's stderr as it comes, so a chatty ffmpeg never blocks on a full pipe
+        self.part_file = None  # held open to keep the ``.part`` file ffmpeg is writing locked
+        self.path = None
+        self.opened_at = None  # monotonic time the current file was started
+        self.file_frames = 0  # frames written to the current file
+        self.segment_path = None  # file the current segment started in
+        self.segment_offset = 0.0
+        self.stats = {"bytes_in": 0, "bytes_out": 0, "files": 0, "encoder_restarts": 0, "encoder_cpu_seconds": 0.0}
+
+    def _command(self, path):
+        codec_options = ENCODED_FORMATS[self.record_format][1]
+        command = [
+            self.converter, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", SAMPLE_FORMATS[self.sample_width], "-ar", str(self.rate), "-ac", str(self.channels), "-i", "pipe:0",
+        ] + codec_options
+        if self.record_format == "opus":
+            command += ["-b:a", self.bitrate]
+        return command + ["-flush_packets", "1", path]
+
+    def _start(self, start_time):
+        extension = ENCODED_FORMATS[self.record_format][0]
+        self.path = timestamped_path(self.directory, self.filename_prefix, start_time, extension)
+        self.part_file = open_partial_file(self.path + PART_SUFFIX)  # ffmpeg overwrites the same file
+        try:
+            self.process = subprocess.Popen(
+                self._command(self.path + PART_SUFFIX), stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        except OSError:
+            self.part_file.close()
+            self.part_file = None
+            raise
+        self.errors.clear()
+        self.errors_thread = threading.Thread(
+            target=self._read_errors, args=(self.process.stderr,), name="recording-encoder-errors", daemon=True
+        )
+        self.errors_thread.start()
+        self.opened_at = time.monotonic()
+        self.file_frames = 0
+        self.stats["files"] += 1
+
+    def _read_errors(self, stderr):
+        for line in stderr:
+            self.errors.append(line.decode(errors='replace').rstrip())
+        stderr.close()
+
+    def _finish(self):
+        """Close ffmpeg's input, wait for it to finish the file and remove the ``.part`` suffix."""
+        process, self.process = self.process, None
+        try:
+            self.stats["encoder_cpu_seconds"] += process_tree_usage(process.pid)["cpu_seconds"]  # just before it exits
+        except Exception:
+            pass
+        try:
+            process.stdin.close()  # flushes its input; ffmpeg finishes the file once it sees the end
+        except OSError:
+            pass  # it already died
+        process.wait()
+        self.errors_thread.join()
+        if process.returncode != 0:
+            print(f"Recording encoder exited with {process.returncode}: {'; '.join(self.errors)}")
+        if os.path.exists(self.path + PART_SUFFIX):
+            os.replace(self.path + PART_SUFFIX, self.path)
+            self.stats["bytes_out"] += os.path.getsize(self.path)
+        self.part_file.close()
+        self.part_file = None
+
+    def open_segment(self, start_time):
+        if self.process is not None and self.rotate_seconds and time.monotonic() - self.opened_at >= self.rotate_seconds:
+            self._finish()
+        if self.process is None:
+            self._start(start_time)
+        self.segment_path = self.path
+        self.segment_offset = self.file_frames / self.rate
+
+    def write(self, data):
+        for attempt in range(2):
+            if self.process is None:  # ffmpeg died during this segment: carry on in a new file
+                self.stats["encoder_restarts"] += 1
+                self._start(time.time())
+            try:
+                self.process.stdin.write(data)
+                break
+            except (BrokenPipeError, OSError) as e:
+                print(f"Recording encoder failed: {e}")
+                self._finish()
+        self.file_frames += len(data) // (self.channels * self.sample_width)
+        self.stats["bytes_in"] += len(data)
+
+    def close_segment(self):
+        """Finish the segment; returns its fields for the recording index."""
+        if self.process is not None:
+            self.process.stdin.flush()
+        entry = {"file": os.path.basename(self.segment_path), "offset": self.segment_offset}
+        if self.path != self.segment_path:
+            entry["continued_in"] = os.path.basename(self.path)
+        return entry
+
+    def close(self):
+        if self.process is not None:
+            self._finish()
+
+
+def create_sink(record_format, directory, rate, channels=1, sample_width=2, **options):
+    """
+    Return the sink writing recordings in ``record_format`` (``wav``, ``opus`` or ``flac``).
+    Falls back to WAV when ffmpeg cannot be found. ``options`` are passed on to ``EncoderSink``.
+    """
+    if record_format not in RECORD_FORMATS:
+        raise ValueError(f"Unknown recording format {record_format!r}; expected one of {RECORD_FORMATS}")
+    if record_format != "wav":
+        from pydub import AudioSegment
+        if shutil.which(AudioSegment.converter) is None:
+            print(f"ffmpeg not found, recording as WAV instead of {record_format}")
+            record_format = "wav"
+    if record_format == "wav":
+        return WavSink(directory, rate, channels, sample_width)
+    return EncoderSink(directory, rate, channels, sample_width, record_format, **options)
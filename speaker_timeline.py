@@ -0,0 +1,70 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class SpeakerTimeline:
+    """
+    Who was speaking when, built from the conference's dominant speaker events.
+
+    The timeline is a sorted list of change points: ``speakers[i]`` is the dominant speaker from
+    ``times[i]`` until ``times[i + 1]``. Looking up a moment or a phrase is a binary search, so
+    attributing a phrase never touches the page. Only the latest ``max_changes`` change points are
+    kept.
+    """
+
+    EVENT_TYPES = ('participant_joined', 'display_name_changed', 'dominant_speaker')
+
+    def __init__(self, max_changes=100000):
+        self.max_changes = max_changes
+        self.times = []  # wall clock time (seconds) of each dominant speaker change, ascending
+        self.speakers = []  # participant id that became the dominant speaker at the matching time
+        self.names = {}  # participant id -> display name
+        self.lock = threading.Lock()
+
+    def handle_event(self, event):
+        """Update the timeline from a ``ConferenceEventChannel`` event."""
+        if event['type'] == 'dominant_speaker':
+            self.add_change(event['time'], event['id'])
+        elif event.get('name'):
+            with self.lock:
+                self.names[event['id']] = event['name']
+
+    def add_change(self, time, participant_id):
+        """Record that ``participant_id`` became the dominant speaker at ``time``."""
+        with self.lock:
+            index = bisect_right(self.times, time)  # events normally arrive in order, so this is the end
+            self.times.insert(index, time)
+            self.speakers.insert(index, participant_id)
+            if len(self.times) > self.max_changes * 1.1:  # trim in batches rather than on every change
+                del self.times[:-self.max_changes]
+                del self.speakers[:-self.max_changes]
+
+    def speaker_at(self, time):
+        """Return the id of the dominant speaker at ``time``, or ``None`` if nobody had spoken yet."""
+        with self.lock:
+            index = bisect_right(self.times, time) - 1
+            return self.speakers[index] if index >= 0 else None
+
+    def speaker_between(self, start, end):
+        """Return the id of the participant who was dominant speaker for most of ``start`` to ``end``, or ``None``."""
+        if end <= start:
+            return self.speaker_at(start)
+        with self.lock:
+            first = max(bisect_right(self.times, start) - 1, 0)
+            last = bisect_left(self.times, end)
+            overlap = {}
+            for index in range(first, last):
+                interval_end = self.times[index + 1] if index + 1 < len(self.times) else end
+                seconds = min(interval_end, end) - max(self.times[index], start)
+                if seconds > 0:
+                    speaker = self.speakers[index]
+                    overlap[speaker] = overlap.get(speaker, 0) + seconds
+        return max(overlap, key=overlap.get) if overlap else None
+
+    def name_between(self, start, end, default='Unknown Speaker'):
+        """Return the display name of the main speaker between ``start`` and ``end``."""
+        speaker = self.speaker_between(start, end)
+        if speaker is None:
+            return default
+        with self.lock:
+            return self.names.get(speaker, speaker)
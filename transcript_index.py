@@ -0,0 +1,494 @@
+import argparse
+import fcntl
+import heapq
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import uuid
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from config import TRANSCRIPT_FILE, TRANSCRIPT_INDEX_DIR
+
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+SEGMENT_PREFIX = "seg-"
+
+
+def tokenize(text):
+    """The lower-cased words of ``text``, in order."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_query(query):
+    """
+    Split a query into clauses, all of which must match a phrase: ``word``, ``prefix*`` or ``"a quoted phrase"``.
+    Returns a list of ``("term", word)``, ``("prefix", prefix)`` and ``("phrase", [words])``.
+    """
+    clauses = []
+    for quoted, word in QUERY_PATTERN.findall(query):
+        prefix = word.endswith("*")
+        words = tokenize(quoted or word)
+        if prefix and len(words) == 1:
+            clauses.append(("prefix", words[0]))
+        elif len(words) == 1:
+            clauses.append(("term", words[0]))
+        elif words:
+            clauses.append(("phrase", words))
+    return clauses
+
+
+class _SegmentBuilder:
+    """Phrases indexed in memory, not written to a segment yet."""
+
+    def __init__(self):
+        self.records = []
+        self.postings = {}  # term -> {doc: [positions]}, docs ascending
+        self.sources = {}  # transcript path -> bytes of it indexed
+        self.supersedes = []  # names of the segments merged into this one
+        self.sorted_terms = None
+
+    @property
+    def doc_count(self):
+        return len(self.records)
+
+    def add(self, record):
+        doc = len(self.records)
+        self.records.append(record)
+        for position, term in enumerate(tokenize(record.get("text") or "")):
+            self.postings.setdefault(term, {}).setdefault(doc, []).append(position)
+        self.sorted_terms = None
+
+    def term_docs(self, term):
+        return self.postings.get(term, {}).keys()
+
+    def term_postings(self, term):
+        return self.postings.get(term, {})
+
+    def prefix_terms(self, prefix):
+        if self.sorted_terms is None:
+            self.sorted_terms = sorted(self.postings)
+        return _with_prefix(self.sorted_terms, prefix)
+
+    def start(self, doc):
+        return self.records[doc].get("start")
+
+    def speaker(self, doc):
+        return self.records[doc].get("speaker")
+
+    def record(self, doc):
+        return self.records[doc]
+
+    def filter_docs(self, docs, speaker=None, since=None, until=None):
+        """Yield ``(start, doc)`` for the docs said by ``speaker`` (lower-cased) between ``since`` and ``until``."""
+        for doc in docs:
+            start = self.start(doc)
+            if (since is not None or until is not None) and start is None:
+                continue
+            if (since is not None and start < since) or (until is not None and start > until):
+                continue
+            if speaker is not None and (self.speaker(doc) or "").lower() != speaker:
+                continue
+            yield start or 0, doc
+
+    def write(self, directory):
+        """Write the phrases as a new segment of the index in ``directory``; returns its name."""
+        name = f"{SEGMENT_PREFIX}{uuid.uuid4().hex}"
+        temporary = os.path.join(directory, f".{name}")
+        os.makedirs(temporary)
+
+        # Each term's docs are a run of doc_ids, and each doc's positions a run of positions
+        terms = sorted(self.postings)
+        term_offsets, doc_ids = array('Q', [0]), array('I')
+        position_offsets, positions = array('Q', [0]), array('I')
+        for term in terms:
+            for doc, doc_positions in self.postings[term].items():
+                doc_ids.append(doc)
+                positions.extend(doc_positions)
+                position_offsets.append(len(positions))
+            term_offsets.append(len(doc_ids))
+
+        speakers = sorted({record.get("speaker") or "" for record in self.records})
+        speaker_ids = {speaker: index for index, speaker in enumerate(speakers)}
+        starts = array('d', (record.get("start") if record.get("start") is not None else float("nan") for record in self.records))
+        doc_speakers = array('I', (speaker_ids[record.get("speaker") or ""] for record in self.records))
+        doc_offsets = array('Q', [0])
+        with open(os.path.join(temporary, "docs.jsonl"), "wb") as f:
+            for record in self.records:
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                doc_offsets.append(doc_offsets[-1] + len(line))
+
+        for filename, data in (("term_offsets.bin", term_offsets), ("doc_ids.bin", doc_ids),
+                               ("position_offsets.bin", position_offsets), ("positions.bin", positions),
+                               ("starts.bin", starts), ("speakers.bin", doc_speakers), ("docs.idx", doc_offsets)):
+            with open(os.path.join(temporary, filename), "wb") as f:
+                data.tofile(f)
+        with open(os.path.join(temporary, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(temporary, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"docs": len(self.records), "speakers": speakers, "sources": self.sources, "supersedes": self.supersedes},
+                      f, ensure_ascii=False)
+        os.rename(temporary, os.path.join(directory, name))  # readers only ever see complete segments
+        return name
+
+
+class _Segment:
+    """An immutable segment of the index on disk; postings and phrases are read through ``mmap``."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.doc_count = meta["docs"]
+        self.speakers = meta["speakers"]
+        self.sources = meta["sources"]
+        self.supersedes = meta.get("supersedes", [])
+        with open(os.path.join(path, "terms.json"), encoding="utf-8") as f:
+            self.terms = json.load(f)
+        self.term_ids = {term: index for index, term in enumerate(self.terms)}
+        self.term_offsets = self._load_array('Q', "term_offsets.bin")
+        self.starts = self._load_array('d', "starts.bin")
+        self.doc_speakers = self._load_array('I', "speakers.bin")
+        self.doc_offsets = self._load_array('Q', "docs.idx")
+        self.files = []
+        self.doc_ids = self._map("doc_ids.bin").cast('I')
+        self.position_offsets = self._map("position_offsets.bin").cast('Q')
+        self.positions = self._map("positions.bin").cast('I')
+        self.docs = self._map("docs.jsonl")
+
+    def _load_array(self, typecode, filename):
+        values = array(typecode)
+        with open(os.path.join(self.path, filename), "rb") as f:
+            values.frombytes(f.read())
+        return values
+
+    def _map(self, filename):
+        f = open(os.path.join(self.path, filename), "rb")
+        self.files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"")  # an empty file can't be mapped
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def term_docs(self, term):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return []
+        return self.doc_ids[self.term_offsets[term_id]:self.term_offsets[term_id + 1]].tolist()
+
+    def term_postings(self, term):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return {}
+        first, last = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        offsets = self.position_offsets[first:last + 1].tolist()
+        positions = self.positions[offsets[0]:offsets[-1]].tolist()
+        base = offsets[0]
+        return {
+            doc: positions[offsets[index] - base:offsets[index + 1] - base]
+            for index, doc in enumerate(self.doc_ids[first:last].tolist())
+        }
+
+    def prefix_terms(self, prefix):
+        return _with_prefix(self.terms, prefix)
+
+    def start(self, doc):
+        start = self.starts[doc]
+        return None if start != start else start  # NaN: the phrase had no capture time
+
+    def speaker(self, doc):
+        return self.speakers[self.doc_speakers[doc]] or None
+
+    def record(self, doc):
+        return json.loads(bytes(self.docs[self.doc_offsets[doc]:self.doc_offsets[doc + 1]]))
+
+    def filter_docs(self, docs, speaker=None, since=None, until=None):
+        """Yield ``(start, doc)`` for the docs said by ``speaker`` (lower-cased) between ``since`` and ``until``."""
+        starts = self.starts
+        if speaker is not None:
+            speaker_ids = {index for index, name in enumerate(self.speakers) if name.lower() == speaker}
+            if not speaker_ids:
+                return
+            doc_speakers = self.doc_speakers
+            docs = [doc for doc in docs if doc_speakers[doc] in speaker_ids]
+        if since is not None or until is not None:
+            since = float("-inf") if since is None else since
+            until = float("inf") if until is None else until
+            docs = [doc for doc in docs if since <= starts[doc] <= until]  # false for NaN
+        for doc in docs:
+            start = starts[doc]
+            yield (0 if start != start else start), doc
+
+    def close(self):
+        for view in (self.doc_ids, self.position_offsets, self.positions, self.docs):
+            view.release()
+        for f in self.files:
+            f.close()
+
+
+def _with_prefix(sorted_terms, prefix):
+    index = bisect_left(sorted_terms, prefix)
+    terms = []
+    while index < len(sorted_terms) and sorted_terms[index].startswith(prefix):
+        terms.append(sorted_terms[index])
+        index += 1
+    return terms
+
+
+class TranscriptIndex:
+    """
+    An inverted index over transcript files, from each word to the phrases (meeting, speaker, time) it was said in.
+
+    The index is a directory of immutable segments. ``index_file`` reads the records appended to a
+    transcript since it was last indexed and adds them to an in-memory segment, which is written
+    out once it holds ``segment_docs`` phrases, or on ``commit``. The transcript files stay the
+    source of truth: every segment records how far into each file it indexed, so records that
+    were only in memory when a process died are indexed again the next time the file is.
+
+    Once there are more than ``merge_factor`` segments, the smallest are merged into one;
+    ``merge`` compacts the whole index into a single segment. Segments are written and merged
+    under a lock file, so several processes can share an index, as long as each transcript is
+    indexed by one of them at a time.
+    """
+
+    def __init__(self, directory=TRANSCRIPT_INDEX_DIR, segment_docs=5000, merge_factor=10):
+        self.directory = directory
+        self.segment_docs = segment_docs
+        self.merge_factor = merge_factor
+        os.makedirs(directory, exist_ok=True)
+        self.pending = _SegmentBuilder()
+        self.segments = {}  # name -> _Segment, opened on first use
+        self.superseded = set()  # segments a merge replaced, which are ignored until removed
+        self.lock = threading.RLock()
+
+    def _segment_names(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX))
+
+    def _open_segments(self):
+        """
+        The segments currently on disk; segments merged away (by this or another process) are closed.
+
+        A merged segment lists the segments it replaces, so that if the merge was cut short before
+        removing them, their phrases aren't found twice: they are ignored, and the next writer removes them.
+        """
+        names = [name for name in self._segment_names() if name not in self.superseded]
+        for name in set(self.segments) - set(names):
+            self.segments.pop(name).close()
+        for name in names:
+            if name not in self.segments:
+                try:
+                    self.segments[name] = _Segment(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue  # merged away meanwhile
+        self.superseded = {name for segment in self.segments.values() for name in segment.supersedes}
+        for name in self.superseded & set(self.segments):
+            self.segments.pop(name).close()
+        return [self.segments[name] for name in names if name in self.segments]
+
+    def _remove_superseded(self):
+        """Remove the segments left behind by an interrupted merge; called under the write lock."""
+        self._open_segments()
+        for name in self.superseded:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def indexed_bytes(self, path):
+        """How much of the transcript at ``path`` is already indexed."""
+        path = os.path.abspath(path)
+        with self.lock:
+            offsets = [segment.sources.get(path, 0) for segment in self._open_segments()]
+            offsets.append(self.pending.sources.get(path, 0))
+        return max(offsets)
+
+    def index_file(self, path):
+        """Index the records added to the transcript at ``path`` since it was last indexed; returns how many there were."""
+        path = os.path.abspath(path)
+        with self.lock:
+            offset = self.indexed_bytes(path)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            data = data[:data.rfind(b"\n") + 1]  # a line still being written is indexed next time
+            count = 0
+            for line in data.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record["source"] = path
+                self.pending.add(record)
+                count += 1
+            self.pending.sources[path] = offset + len(data)
+            if self.pending.doc_count >= self.segment_docs:
+                self.commit()
+        return count
+
+    def commit(self):
+        """Write the phrases indexed in memory to a new segment, then merge segments if there are too many."""
+        with self.lock:
+            if not self.pending.sources:
+                return
+            with self._write_lock():
+                self._remove_superseded()
+                self.pending.write(self.directory)
+                self.pending = _SegmentBuilder()
+                segments = self._open_segments()
+                if len(segments) > self.merge_factor:
+                    self._merge(sorted(segments, key=lambda segment: segment.doc_count)[:self.merge_factor])
+
+    def merge(self):
+        """Compact the whole index into one segment."""
+        with self.lock:
+            self.commit()
+            with self._write_lock():
+                self._remove_superseded()
+                segments = self._open_segments()
+                if len(segments) > 1:
+                    self._merge(segments)
+
+    def _merge(self, segments):
+        builder = _SegmentBuilder()
+        for segment in segments:
+            for doc in range(segment.doc_count):
+                builder.add(segment.record(doc))
+            for path, offset in segment.sources.items():
+                builder.sources[path] = max(builder.sources.get(path, 0), offset)
+            builder.supersedes.append(os.path.basename(segment.path))
+        builder.write(self.directory)  # from here on the inputs are ignored, even if removing them is cut short
+        for segment in segments:
+            shutil.rmtree(segment.path)  # readers that have it mapped keep reading it until they notice
+        self._open_segments()
+
+    def _write_lock(self):
+        return _FileLock(os.path.join(self.directory, ".lock"))
+
+    def search(self, query, speaker=None, since=None, until=None, limit=20):
+        """
+        The most recent phrases matching ``query`` (see ``parse_query``), newest first.
+
+        ``speaker`` keeps only the phrases of that speaker (case-insensitive), ``since`` and
+        ``until`` only those that started in that time range (wall clock seconds). Each result is
+        the transcript record, with the ``source`` file it came from.
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+        speaker = speaker.lower() if speaker is not None else None
+        with self.lock:
+            matches = []
+            for segment in self._open_segments() + [self.pending]:
+                docs = self._matching_docs(segment, clauses)
+                if docs:
+                    matches.extend((start, segment, doc) for start, doc in segment.filter_docs(docs, speaker, since, until))
+            newest = heapq.nlargest(limit, matches, key=lambda match: match[0])
+            return [segment.record(doc) for _, segment, doc in newest]
+
+    def _matching_docs(self, segment, clauses):
+        docs = None
+        for kind, value in sorted(clauses, key=lambda clause: clause[0] == "prefix"):  # exact terms narrow it down fastest
+            if kind == "term":
+                found = set(segment.term_docs(value))
+            elif kind == "prefix":
+                found = set()
+                for term in segment.prefix_terms(value):
+                    found.update(segment.term_docs(term))
+            else:
+                found = self._phrase_docs(segment, value, docs)
+            docs = found if docs is None else docs & found
+            if not docs:
+                return set()
+        return docs
+
+    def _phrase_docs(self, segment, words, candidates):
+        postings = [segment.term_postings(word) for word in words]
+        docs = set.intersection(*(set(p) for p in postings))
+        if candidates is not None:
+            docs &= candidates
+        found = set()
+        for doc in docs:
+            positions = [set(p[doc]) for p in postings]
+            if any(all(start + i in positions[i] for i in range(1, len(words))) for start in positions[0]):
+                found.add(doc)
+        return found
+
+    def close(self):
+        """Write what is indexed in memory and close the segments."""
+        with self.lock:
+            self.commit()
+            for segment in self.segments.values():
+                segment.close()
+            self.segments = {}
+
+
+class _FileLock:
+    """An exclusive ``flock`` on ``path`` for the duration of a ``with`` block; shared between processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def transcript_files(paths):
+    """The transcript files among ``paths``, looking for ``TRANSCRIPT_FILE`` and other ``*.jsonl`` files in directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name == TRANSCRIPT_FILE or name.endswith(".jsonl"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def parse_time(value):
+    """Seconds since the epoch, or an ISO date/time such as ``2024-05-01`` or ``2024-05-01T14:30``."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and search the inverted index over meeting transcripts.")
+    parser.add_argument("--index", default=TRANSCRIPT_INDEX_DIR, help="index directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index what is new in transcript files")
+    build.add_argument("paths", nargs="+", help="transcript files, or directories to look for them in")
+    commands.add_parser("compact", help="merge the whole index into one segment")
+    query = commands.add_parser("query", help='search for words, prefix* and "exact phrases"')
+    query.add_argument("query")
+    query.add_argument("--speaker")
+    query.add_argument("--since", type=parse_time)
+    query.add_argument("--until", type=parse_time)
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = TranscriptIndex(args.index)
+    try:
+        if args.command == "build":
+            for path in transcript_files(args.paths):
+                print(f"{path}: {index.index_file(path)} new phrases")
+        elif args.command == "compact":
+            index.merge()
+        else:
+            for record in index.search(args.query, args.speaker, args.since, args.until, args.limit):
+                start = datetime.fromtimestamp(record["start"]).strftime("%Y-%m-%d %H:%M:%S") if record.get("start") else "-"
+                meeting = record.get("meeting") or os.path.dirname(record["source"])
+                print(f"[{start}] {meeting} {record['speaker']}: {record['text']}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
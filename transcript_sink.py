@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+FSYNC_POLICIES = ("never", "interval", "always")
+
+
+class TranscriptSink:
+    """
+    Appends a meeting's recognised phrases to a JSON Lines transcript through one open file.
+
+    ``write`` only queues the record; a background thread writes whatever has queued up every
+    ``flush_interval`` seconds (sooner once ``max_buffered`` records are waiting), as a single
+    ``write`` to a file opened for appending, so the lines of bots sharing a transcript never
+    interleave. ``fsync_policy`` decides when the data is forced to disk: ``never`` leaves it
+    to the OS, ``interval`` syncs after every periodic flush and ``always`` writes and syncs each
+    record before ``write`` returns.
+
+    Every record carries ``meeting``, ``speaker``, ``text``, ``start`` and ``end`` (wall clock
+    time of the captured phrase), ``latency`` (seconds from the end of the phrase until it was
+    recognised) and ``backend`` (the recognizer that produced the text).
+    """
+
+    def __init__(self, path, meeting_id=None, flush_interval=1.0, fsync_policy="interval", max_buffered=1000,
+                 on_flush=None):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown transcript fsync policy {fsync_policy!r}; expected one of {FSYNC_POLICIES}")
+        self.path = path
+        self.meeting_id = meeting_id
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self.max_buffered = max_buffered
+        self.on_flush = on_flush  # called after records were written, e.g. to index them
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "ab", buffering=0)  # unbuffered: every flush is one write(2)
+        self.buffer = []  # encoded lines waiting for the flush thread
+        self.condition = threading.Condition()
+        self.file_lock = threading.Lock()
+        self.stats = {"records": 0, "flushes": 0, "fsyncs": 0, "bytes": 0}
+
+        self.running = True
+        self.thread = threading.Thread(target=self._flush_loop, name="transcript-sink", daemon=True)
+        self.thread.start()
+
+    def write(self, speaker, text, phrase=None, backend=None):
+        """Queue a transcript record for ``text`` spoken by ``speaker``; ``phrase`` is the ``transcription.Phrase`` it came from."""
+        record = {"meeting": self.meeting_id, "speaker": speaker, "text": text}
+        if phrase is not None:
+            record["start"] = round(phrase.capture_start, 3)
+            record["end"] = round(phrase.capture_end, 3)
+            if phrase.recognized_at is not None:
+                record["latency"] = round(phrase.recognized_at - phrase.capture_end, 3)
+            backend = backend or phrase.backend
+        record["backend"] = backend
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        if self.fsync_policy == "always":
+            self._write([line])
+            return
+        with self.condition:
+            self.buffer.append(line)
+            if len(self.buffer) >= self.max_buffered:
+                self.condition.notify()
+
+    def flush(self):
+        """Write the queued records now."""
+        with self.condition:
+            lines, self.buffer = self.buffer, []
+        if lines:
+            self._write(lines)
+
+    def close(self):
+        """Stop the flush thread, write what is still queued and close the file."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+        self.flush()
+        with self.file_lock:
+            if self.fsync_policy != "never":
+                os.fsync(self.file.fileno())
+            self.file.close()
+
+    def _write(self, lines):
+        data = b"".join(lines)
+        with self.file_lock:
+            self.file.write(data)
+            self.stats["records"] += len(lines)
+            self.stats["flushes"] += 1
+            self.stats["bytes"] += len(data)
+            if self.fsync_policy != "never":
+                os.fsync(self.file.fileno())
+                self.stats["fsyncs"] += 1
+        if self.on_flush is not None:
+            try:
+                self.on_flush()
+            except Exception as e:
+                print(f"Error after writing transcript {self.path}: {e}")
+
+    def _flush_loop(self):
+        while True:
+            with self.condition:
+                if self.running and len(self.buffer) < self.max_buffered:
+                    self.condition.wait(self.flush_interval)
+                if not self.running:
+                    return
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Error writing transcript {self.path}: {e}")
+                time.sleep(self.flush_interval)
+
+
+def read_transcript(path):
+    """Yield the records of a JSON Lines transcript, skipping a last line cut short by a crash."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def render_text(records, timestamps=True):
+    """Yield the plain-text transcript lines, ``[HH:MM:SS] speaker: text``, for transcript records."""
+    for record in records:
+        line = f"{record['speaker']}: {record['text']}"
+        if timestamps and record.get("start") is not None:
+            line = f"[{datetime.fromtimestamp(record['start']).strftime('%H:%M:%S')}] {line}"
+        yield line
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python transcript_sink.py transcript.jsonl")
+        sys.exit(1)
+    for line in render_text(read_transcript(sys.argv[1])):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import os
+import queue
+import threading
+import time
+import wave
+from collections import deque
+
+import speech_recognition as sr
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest", "spill")
+
+
+class Phrase:
+    """A captured phrase, numbered in capture order."""
+
+    def __init__(self, seq, audio, capture_start, capture_end):
+        self.seq = seq
+        self.audio = audio
+        self.capture_start = capture_start  # wall clock time (seconds) of the first captured sample
+        self.capture_end = capture_end  # wall clock time (seconds) when listen() returned the phrase
+        self.spill_path = None  # set when the phrase audio was spilled to disk instead of queued
+        self.backend = None  # name of the recognizer the phrase is sent to
+        self.recognized_at = None  # wall clock time (seconds) when the recognizer returned
+
+
+class TranscriptionPipeline:
+    """
+    Decouples audio capture from speech recognition.
+
+    A single capture thread only runs ``Recognizer.listen`` and pushes phrases onto a bounded queue.
+    A pool of recognizer workers drains the queue in parallel, and results are handed to
+    ``on_result(phrase, text, error)`` strictly in capture order, one at a time.
+
+    When the queue is full, ``overflow_policy`` decides what happens to a new phrase:
+    ``block`` waits for room (capture stalls), ``drop_oldest`` discards the oldest queued phrase,
+    ``drop_newest`` discards the new phrase and ``spill`` writes it to ``spill_dir`` as WAV until
+    the workers catch up.
+    """
+
+    def __init__(self, recognizer, source_factory, recognize, on_result,
+                 workers=4, queue_size=32, overflow_policy="spill", spill_dir="spill",
+                 listen_timeout=1, phrase_time_limit=None, on_source_ready=None, backend=None, on_timing=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r}; expected one of {OVERFLOW_POLICIES}")
+        if workers < 1 or queue_size < 1:
+            raise ValueError("Worker count and queue size must be positive")
+
+        self.recognizer = recognizer
+        self.source_factory = source_factory
+        self.recognize = recognize
+        self.on_result = on_result
+        self.worker_count = workers
+        self.overflow_policy = overflow_policy
+        self.spill_dir = spill_dir
+        self.listen_timeout = listen_timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.on_source_ready = on_source_ready  # called with the opened source before the first phrase is captured
+        # recorded on every phrase, e.g. "google" for ``Recognizer.recognize_google``
+        self.backend = backend or getattr(recognize, "__name__", "unknown").replace("recognize_", "", 1)
+        self.on_timing = on_timing  # called as on_timing("listen", seconds) for every captured phrase, if set
+
+        self.phrases = queue.Queue(maxsize=queue_size)
+        self.spilled = deque()  # phrases spilled to disk, oldest first
+        self.spill_lock = threading.Lock()
+
+        self.results = {}  # seq -> (phrase, text, error), waiting for earlier phrases to finish
+        self.next_seq = 0  # next sequence number to hand to on_result
+        self.results_lock = threading.Lock()
+        self.emit_lock = threading.Lock()
+
+        self.stats = {"captured": 0, "recognized": 0, "dropped": 0, "spilled": 0, "errors": 0}
+        self.stats_lock = threading.Lock()
+
+        self.running = False
+        self.capture_done = threading.Event()
+        self.capture_thread = None
+        self.worker_threads = []
+
+    def start(self):
+        """Start the capture thread and the recognizer workers."""
+        self.running = True
+        self.capture_done.clear()
+        self.worker_threads = [
+            threading.Thread(target=self._worker_loop, name=f"recognizer-{i}", daemon=True)
+            for i in range(self.worker_count)
+        ]
+        for thread in self.worker_threads:
+            thread.start()
+        self.capture_thread = threading.Thread(target=self._capture_loop, name="capture", daemon=True)
+        self.capture_thread.start()
+
+    def stop(self, timeout=None):
+        """Stop capturing, let the workers drain what is already queued and wait for them."""
+        self.running = False
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout)
+        for thread in self.worker_threads:
+            thread.join(timeout)
+
+    def _count(self, name, amount=1):
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def _capture_loop(self):
+        seq = 0
+        try:
+            with self.source_factory() as source:
+                print("Listening for audio...")
+                if self.on_source_ready is not None:
+                    self.on_source_ready(source)
+                while self.running:
+                    listen_started = time.perf_counter()
+                    try:
+                        audio = self.recognizer.listen(source, timeout=self.listen_timeout,
+                                                       phrase_time_limit=self.phrase_time_limit)
+                    except sr.WaitTimeoutError:
+                        continue  # no phrase started, check whether we should stop and listen again
+                    except Exception as e:
+                        print(f"Error during capture: {e}")
+                        continue
+                    if len(audio.frame_data) == 0:
+                        break  # the source has no more audio (e.g. the end of an ``AudioFile``)
+
+                    capture_end = time.time()
+                    if self.on_timing is not None:
+                        self.on_timing("listen", time.perf_counter() - listen_started)
+                    duration = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+                    self._count("captured")
+                    phrase = Phrase(seq, audio, capture_end - duration, capture_end)
+                    phrase.backend = self.backend
+                    self._enqueue(phrase)
+                    seq += 1
+        finally:
+            self.capture_done.set()
+
+    def _enqueue(self, phrase):
+        if self.overflow_policy == "block":
+            self.phrases.put(phrase)
+            return
+
+        with self.spill_lock:
+            if self.spilled:  # keep FIFO order while a spill backlog exists
+                self._spill(phrase)
+                return
+
+        try:
+            self.phrases.put_nowait(phrase)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == "drop_newest":
+            self._drop(phrase)
+        elif self.overflow_policy == "drop_oldest":
+            try:
+                self._drop(self.phrases.get_nowait())
+            except queue.Empty:
+                pass
+            self._enqueue(phrase)
+        else:
+            with self.spill_lock:
+                self._spill(phrase)
+
+    def _drop(self, phrase):
+        self._count("dropped")
+        print(f"Transcription queue full, dropped phrase {phrase.seq}")
+        self._complete(phrase, None, None)
+
+    def _spill(self, phrase):
+        """Write the phrase audio to disk; must be called with ``spill_lock`` held."""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"phrase_{os.getpid()}_{phrase.seq}.wav")
+        with open(path, "wb") as f:
+            f.write(phrase.audio.get_wav_data())
+        phrase.audio, phrase.spill_path = None, path
+        self.spilled.append(phrase)
+        self._count("spilled")
+
+    def _unspill(self):
+        """Return the oldest spilled phrase with its audio loaded back from disk, or ``None``."""
+        with self.spill_lock:
+            if not self.spilled:
+                return None
+            phrase = self.spilled.popleft()
+        with wave.open(phrase.spill_path, "rb") as wf:
+            phrase.audio = sr.AudioData(wf.readframes(wf.getnframes()), wf.getframerate(), wf.getsampwidth())
+        os.remove(phrase.spill_path)
+        phrase.spill_path = None
+        return phrase
+
+    def _next_phrase(self):
+        """Return the oldest pending phrase (queued phrases are always older than spilled ones), or ``None`` once capture has finished and everything is drained."""
+        while True:
+            finished = self.capture_done.is_set()  # checked first, so nothing captured before it was set is missed below
+            try:
+                return self.phrases.get_nowait()
+            except queue.Empty:
+                pass
+            phrase = self._unspill()
+            if phrase is not None:
+                return phrase
+            if finished:
+                return None
+            try:
+                return self.phrases.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+    def _worker_loop(self):
+        while True:
+            phrase = self._next_phrase()
+            if phrase is None:
+                return
+            text, error = None, None
+            try:
+                text = self.recognize(phrase.audio)
+                self._count("recognized")
+            except Exception as e:
+                error = e
+                self._count("errors")
+            phrase.recognized_at = time.time()
+            self._complete(phrase, text, error)
+
+    def _complete(self, phrase, text, error):
+        with self.results_lock:
+            self.results[phrase.seq] = (phrase, text, error)
+
+        # only one thread emits at a time, and it emits every result that is ready in order
+        with self.emit_lock:
+            while True:
+                with self.results_lock:
+                    ready = self.results.pop(self.next_seq, None)
+                    if ready is None:
+                        return
+                    self.next_seq += 1
+                try:
+                    self.on_result(*ready)
+                except Exception as e:
+                    print(f"Error handling transcription result: {e}")